@@ -0,0 +1,142 @@
+"""Offline latency/throughput benchmark for the ``company`` lookups.
+
+Runs extraction, competitor and subsidiary flows against the local fake
+OpenAI server at several concurrency levels and reports p50/p95/p99
+latency and throughput, so caching, batching and async changes can be
+compared without network access or API spend.
+
+    python benchmarks/bench.py --latency 0.2 --concurrency 1 4 16 --requests 64
+    OPENAI_API_KEY=sk-... python benchmarks/bench.py --mode record --cassette benchmarks/cassettes/run.json
+    python benchmarks/bench.py --mode replay --cassette benchmarks/cassettes/run.json
+"""
+from typing import Callable, Dict, List, Optional
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+from fake_openai import FakeOpenAI
+
+# Requests and tokens per minute no benchmark gets near: the fake server sends no rate-limit headers.
+UNLIMITED = (1e9, 1e12)
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile of ``samples`` (q in 0..100)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def run_flow(call: Callable[[int], object], requests: int, concurrency: int) -> Dict[str, float]:
+    """Issue ``requests`` calls with ``concurrency`` worker threads and summarize their latencies."""
+    latencies: List[float] = []
+    errors: List[Exception] = []
+
+    def timed(i: int) -> None:
+        start = time.perf_counter()
+        try:
+            call(i)
+        except Exception as e:
+            errors.append(e)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, range(requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "throughput_rps": requests / elapsed if elapsed else 0.0,
+    }
+
+
+def flows(distinct: int) -> Dict[str, Callable[[int], object]]:
+    """Benchmarked calls; ``distinct`` bounds how many different inputs each flow cycles through."""
+    from company import _get_company, _get_competitors, _get_subsidiaries
+
+    return {
+        # Lowercase names defeat the local gazetteer, so these reach the model.
+        "extraction": lambda i: _get_company(f"news about acme {i % distinct} and globex {i % distinct}"),
+        "extraction_local": lambda i: _get_company("news about NVIDIA and Microsoft"),
+        "competitors": lambda i: _get_competitors(company_name=f"Benchmark Target {i % distinct}"),
+        "subsidiaries": lambda i: _get_subsidiaries(company_name=f"Benchmark Target {i % distinct}"),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--flows", nargs="+", default=["extraction", "extraction_local", "competitors", "subsidiaries"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=64, help="calls per flow and concurrency level")
+    parser.add_argument("--distinct", type=int, default=1_000_000, help="distinct inputs per flow (lower to exercise caching)")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--mode", choices=["synthetic", "replay", "record"], default="synthetic")
+    parser.add_argument("--cassette", type=Path)
+    parser.add_argument(
+        "--cache", action="store_true", help="keep the result cache and near-duplicate memo enabled (memory only)",
+    )
+    parser.add_argument(
+        "--limits", action="store_true", help="keep the default client-side rate limits instead of lifting them",
+    )
+    parser.add_argument("--no-cascade", action="store_true", help="send every lookup to the strong model")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per result")
+    args = parser.parse_args(argv)
+
+    server = FakeOpenAI(
+        latency=args.latency, jitter=args.jitter, rate_limit_rate=args.rate_limit_rate,
+        server_error_rate=args.error_rate, mode=args.mode, cassette=args.cassette, seed=0,
+    ).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    if args.mode != "record":
+        os.environ["OPENAI_API_KEY"] = "fake-key"
+
+    from company import (
+        NearDuplicateCache, ResultCache, Scheduler, set_cascade, set_engine, set_neardup_cache, set_result_cache,
+        set_scheduler,
+    )
+    from company.scheduler import DEFAULT_LIMITS
+    set_scheduler(None if args.limits else Scheduler({model: UNLIMITED for model in DEFAULT_LIMITS}))
+    set_engine(None)
+    set_cascade(not args.no_cascade)
+
+    available = flows(args.distinct)
+    if not args.json:
+        print(f"{'flow':<18}{'conc':>6}{'reqs':>6}{'errs':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    try:
+        for name in args.flows:
+            for concurrency in args.concurrency:
+                # Every run starts cold, so later runs do not measure the earlier runs' hits.
+                set_result_cache(ResultCache() if args.cache else None)
+                set_neardup_cache(NearDuplicateCache() if args.cache else None)
+                result = run_flow(available[name], args.requests, concurrency)
+                result["flow"] = name
+                if args.json:
+                    print(json.dumps(result))
+                else:
+                    print(
+                        f"{name:<18}{concurrency:>6}{result['requests']:>6}{result['errors']:>6}"
+                        f"{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+                        f"{result['throughput_rps']:>10.1f}"
+                    )
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
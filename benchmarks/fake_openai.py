@@ -0,0 +1,310 @@
+"""Local stand-in for the OpenAI chat-completions endpoint.
+
+Speaks enough of the protocol for the ``company`` package (plain and
+streamed completions, usage accounting, 429/5xx errors with retry-after)
+and can record real responses into, or replay them from, a cassette file.
+
+    python benchmarks/fake_openai.py --port 8011 --latency 0.3 --error-rate 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8011/v1 OPENAI_API_KEY=fake streamlit run streamlit_app.py
+"""
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+UPSTREAM_URL = "https://api.openai.com/v1/chat/completions"
+
+
+def _prompt_text(request: Dict[str, Any]) -> str:
+    return "\n".join(str(m.get("content", "")) for m in request.get("messages", []))
+
+
+def _token_estimate(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def interaction_key(request: Dict[str, Any]) -> str:
+    """Identify a request by model, messages and the generation settings that change the reply."""
+    parts = {k: request.get(k) for k in ("model", "messages", "max_tokens", "temperature", "response_format")}
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+def synthetic_reply(request: Dict[str, Any]) -> str:
+    """Produce a well-formed reply for the package's prompts without any model."""
+    prompt = _prompt_text(request)
+    # JSON mode can only return an object, so arrays are wrapped as {"items": [...]}.
+    json_mode = (request.get("response_format") or {}).get("type") == "json_object"
+    if "Extract all company names" in prompt:
+        text = prompt.split("Text:", 1)[-1].rsplit("JSON Array:", 1)[0].split("Return a JSON object", 1)[0]
+        names = sorted(set(re.findall(r"\b[A-Z][A-Za-z&']+(?:\s+[A-Z][A-Za-z&']+)*", text)))
+        return json.dumps({"items": names} if json_mode else names)
+    keys = re.findall(r"- Key: (.*?) \|", prompt)
+    if "competitors" in prompt.lower():
+        row = lambda i, k: {"rank": i, "company_name": f"Rival {i} of {k}", "ticker": "N/A",
+                            "reason": "Competes in the same core market."}
+        count = 5
+    else:
+        row = lambda i, k: {"company_name": f"{k} Subsidiary {i}", "ticker": "N/A",
+                            "details": "Wholly owned operating unit."}
+        count = 3
+    if keys:
+        return json.dumps({k: [row(i, k) for i in range(1, count + 1)] for k in keys})
+    if "**Text:**" in prompt:
+        # The fused analyze prompt: companies in the text, each with its relation.
+        relation = "competitors" if "competitors" in prompt.lower() else "subsidiaries"
+        text = prompt.split("**Text:**", 1)[1].split("**Instructions:**", 1)[0]
+        names = sorted(set(re.findall(r"\b[A-Z][A-Za-z&']+(?:\s+[A-Z][A-Za-z&']+)*", text)))
+        return json.dumps({"companies": [
+            {"company_name": n, "ticker": "N/A", relation: [row(i, n) for i in range(1, count + 1)]} for n in names
+        ]})
+    match = re.search(r"Name: (.*)", prompt)
+    name = match.group(1).strip() if match else "Target"
+    rows = [row(i, name) for i in range(1, count + 1)]
+    return json.dumps({"items": rows} if json_mode else rows)
+
+
+class Cassette:
+    """JSON file of recorded interactions keyed by interaction_key."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.interactions: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            for item in json.loads(self.path.read_text()).get("interactions", []):
+                self.interactions[item["key"]] = item
+
+    def get(self, request: Dict[str, Any]) -> Optional[str]:
+        item = self.interactions.get(interaction_key(request))
+        return item["content"] if item else None
+
+    def add(self, request: Dict[str, Any], content: str) -> None:
+        with self._lock:
+            self.interactions[interaction_key(request)] = {
+                "key": interaction_key(request),
+                "model": request.get("model"),
+                "prompt": _prompt_text(request)[:200],
+                "content": content,
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps({"interactions": list(self.interactions.values())}, indent=2))
+
+
+class FakeOpenAI:
+    """Threaded HTTP server answering /v1/chat/completions.
+
+    ``mode`` is "synthetic" (generate replies locally), "replay" (answer
+    from the cassette, 404 on a miss) or "record" (forward to OpenAI with
+    ``upstream_key`` and store each reply in the cassette).
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        token_latency: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        server_error_rate: float = 0.0,
+        retry_after: float = 1.0,
+        mode: str = "synthetic",
+        cassette: Optional[Path] = None,
+        upstream_key: Optional[str] = None,
+        responder: Callable[[Dict[str, Any]], str] = synthetic_reply,
+        seed: Optional[int] = None,
+    ):
+        if mode in ("replay", "record") and cassette is None:
+            raise ValueError(f"{mode} mode needs a cassette")
+        self.latency = latency
+        self.jitter = jitter
+        self.token_latency = token_latency
+        self.rate_limit_rate = rate_limit_rate
+        self.server_error_rate = server_error_rate
+        self.retry_after = retry_after
+        self.mode = mode
+        self.cassette = Cassette(cassette) if cassette is not None else None
+        self.upstream_key = upstream_key or os.getenv("OPENAI_API_KEY")
+        self.responder = responder
+        self.requests: List[Dict[str, Any]] = []
+        self._random = random.Random(seed)
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAI":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeOpenAI":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _reply(self, request: Dict[str, Any]) -> Optional[str]:
+        if self.mode == "synthetic":
+            return self.responder(request)
+        content = self.cassette.get(request)
+        if content is None and self.mode == "record":
+            content = self._forward(request)
+            self.cassette.add(request, content)
+        return content
+
+    def _forward(self, request: Dict[str, Any]) -> str:
+        body = dict(request, stream=False)
+        req = urllib.request.Request(
+            UPSTREAM_URL,
+            data=json.dumps(body).encode(),
+            headers={"Authorization": f"Bearer {self.upstream_key}", "Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(req) as response:
+            return json.loads(response.read())["choices"][0]["message"]["content"]
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._json(404, {"error": {"message": f"unknown path {self.path}"}})
+                    return
+                fake.requests.append(request)
+                time.sleep(max(0.0, fake.latency + fake._random.uniform(-fake.jitter, fake.jitter)))
+
+                roll = fake._random.random()
+                if roll < fake.rate_limit_rate:
+                    self._json(
+                        429,
+                        {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded", "code": "rate_limit_exceeded"}},
+                        {"retry-after": str(fake.retry_after), "retry-after-ms": str(int(fake.retry_after * 1000))},
+                    )
+                    return
+                if roll < fake.rate_limit_rate + fake.server_error_rate:
+                    self._json(503, {"error": {"message": "The server is overloaded", "type": "server_error"}})
+                    return
+
+                content = fake._reply(request)
+                if content is None:
+                    self._json(404, {"error": {"message": "no cassette entry for this request", "type": "cassette_miss"}})
+                    return
+                usage = {
+                    "prompt_tokens": _token_estimate(_prompt_text(request)),
+                    "completion_tokens": _token_estimate(content),
+                }
+                usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+                model = request.get("model", "fake")
+                if request.get("stream"):
+                    self._stream(model, content, usage, request)
+                else:
+                    self._json(200, {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }],
+                        "usage": usage,
+                    })
+
+            def _stream(self, model: str, content: str, usage: Dict[str, int], request: Dict[str, Any]) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+
+                def event(delta: Dict[str, Any], finish: Optional[str] = None, extra: Optional[Dict] = None) -> None:
+                    chunk = {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                    }
+                    chunk.update(extra or {})
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+
+                event({"role": "assistant", "content": ""})
+                for piece in re.findall(r".{1,4}", content, re.S):
+                    if fake.token_latency:
+                        time.sleep(fake.token_latency)
+                    event({"content": piece})
+                include_usage = (request.get("stream_options") or {}).get("include_usage")
+                event({}, "stop", {"usage": usage} if include_usage else None)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="uniform +/- seconds added to latency")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds between streamed chunks")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 503")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--mode", choices=["synthetic", "replay", "record"], default="synthetic")
+    parser.add_argument("--cassette", type=Path)
+    parser.add_argument("--upstream-key", help="real API key used in record mode")
+    args = parser.parse_args(argv)
+
+    server = FakeOpenAI(
+        args.host, args.port, args.latency, args.jitter, args.token_latency,
+        args.rate_limit_rate, args.error_rate, args.retry_after, args.mode, args.cassette, args.upstream_key,
+    )
+    print(f"fake OpenAI listening on {server.base_url} ({args.mode})")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
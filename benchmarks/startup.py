@@ -0,0 +1,109 @@
+"""Cold-start benchmark for the ``company`` package.
+
+Runs ``python -X importtime`` in fresh interpreters and reports the median
+cost of ``import company``, the heaviest modules it pulls in, and the
+deferred cost paid when the first prompt pipeline is built.  Fails when the
+import exceeds ``--max-import-ms`` or loads a module listed in ``--forbid``.
+
+    python benchmarks/startup.py --runs 7 --max-import-ms 150
+"""
+from typing import Dict, List, Optional, Tuple
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).parent.parent / "src"
+
+SCENARIOS = {
+    "import": "import company",
+    "first_pipeline": (
+        "import company\n"
+        "from company.engine import Engine\n"
+        "Engine(api_key='fake-key').pipeline('company')"
+    ),
+}
+
+DEFAULT_FORBID = ["haystack", "openai", "httpx", "dotenv"]
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """Map module name -> (self us, cumulative us) from ``-X importtime`` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def run_once(code: str) -> Tuple[float, Dict[str, Tuple[int, int]], List[str]]:
+    """Run ``code`` in a fresh interpreter; return wall ms, importtime rows and loaded top-level packages."""
+    probe = code + "\nimport sys, json\nprint(json.dumps(sorted({m.split('.')[0] for m in sys.modules})))"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(SRC), os.getenv("PYTHONPATH")])))
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe], env=env, capture_output=True, text=True, check=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    return wall_ms, parse_importtime(result.stderr), json.loads(result.stdout.splitlines()[-1])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="heaviest modules to list")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS))
+    parser.add_argument("--max-import-ms", type=float, help="fail if `import company` is slower (median)")
+    parser.add_argument("--forbid", nargs="*", default=DEFAULT_FORBID,
+                        help="packages `import company` must not load")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per scenario")
+    args = parser.parse_args(argv)
+
+    failures = []
+    for name in args.scenarios:
+        walls, imports, heaviest = [], [], {}
+        loaded: List[str] = []
+        for _ in range(args.runs):
+            wall_ms, modules, loaded = run_once(SCENARIOS[name])
+            walls.append(wall_ms)
+            imports.append(modules.get("company", (0, 0))[1] / 1000)
+            for module, (self_us, _) in modules.items():
+                heaviest.setdefault(module, []).append(self_us / 1000)
+        top = sorted(((statistics.median(v), m) for m, v in heaviest.items()), reverse=True)[:args.top]
+        result = {
+            "scenario": name,
+            "runs": args.runs,
+            "wall_ms": statistics.median(walls),
+            "import_company_ms": statistics.median(imports),
+            "heaviest_self_ms": {module: round(ms, 2) for ms, module in top},
+        }
+        if name == "import":
+            forbidden = sorted(set(args.forbid) & set(loaded))
+            result["forbidden_loaded"] = forbidden
+            if forbidden:
+                failures.append(f"`import company` loaded {', '.join(forbidden)}")
+            if args.max_import_ms is not None and result["import_company_ms"] > args.max_import_ms:
+                failures.append(f"`import company` took {result['import_company_ms']:.1f} ms "
+                                f"(limit {args.max_import_ms:.1f} ms)")
+
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print(f"{name}: interpreter {result['wall_ms']:.1f} ms, import company "
+                  f"{result['import_company_ms']:.1f} ms (median of {args.runs})")
+            for module, ms in result["heaviest_self_ms"].items():
+                print(f"  {ms:>8.2f} ms  {module}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,44 @@
-from .company import _get_company, _get_competitors, _get_subsidiaries
+from .company import (
+    _get_company, _get_competitors, _get_subsidiaries,
+    _aget_company, _aget_competitors, _aget_subsidiaries,
+    _stream_competitors, _stream_subsidiaries, _astream_competitors, _astream_subsidiaries,
+    extract_document, aextract_document,
+)
+from .document import Mention, segment_sentences
+from .cache import ResultCache, SQLiteBackend, set_result_cache
+from .engine import Engine, set_engine
+from .fanout import fan_out
+from .batch import get_competitors_many, get_subsidiaries_many
+from .resolver import Company, dedupe_companies, resolve_company
+from .rewriter import TickerRewriter, TickerSpan
+from .env import load_env
+from .graph import Edge, Expansion, RelationGraph, aexpand_relations, expand_relations, set_relation_graph
+from .metrics import JSONLExporter, Metrics, collect, get_metrics, set_metrics, summarize
+from .cascade import MalformedReplyError, check_reply, set_cascade
+from .neardup import NearDuplicateCache, set_neardup_cache
+from .analyze import Analysis, aanalyze, analyze
+from .intent import infer_intent
+from .snapshot import Snapshot, build_snapshot, set_snapshot, snapshot_age
+from .listings import Listing, ListingIndex, load_bse_listings, load_nse_listings, load_sec_listings, set_listing_index
+from .scheduler import BATCH, INTERACTIVE, Scheduler, request_priority, set_scheduler
 
-__all__ = ['_get_company', '_get_competitors', '_get_subsidiaries']
\ No newline at end of file
+__all__ = [
+    '_get_company', '_get_competitors', '_get_subsidiaries',
+    '_aget_company', '_aget_competitors', '_aget_subsidiaries',
+    '_stream_competitors', '_stream_subsidiaries', '_astream_competitors', '_astream_subsidiaries',
+    'extract_document', 'aextract_document', 'Mention', 'segment_sentences',
+    'ResultCache', 'SQLiteBackend', 'set_result_cache',
+    'Engine', 'set_engine', 'fan_out',
+    'get_competitors_many', 'get_subsidiaries_many',
+    'Company', 'dedupe_companies', 'resolve_company',
+    'TickerRewriter', 'TickerSpan',
+    'load_env',
+    'Edge', 'Expansion', 'RelationGraph', 'expand_relations', 'aexpand_relations', 'set_relation_graph',
+    'Metrics', 'JSONLExporter', 'collect', 'get_metrics', 'set_metrics', 'summarize',
+    'MalformedReplyError', 'check_reply', 'set_cascade',
+    'NearDuplicateCache', 'set_neardup_cache',
+    'Analysis', 'analyze', 'aanalyze', 'infer_intent',
+    'Snapshot', 'build_snapshot', 'set_snapshot', 'snapshot_age',
+    'Listing', 'ListingIndex', 'load_sec_listings', 'load_nse_listings', 'load_bse_listings', 'set_listing_index',
+    'Scheduler', 'request_priority', 'set_scheduler', 'INTERACTIVE', 'BATCH',
+]
@@ -0,0 +1,188 @@
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor
+from .cascade import _check_row
+from .company import (
+    _aget_company, _aget_competitors, _aget_subsidiaries, _get_company, _get_competitors, _get_gazetteer,
+    _get_subsidiaries, _store,
+)
+from .document import needs_chunking
+from .engine import _get_engine
+from .fanout import fan_out
+from .intent import infer_intent
+from .metrics import get_metrics
+from .neardup import _neardup_cache
+from .resolver import dedupe_companies
+from .rewriter import _get_rewriter
+
+
+DEFAULT_CONCURRENCY = 4
+
+# intent -> (fused pipeline, blocking lookup, async lookup)
+RELATIONS: Dict[str, Tuple[str, Callable, Callable]] = {
+    "competitors": ("analyze_competitors", _get_competitors, _aget_competitors),
+    "subsidiaries": ("analyze_subsidiaries", _get_subsidiaries, _aget_subsidiaries),
+}
+
+
+class Analysis(NamedTuple):
+    """What ``analyze`` found: the intent, the companies in order, and each company's relation rows.
+
+    ``fused`` tells whether one combined LLM call answered everything;
+    ``errors`` holds the per-company lookups that failed on the staged path.
+    """
+    intent: str
+    companies: List[str]
+    relations: Dict[str, List[Dict]]
+    fused: bool
+    errors: Dict[str, Exception]
+
+
+def _parse_fused(relation: str, reply: Optional[str]) -> Optional[List[Tuple[str, List[Dict]]]]:
+    """(company, rows) pairs from a combined reply, or None if any part fails validation."""
+    try:
+        value = json.loads(reply or "")
+    except ValueError:
+        return None
+    entries = value.get("companies") if isinstance(value, dict) else None
+    if not isinstance(entries, list):
+        return None
+    found = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            return None
+        name, rows = entry.get("company_name"), entry.get(relation)
+        if not isinstance(name, str) or not name.strip() or not isinstance(rows, list):
+            return None
+        checked = []
+        for position, row in enumerate(rows):
+            row, _, complete = _check_row(relation, position, row)
+            if not complete:
+                return None
+            checked.append(row)
+        found.append((name.strip(), checked))
+    return found
+
+
+def _known_companies(prompt: str) -> Optional[List[str]]:
+    """Companies that can be named without the LLM: a confident gazetteer match or a near-duplicate prompt."""
+    companies, confident = _get_gazetteer().extract(prompt)
+    if companies and confident:
+        return companies
+    memo = _neardup_cache()
+    return memo.get(prompt) if memo is not None else None
+
+
+def _fused_request(prompt: str) -> Optional[str]:
+    """Whether to try the combined call, and the ticker-rewritten text to send."""
+    if needs_chunking(prompt) or _known_companies(prompt) is not None:
+        return None
+    with get_metrics().timed("rewrite_tickers"):
+        return _get_rewriter().rewrite(prompt)[0]
+
+
+def _accept_fused(prompt: str, intent: str, reply: str) -> Optional[Analysis]:
+    """Turn a valid combined reply into an Analysis, remembering its parts for later lookups."""
+    found = _parse_fused(intent, reply)
+    metrics = get_metrics()
+    if found is None:
+        metrics.incr("analyze_total", intent=intent, path="fused_invalid")
+        return None
+    metrics.incr("analyze_total", intent=intent, path="fused")
+    rows_by_name = {}
+    for name, rows in found:
+        rows_by_name.setdefault(name, rows)
+    companies = dedupe_companies(list(rows_by_name))
+
+    memo = _neardup_cache()
+    if memo is not None:
+        memo.put(prompt, sorted(rows_by_name))
+    for company in companies:
+        # Keyed as a by-name lookup, so the regular functions and streams reuse it.
+        _store(intent, company, None, rows_by_name[company])
+    return Analysis(intent, companies, {company: rows_by_name[company] for company in companies}, True, {})
+
+
+def _fused_failed(intent: str) -> None:
+    # API errors, rate limits and timeouts fall back to the staged path like an invalid reply.
+    get_metrics().incr("analyze_total", intent=intent, path="fused_failed")
+
+
+def analyze(prompt: str, concurrency: int = DEFAULT_CONCURRENCY, lookups: bool = True) -> Analysis:
+    """Find the companies in ``prompt`` and their competitors or subsidiaries, whichever it asks for.
+
+    When the companies cannot be named locally, a single LLM call returns
+    them together with their relations.  Only if that combined call fails
+    or its answer fails validation (or the text is long enough for document
+    mode) does it fall back to the staged path: extract, then one lookup per
+    company, ``concurrency`` at a time, each served from the result cache
+    when it can be.  With ``lookups`` False the staged path stops after
+    extraction and leaves the per-company lookups to the caller, e.g. to
+    stream them.
+    """
+    intent = infer_intent(prompt)
+    if not prompt or not isinstance(prompt, str) or not prompt.strip():
+        return Analysis(intent, [], {}, False, {})
+
+    text = _fused_request(prompt)
+    if text is not None:
+        try:
+            reply = _get_engine().run(RELATIONS[intent][0], text=text)
+        except Exception:
+            _fused_failed(intent)
+        else:
+            analysis = _accept_fused(prompt, intent, reply)
+            if analysis is not None:
+                return analysis
+
+    get_metrics().incr("analyze_total", intent=intent, path="staged")
+    companies = dedupe_companies(_get_company(prompt))
+    lookup = RELATIONS[intent][1]
+    relations, errors = {}, {}
+    if companies and lookups:
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(companies)))) as pool:
+            # Worker threads do not inherit context variables such as the request priority.
+            futures = {
+                company: pool.submit(contextvars.copy_context().run, lookup, company_name=company)
+                for company in companies
+            }
+        for company, future in futures.items():
+            if future.exception() is not None:
+                errors[company] = future.exception()
+            else:
+                relations[company] = future.result()
+    return Analysis(intent, companies, relations, False, errors)
+
+
+async def aanalyze(prompt: str, concurrency: int = DEFAULT_CONCURRENCY, lookups: bool = True) -> Analysis:
+    """Async version of analyze."""
+    intent = infer_intent(prompt)
+    if not prompt or not isinstance(prompt, str) or not prompt.strip():
+        return Analysis(intent, [], {}, False, {})
+
+    text = _fused_request(prompt)
+    if text is not None:
+        try:
+            reply = await _get_engine().arun(RELATIONS[intent][0], text=text)
+        except Exception:
+            _fused_failed(intent)
+        else:
+            analysis = _accept_fused(prompt, intent, reply)
+            if analysis is not None:
+                return analysis
+
+    get_metrics().incr("analyze_total", intent=intent, path="staged")
+    companies = dedupe_companies(await _aget_company(prompt))
+    lookup = RELATIONS[intent][2]
+    relations, errors = {}, {}
+    if not lookups:
+        return Analysis(intent, companies, relations, False, errors)
+    async for company, result in fan_out(
+        lambda company: lookup(company_name=company), companies, concurrency, return_exceptions=True
+    ):
+        if isinstance(result, Exception):
+            errors[company] = result
+        else:
+            relations[company] = result
+    return Analysis(intent, companies, relations, False, errors)
@@ -0,0 +1,141 @@
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple, Union
+import json
+from .cascade import _check_row
+from .engine import _get_engine
+from .company import _get_competitors, _get_subsidiaries, _store, _stored
+from .metrics import get_metrics
+
+
+# A company is either a name or a (name, ticker) pair; either part may be None.
+CompanyInput = Union[str, Tuple[Optional[str], Optional[str]]]
+
+DEFAULT_MAX_BATCH_SIZE = 10
+DEFAULT_TOKEN_BUDGET = 4000
+
+# Rough completion tokens a single company's answer takes in each relation.
+_TOKENS_PER_COMPANY = {
+    "competitors": 350,
+    "subsidiaries": 700,
+}
+
+
+def _split_input(company: CompanyInput) -> Tuple[Optional[str], Optional[str]]:
+    if isinstance(company, tuple):
+        name, ticker = (tuple(company) + (None, None))[:2]
+        return name or None, ticker or None
+    return company or None, None
+
+
+def _label(name: Optional[str], ticker: Optional[str]) -> str:
+    if name and ticker:
+        return f"{name} ({ticker})"
+    return name or ticker
+
+
+def _batches(items: List, size: int) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _parse_batch(response: str, labels: List[str]) -> Dict[str, List[Dict]]:
+    """Split a batched JSON object reply back into per-label lists, skipping unusable entries."""
+    try:
+        data = json.loads(response.strip())
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    by_key = {str(k).strip().lower(): v for k, v in data.items()}
+    results = {}
+    for label in labels:
+        value = data.get(label, by_key.get(label.strip().lower()))
+        if isinstance(value, list) and all(isinstance(v, dict) for v in value):
+            results[label] = value
+    return results
+
+
+def _get_many(
+    relation: str,
+    companies: Iterable[CompanyInput],
+    single: Callable[..., List[Dict]],
+    max_batch_size: int,
+    token_budget: int,
+) -> Dict[Hashable, List[Dict]]:
+    inputs: Dict[Hashable, Tuple[Optional[str], Optional[str]]] = {}
+    for company in companies:
+        name, ticker = _split_input(company)
+        if (name or ticker) and company not in inputs:
+            inputs[company] = (name, ticker)
+
+    # Companies already in the snapshot or the result cache need no call.
+    results: Dict[Hashable, List[Dict]] = {}
+    for company, (name, ticker) in list(inputs.items()):
+        rows = _stored(relation, name, ticker)
+        if rows is not None:
+            results[company] = rows
+            del inputs[company]
+
+    per_company = _TOKENS_PER_COMPANY[relation]
+    size = max(1, min(max_batch_size, token_budget // per_company))
+    engine = _get_engine() if inputs else None
+
+    for batch in _batches(list(inputs.items()), size):
+        labels = {_label(name, ticker): company for company, (name, ticker) in batch}
+        try:
+            response = engine.run(
+                f"{relation}_batch",
+                max_tokens=min(token_budget, per_company * len(labels) * 2),
+                companies=[
+                    {"key": label, "name": inputs[company][0] or "N/A", "ticker": inputs[company][1] or "N/A"}
+                    for label, company in labels.items()
+                ],
+            )
+        except Exception:
+            # The batch's companies are asked for one at a time below.
+            get_metrics().incr("batch_failures_total", relation=relation)
+            continue
+        for label, value in _parse_batch(response, list(labels)).items():
+            company = labels[label]
+            checked = [_check_row(relation, i, item) for i, item in enumerate(value)]
+            if not all(complete for _, _, complete in checked):
+                # A garbled entry is not an answer: it is neither kept nor cached.
+                continue
+            rows = [row for row, _, _ in checked]
+            results[company] = rows
+            _store(relation, *inputs[company], rows)
+
+    # Anything a failed batch call or the batched reply dropped or garbled is asked for on its own.
+    for company, (name, ticker) in inputs.items():
+        if company not in results:
+            results[company] = single(company_name=name, company_ticker=ticker)
+    return results
+
+
+def get_competitors_many(
+    companies: Iterable[CompanyInput],
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+) -> Dict[Hashable, List[Dict]]:
+    """Get competitors for many companies, packing several into each LLM call.
+
+    Returns a dict keyed by each input company with the same lists
+    _get_competitors returns.  Companies in the snapshot or the result cache are
+    served from there, and those missing or garbled in a batched reply, or
+    in a batch call that failed, are retried one at a time.
+    """
+    return _get_many("competitors", companies, _get_competitors, max_batch_size, token_budget)
+
+
+def get_subsidiaries_many(
+    companies: Iterable[CompanyInput],
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+) -> Dict[Hashable, List[Dict]]:
+    """Get subsidiaries for many companies, packing several into each LLM call.
+
+    Returns a dict keyed by each input company with the same lists
+    _get_subsidiaries returns.  Companies in the snapshot or the result cache are
+    served from there, and those missing or garbled in a batched reply, or
+    in a batch call that failed, are retried one at a time.
+    """
+    return _get_many("subsidiaries", companies, _get_subsidiaries, max_batch_size, token_budget)
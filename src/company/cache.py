@@ -0,0 +1,268 @@
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+from collections import OrderedDict
+import contextvars
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from .env import load_env
+from .metrics import get_metrics
+
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "company" / "results.sqlite3"
+
+DAY = 24 * 60 * 60
+DEFAULT_TTLS = {
+    "competitors": 7 * DAY,
+    "subsidiaries": 30 * DAY,
+}
+
+_cache = None
+_cache_configured = False
+_cache_lock = threading.Lock()
+
+
+def cache_key(parts: Iterable[Any]) -> str:
+    """Hash the prompt template, model and inputs that fully determine a result."""
+    raw = json.dumps(list(parts), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class SQLiteBackend:
+    """On-disk store keeping at most ``max_entries`` rows, evicting the least recently used.
+
+    Access times are only rewritten once they are ``touch_interval``
+    seconds old, so hot keys are read without a disk write each time and
+    recency is tracked to that granularity.
+    """
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, max_entries: int = 100_000, touch_interval: float = 3600.0):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, relation TEXT NOT NULL, value TEXT NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created, accessed FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[2] >= self.touch_interval:
+                self._conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, relation: str, value: Any, created: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (key, relation, json.dumps(value), created, time.time()),
+            )
+            self._conn.execute(
+                "DELETE FROM results WHERE key IN ("
+                " SELECT key FROM results ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+
+
+class ResultCache:
+    """Two-level result cache: an in-memory LRU in front of an optional persistent backend.
+
+    Entries older than their relation's TTL are still served for up to
+    ``stale_ttl`` seconds while a background thread recomputes them
+    (stale-while-revalidate); past that they are recomputed inline.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[SQLiteBackend] = None,
+        max_entries: int = 1024,
+        ttls: Optional[Dict[str, float]] = None,
+        stale_ttl: float = 7 * DAY,
+    ):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.stale_ttl = stale_ttl
+        self._lru: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._tasks = set()
+        self._stats = {"hits": 0, "misses": 0, "stale_hits": 0, "refreshes": 0, "errors": 0}
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of the hit/miss counters."""
+        with self._lock:
+            return dict(self._stats)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def _count(self, name: str, relation: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+        get_metrics().incr("cache_total", relation=relation, result=name)
+
+    def _lookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+                return entry
+        if self.backend is None:
+            return None
+        entry = self.backend.get(key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: Tuple[Any, float]) -> None:
+        with self._lock:
+            self._lru[key] = entry
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def _store(self, key: str, relation: str, value: Any) -> None:
+        created = time.time()
+        self._remember(key, (value, created))
+        if self.backend is not None:
+            self.backend.set(key, relation, value, created)
+
+    def _refresh(self, key: str, relation: str, compute: Callable[[], Any]) -> None:
+        try:
+            self._store(key, relation, compute())
+        except Exception:
+            self._count("errors", relation)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _fresh(self, key: str, relation: str) -> Tuple[bool, Any, bool]:
+        """Look ``key`` up and return (found, value, start_refresh), updating the counters."""
+        entry = self._lookup(key)
+        if entry is None:
+            self._count("misses", relation)
+            return False, None, False
+        value, created = entry
+        age = time.time() - created
+        ttl = self.ttls.get(relation, 0)
+        if age <= ttl:
+            self._count("hits", relation)
+            return True, copy.deepcopy(value), False
+        if age > ttl + self.stale_ttl:
+            self._count("misses", relation)
+            return False, None, False
+        with self._lock:
+            self._stats["stale_hits"] += 1
+            start = key not in self._refreshing
+            if start:
+                self._refreshing.add(key)
+                self._stats["refreshes"] += 1
+        get_metrics().incr("cache_total", relation=relation, result="stale_hits")
+        return True, copy.deepcopy(value), start
+
+    async def _arefresh(self, key: str, relation: str, compute: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            self._store(key, relation, await compute())
+        except Exception:
+            self._count("errors", relation)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, relation: str, key_parts: Iterable[Any]) -> Optional[Any]:
+        """Return the cached result for ``key_parts`` if it is within its TTL, else None."""
+        entry = self._lookup(cache_key([relation, *key_parts]))
+        if entry is None or time.time() - entry[1] > self.ttls.get(relation, 0):
+            self._count("misses", relation)
+            return None
+        self._count("hits", relation)
+        return copy.deepcopy(entry[0])
+
+    def put(self, relation: str, key_parts: Iterable[Any], value: Any) -> None:
+        """Store a result computed outside get_or_compute, e.g. assembled from a stream."""
+        self._store(cache_key([relation, *key_parts]), relation, copy.deepcopy(value))
+
+    def get_or_compute(self, relation: str, key_parts: Iterable[Any], compute: Callable[[], Any]) -> Any:
+        """Return the cached result for ``key_parts`` or compute, store and return it."""
+        key = cache_key([relation, *key_parts])
+        found, value, refresh = self._fresh(key, relation)
+        if refresh:
+            context = contextvars.copy_context()
+            threading.Thread(
+                target=context.run, args=(self._refresh, key, relation, compute), daemon=True
+            ).start()
+        if found:
+            return value
+        value = compute()
+        self._store(key, relation, value)
+        return copy.deepcopy(value)
+
+    async def aget_or_compute(
+        self, relation: str, key_parts: Iterable[Any], compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Async version of get_or_compute; ``compute`` returns an awaitable."""
+        key = cache_key([relation, *key_parts])
+        found, value, refresh = self._fresh(key, relation)
+        if refresh:
+            import asyncio
+            task = asyncio.get_running_loop().create_task(self._arefresh(key, relation, compute))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        if found:
+            return value
+        value = await compute()
+        self._store(key, relation, value)
+        return copy.deepcopy(value)
+
+
+def _result_cache() -> Optional[ResultCache]:
+    """Return the shared result cache, creating it from COMPANY_CACHE_PATH on first use.
+
+    An empty COMPANY_CACHE_PATH keeps the cache in memory only.
+    """
+    global _cache, _cache_configured
+    if not _cache_configured:
+        with _cache_lock:
+            if not _cache_configured:
+                load_env()
+                path = os.getenv("COMPANY_CACHE_PATH", str(DEFAULT_CACHE_PATH))
+                backend = SQLiteBackend(Path(path)) if path else None
+                _cache = ResultCache(backend)
+                _cache_configured = True
+    return _cache
+
+
+def set_result_cache(cache: Optional[ResultCache]) -> None:
+    """Replace the shared result cache; ``None`` disables caching."""
+    global _cache, _cache_configured
+    with _cache_lock:
+        _cache = cache
+        _cache_configured = True
@@ -0,0 +1,222 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import json
+import os
+import re
+from .engine import _get_engine
+from .env import load_env
+from .listings import check_ticker
+from .metrics import get_metrics
+from .streaming import JSONArrayParser
+
+
+# relation -> pipelines tried in order, cheapest first
+CASCADES: Dict[str, Tuple[str, ...]] = {
+    "company": ("company_fast", "company"),
+    "competitors": ("competitors_fast", "competitors"),
+    "subsidiaries": ("subsidiaries_fast", "subsidiaries"),
+}
+
+# relation -> required keys of each row and their types
+SCHEMAS: Dict[str, Dict[str, type]] = {
+    "competitors": {"rank": int, "company_name": str, "ticker": str, "reason": str},
+    "subsidiaries": {"company_name": str, "ticker": str, "details": str},
+}
+
+_STRING_RE = re.compile(r'"(?:[^"\\]|\\.)*"')
+
+_enabled = None
+
+
+class MalformedReplyError(ValueError):
+    """No usable JSON array could be recovered from the model's reply."""
+
+
+class Checked(NamedTuple):
+    """A reply validated against its relation's schema.
+
+    ``ok`` means the reply parsed completely and every item had every field,
+    possibly after type coercion; ``repaired`` means something had to be fixed.
+    """
+    items: List[Any]
+    ok: bool
+    repaired: bool
+
+
+def _items(value: Any) -> Optional[List]:
+    """The array in a reply: the value itself, or the "items" (or only list) of a JSON-mode object."""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, dict):
+        if isinstance(value.get("items"), list):
+            return value["items"]
+        lists = [v for v in value.values() if isinstance(v, list)]
+        if len(lists) == 1:
+            return lists[0]
+    return None
+
+
+def _salvage(text: str) -> Tuple[Optional[List], bool]:
+    """Recover the array from a reply json.loads rejected; returns (items, complete)."""
+    # A code fence or preamble around otherwise valid JSON.
+    for opening, closing in (("{", "}"), ("[", "]")):
+        start, end = text.find(opening), text.rfind(closing)
+        if start != -1 and end > start:
+            try:
+                items = _items(json.loads(text[start:end + 1]))
+            except ValueError:
+                continue
+            if items is not None:
+                return items, True
+    # Cut off at max_tokens: keep the elements that were closed.
+    objects = JSONArrayParser().feed(text)
+    if objects:
+        return objects, False
+    start = text.find("[")
+    if start != -1:
+        strings = [json.loads(s) for s in _STRING_RE.findall(text[start:])]
+        if strings:
+            return strings, False
+    return None, False
+
+
+def _check_row(relation: str, position: int, row: Any) -> Tuple[Optional[Dict], bool, bool]:
+    """Coerce a row to the relation's schema and check its ticker.
+
+    Returns (row or None if unusable, repaired, complete).  Values of the
+    wrong type are converted locally, e.g. a rank of "3"; a missing or
+    blank field is filled in so the row can still be shown, but the row is
+    not complete and its reply does not pass validation.
+    """
+    if not isinstance(row, dict):
+        return None, False, False
+    name = row.get("company_name")
+    if not isinstance(name, str) or not name.strip():
+        return None, False, False
+    row = dict(row, company_name=name.strip())
+    repaired, complete = False, True
+    for key, kind in SCHEMAS[relation].items():
+        value = row.get(key)
+        if isinstance(value, kind) and not isinstance(value, bool):
+            if kind is str and not value.strip():
+                complete = False
+            continue
+        repaired = True
+        if kind is int:
+            try:
+                row[key] = int(value)
+            except (TypeError, ValueError):
+                row[key] = position + 1
+                complete = False
+        elif value is None or value == "":
+            row[key] = "N/A" if key == "ticker" else ""
+            complete = False
+        else:
+            row[key] = str(value)
+    # Checked against the listing index locally rather than trusted or asked about again.
+    row["ticker"] = check_ticker(relation, row["company_name"], row["ticker"])
+    return row, repaired, complete
+
+
+def check_reply(relation: str, reply: Optional[str]) -> Checked:
+    """Parse a reply and validate it against ``relation``'s schema, repairing what can be fixed locally."""
+    text = (reply or "").strip()
+    with get_metrics().timed("parse"):
+        try:
+            items, complete, repaired = _items(json.loads(text)), True, False
+        except ValueError:
+            (items, complete), repaired = _salvage(text), True
+        if items is None:
+            return Checked([], False, repaired)
+
+        if relation == "company":
+            names = [c.strip() for c in items if isinstance(c, str) and c.strip()]
+            return Checked(sorted(names), complete and len(names) == len(items), repaired)
+
+        rows, failed = [], 0
+        for position, item in enumerate(items):
+            row, fixed, whole = _check_row(relation, position, item)
+            if not whole:
+                failed += 1
+            if row is None:
+                continue
+            rows.append(row)
+            repaired = repaired or fixed or not whole
+        return Checked(rows, complete and not failed, repaired or bool(failed))
+
+
+def _cascade_enabled() -> bool:
+    """Whether lookups try the fast tier first; COMPANY_CASCADE=0 sends everything to the strong model."""
+    global _enabled
+    if _enabled is None:
+        load_env()
+        _enabled = os.getenv("COMPANY_CASCADE", "1").strip().lower() not in ("0", "false", "no", "off")
+    return _enabled
+
+
+def set_cascade(enabled: Optional[bool]) -> None:
+    """Turn the model cascade on or off; ``None`` rereads COMPANY_CASCADE on next use."""
+    global _enabled
+    _enabled = enabled
+
+
+def _tiers(relation: str) -> Tuple[str, ...]:
+    return CASCADES[relation] if _cascade_enabled() else CASCADES[relation][-1:]
+
+
+def _accept(relation: str, pipeline: str, checked: Checked, last: bool) -> Optional[List]:
+    """Return the items to answer with, or None to escalate to the next tier."""
+    metrics = get_metrics()
+    if checked.repaired:
+        metrics.incr("reply_repairs_total", pipeline=pipeline)
+    if checked.ok:
+        metrics.incr("cascade_total", relation=relation, pipeline=pipeline, result="accepted")
+        return checked.items
+    if not last:
+        metrics.incr("cascade_total", relation=relation, pipeline=pipeline, result="escalated")
+        return None
+    if not checked.items:
+        metrics.incr("cascade_total", relation=relation, pipeline=pipeline, result="failed")
+        raise MalformedReplyError(f"no usable JSON array in the {pipeline} reply")
+    # The strongest tier's partial answer beats failing the whole lookup.
+    metrics.incr("cascade_total", relation=relation, pipeline=pipeline, result="salvaged")
+    return checked.items
+
+
+def run_cascade(relation: str, **variables: Any) -> List:
+    """Answer ``relation`` with the cheapest tier whose reply passes validation.
+
+    Each tier's reply is parsed, repaired where that is safe (code fences,
+    a truncated array, values of the wrong type) and checked against the
+    schema; rows with missing fields fail the check.  Replies that still fail, and calls that fail outright, move on
+    to the next, stronger tier; the last tier's best effort is returned.
+    """
+    tiers = _tiers(relation)
+    for i, pipeline in enumerate(tiers):
+        last = i == len(tiers) - 1
+        try:
+            reply = _get_engine().run(pipeline, **variables)
+        except Exception:
+            if last:
+                raise
+            get_metrics().incr("cascade_total", relation=relation, pipeline=pipeline, result="error")
+            continue
+        items = _accept(relation, pipeline, check_reply(relation, reply), last)
+        if items is not None:
+            return items
+
+
+async def arun_cascade(relation: str, **variables: Any) -> List:
+    """Async version of run_cascade."""
+    tiers = _tiers(relation)
+    for i, pipeline in enumerate(tiers):
+        last = i == len(tiers) - 1
+        try:
+            reply = await _get_engine().arun(pipeline, **variables)
+        except Exception:
+            if last:
+                raise
+            get_metrics().incr("cascade_total", relation=relation, pipeline=pipeline, result="error")
+            continue
+        items = _accept(relation, pipeline, check_reply(relation, reply), last)
+        if items is not None:
+            return items
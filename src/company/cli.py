@@ -0,0 +1,259 @@
+"""Command-line batch enrichment: ``company {extract,competitors,subsidiaries} INPUT``.
+
+Input rows are streamed from CSV, JSONL or plain-text files (or stdin) and
+looked up on a thread or asyncio pool with a bounded number of rows in
+flight.  Each result is appended to the JSONL output as soon as it
+completes, tagged with its input row number, so the output doubles as the
+checkpoint: ``--resume`` skips every row that already has a successful
+record and retries the rest.  Lookups run at BATCH priority, so an
+interactive app sharing the process is served first.  The exit status is
+1 if any row failed.
+"""
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional, Set, Tuple
+import argparse
+import contextvars
+import csv
+import io
+import json
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from .company import (
+    _get_company, _get_competitors, _get_subsidiaries,
+    _aget_company, _aget_competitors, _aget_subsidiaries,
+)
+from .scheduler import BATCH, request_priority
+
+DEFAULT_WORKERS = 8
+
+# task -> (blocking lookup, async lookup, result field)
+TASKS: Dict[str, Tuple[Callable, Callable, str]] = {
+    "extract": (_get_company, _aget_company, "companies"),
+    "competitors": (_get_competitors, _aget_competitors, "competitors"),
+    "subsidiaries": (_get_subsidiaries, _aget_subsidiaries, "subsidiaries"),
+}
+
+Job = Tuple[int, Any, Dict[str, Any]]
+
+
+class _InputError(ValueError):
+    """A row that cannot be turned into lookup arguments."""
+
+
+def _open_input(path: str) -> IO[str]:
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def _detect_format(path: str) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix == ".csv":
+        return "csv"
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    return "lines"
+
+
+def _read_rows(f: IO[str], fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (row number, record) lazily; records are dicts (CSV/JSONL objects) or strings."""
+    if fmt == "csv":
+        for row, record in enumerate(csv.DictReader(f)):
+            yield row, record
+        return
+    row = 0
+    for line in f:
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        if fmt == "jsonl":
+            try:
+                yield row, json.loads(line)
+            except json.JSONDecodeError:
+                yield row, _InputError(f"invalid JSON: {line[:80]}")
+        else:
+            yield row, line
+        row += 1
+
+
+def _lookup_args(task: str, record: Any, args: argparse.Namespace) -> Dict[str, Any]:
+    if isinstance(record, Exception):
+        raise record
+    if task == "extract":
+        text = record.get(args.text_column) if isinstance(record, dict) else record
+        if not isinstance(text, str) or not text.strip():
+            raise _InputError(f"missing {args.text_column!r}")
+        return {"prompt": text}
+    if isinstance(record, dict):
+        name, ticker = record.get(args.name_column), record.get(args.ticker_column)
+    else:
+        name, ticker = record, None
+    if not name and not ticker:
+        raise _InputError(f"missing {args.name_column!r} and {args.ticker_column!r}")
+    return {"company_name": name or None, "company_ticker": ticker or None}
+
+
+def _completed_rows(output: Path) -> Set[int]:
+    """Rows with a successful record in ``output``; a torn final line is truncated away."""
+    done: Set[int] = set()
+    if not output.exists():
+        return done
+    with open(output, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+    for line in data[:end].splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict) and "error" not in record and isinstance(record.get("row"), int):
+            done.add(record["row"])
+    return done
+
+
+class _Writer:
+    """Append results as JSONL in completion order and keep the run's counters."""
+
+    def __init__(self, out: IO[str], field: str, progress: float):
+        self.out = out
+        self.field = field
+        self.progress = progress
+        self.ok = 0
+        self.skipped = 0
+        self.errors: Counter = Counter()
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    def write(self, row: int, record: Any, result: Any = None, error: Optional[BaseException] = None) -> None:
+        entry: Dict[str, Any] = {"row": row, "input": None if isinstance(record, Exception) else record}
+        if error is not None:
+            entry["error"] = f"{type(error).__name__}: {error}"
+            self.errors[type(error).__name__] += 1
+        else:
+            entry[self.field] = result
+            self.ok += 1
+        self.out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.out.flush()
+        now = time.perf_counter()
+        if self.progress and now - self._last_report >= self.progress:
+            self._last_report = now
+            print(f"{self.ok + sum(self.errors.values())} rows, {self.ok} ok, "
+                  f"{sum(self.errors.values())} errors, {self.rate():.1f} rows/s", file=sys.stderr)
+
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return (self.ok + sum(self.errors.values())) / elapsed if elapsed else 0.0
+
+
+def _jobs(
+    rows: Iterator[Tuple[int, Any]], task: str, args: argparse.Namespace, skip: Set[int], writer: _Writer
+) -> Iterator[Job]:
+    """Turn input rows into lookup jobs, recording unusable rows as errors straight away."""
+    for row, record in rows:
+        if row in skip:
+            writer.skipped += 1
+            continue
+        try:
+            yield row, record, _lookup_args(task, record, args)
+        except _InputError as e:
+            writer.write(row, record, error=e)
+
+
+def _run_threads(func: Callable, jobs: Iterator[Job], workers: int, writer: _Writer) -> None:
+    """Run jobs on a thread pool, keeping at most ``2 * workers`` rows in memory."""
+    def finish(done: Set[Future]) -> None:
+        for future in done:
+            row, record = pending.pop(future)
+            error = future.exception()
+            writer.write(row, record, None if error else future.result(), error)
+
+    pending: Dict[Future, Tuple[int, Any]] = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for row, record, kwargs in jobs:
+            if len(pending) >= 2 * workers:
+                finish(wait(pending, return_when=FIRST_COMPLETED)[0])
+            # Worker threads do not inherit context variables such as the request priority.
+            context = contextvars.copy_context()
+            pending[pool.submit(context.run, func, **kwargs)] = (row, record)
+        while pending:
+            finish(wait(pending, return_when=FIRST_COMPLETED)[0])
+
+
+async def _run_async(func: Callable, jobs: Iterator[Job], workers: int, writer: _Writer) -> None:
+    """Run jobs as coroutines on one event loop with at most ``workers`` in flight."""
+    import asyncio
+
+    def finish(done) -> None:
+        for task in done:
+            row, record = pending.pop(task)
+            error = task.exception()
+            writer.write(row, record, None if error else task.result(), error)
+
+    pending: Dict["asyncio.Task", Tuple[int, Any]] = {}
+    for row, record, kwargs in jobs:
+        if len(pending) >= workers:
+            finish((await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED))[0])
+        pending[asyncio.ensure_future(func(**kwargs))] = (row, record)
+    while pending:
+        finish((await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED))[0])
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="company", description=__doc__.splitlines()[0])
+    parser.add_argument("task", choices=list(TASKS))
+    parser.add_argument("input", help="CSV, JSONL or one value per line; '-' reads stdin")
+    parser.add_argument("-o", "--output", help="JSONL output (default stdout)")
+    parser.add_argument("--format", choices=["csv", "jsonl", "lines"], help="input format (default: from extension)")
+    parser.add_argument("--text-column", default="text", help="field holding the text to extract from")
+    parser.add_argument("--name-column", default="name", help="field holding the company name")
+    parser.add_argument("--ticker-column", default="ticker", help="field holding the ticker")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="concurrent lookups")
+    parser.add_argument("--pool", choices=["thread", "async"], default="thread")
+    parser.add_argument("--resume", action="store_true", help="append to OUTPUT, skipping rows it already holds")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the shared result cache")
+    parser.add_argument("--progress", type=float, default=10.0, help="seconds between progress lines (0 disables)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parser().parse_args(argv)
+    if args.resume and not args.output:
+        print("company: --resume needs --output", file=sys.stderr)
+        return 2
+    if args.no_cache:
+        from .cache import set_result_cache
+        set_result_cache(None)
+
+    func, afunc, field = TASKS[args.task]
+    skip = _completed_rows(Path(args.output)) if args.resume else set()
+    out = open(args.output, "a" if args.resume else "w", encoding="utf-8") if args.output else sys.stdout
+    writer = _Writer(out, field, args.progress)
+    workers = max(1, args.workers)
+    try:
+        with _open_input(args.input) as f, request_priority(BATCH):
+            rows = _read_rows(f, args.format or _detect_format(args.input))
+            jobs = _jobs(rows, args.task, args, skip, writer)
+            if args.pool == "async":
+                import asyncio
+                asyncio.run(_run_async(afunc, jobs, workers, writer))
+            else:
+                _run_threads(func, jobs, workers, writer)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - writer.started
+    errors = sum(writer.errors.values())
+    print(f"{writer.ok + errors} rows in {elapsed:.1f}s ({writer.rate():.1f} rows/s): "
+          f"{writer.ok} ok, {errors} errors, {writer.skipped} skipped as already done", file=sys.stderr)
+    for name, count in writer.errors.most_common():
+        print(f"  {count:>6}  {name}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,204 +1,423 @@
-from typing import List, Dict
-import os
-import json
-import re
-from pathlib import Path
-from haystack import Document, Pipeline
-from haystack.components.generators import OpenAIGenerator
-from haystack.components.builders import PromptBuilder
-from dotenv import load_dotenv
+from typing import AsyncIterator, Dict, Iterator, List, Mapping, Optional, Tuple
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .gazetteer import Gazetteer
+from .ticker_index import _ticker_index
+from .cache import _result_cache
+from .engine import _get_engine
+from .cascade import _check_row, arun_cascade, run_cascade
+from .document import (
+    DEFAULT_CHUNK_TOKENS, DEFAULT_CONCURRENCY as DEFAULT_DOCUMENT_CONCURRENCY, Mention, Sentence,
+    chunk_text, locate, merge_mentions, needs_chunking, pack_chunks, prefilter,
+)
+from .fanout import fan_out
+from .neardup import _neardup_cache
+from .streaming import JSONArrayParser
+from .resolver import _get_resolver
+from .rewriter import _get_rewriter
+from .singleflight import _async_flights, _flight_key, _flights
+from .snapshot import _building, _snapshot_rows
+from .metrics import get_metrics
+from .prompts import COMPETITORS_MODEL, COMPETITORS_TEMPLATE, SUBSIDIARIES_MODEL, SUBSIDIARIES_TEMPLATE
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def _load_ticker_mapping() -> Mapping[str, str]:
+    """Load SEC ticker to company name mapping."""
+    return _ticker_index()
 
-load_dotenv()
 
+def _get_gazetteer() -> Gazetteer:
+    """Build the SEC gazetteer on first use and reuse it afterwards."""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = Gazetteer(_load_ticker_mapping())
+    return _gazetteer
 
-def _load_ticker_mapping() -> Dict[str, str]:
-    """Load SEC ticker to company name mapping."""
-    ticker_file = Path(__file__).parent / "sec_company_tickers.json"
-    with open(ticker_file, 'r') as f:
-        data = json.load(f)
 
-    ticker_map = {}
-    for entry in data.values():
-        ticker = entry.get('ticker', '').upper()
-        title = entry.get('title', '')
-        if ticker and title:
-            ticker_map[ticker] = title
+def _get_company(prompt: str) -> List[str]:
+    """Extract company names from a given prompt, falling back to OpenAI when the local pass is unsure.
 
-    return ticker_map
+    Texts longer than one chunk are handled by extract_document.
+    """
+    if not prompt or not isinstance(prompt, str):
+        return []
+    if needs_chunking(prompt):
+        return sorted(mention.name for mention in extract_document(prompt))
+    return _extract(prompt)
+
+
+def _extract(prompt: str) -> List[str]:
+    metrics = get_metrics()
+    with metrics.timed("extract_local"):
+        companies, confident = _get_gazetteer().extract(prompt)
+    if companies and confident:
+        metrics.incr("extraction_total", path="local")
+        return companies
+    memo = _neardup_cache()
+    if memo is not None:
+        companies = memo.get(prompt)
+        if companies is not None:
+            metrics.incr("extraction_total", path="neardup")
+            return companies
+    metrics.incr("extraction_total", path="llm")
+
+    with metrics.timed("rewrite_tickers"):
+        enhanced_prompt, _ = _get_rewriter().rewrite(prompt)
+
+    companies = _flights.do(
+        _flight_key("company", prompt),
+        lambda: run_cascade("company", text=enhanced_prompt),
+    )
+    if memo is not None:
+        memo.put(prompt, companies)
+    return companies
 
 
-def _replace_tickers_with_names(prompt: str, ticker_map: Dict[str, str]) -> str:
-    """Replace ticker symbols in prompt with company names."""
-    words = prompt.split()
-    for i, word in enumerate(words):
-        clean_word = re.sub(r'[^\w]', '', word).upper()
-        if clean_word in ticker_map:
-            words[i] = ticker_map[clean_word]
-    return ' '.join(words)
+async def _aget_company(prompt: str) -> List[str]:
+    """Async version of _get_company."""
+    if not prompt or not isinstance(prompt, str):
+        return []
+    if needs_chunking(prompt):
+        return sorted(mention.name for mention in await aextract_document(prompt))
+    return await _aextract(prompt)
+
+
+async def _aextract(prompt: str) -> List[str]:
+    metrics = get_metrics()
+    with metrics.timed("extract_local"):
+        companies, confident = _get_gazetteer().extract(prompt)
+    if companies and confident:
+        metrics.incr("extraction_total", path="local")
+        return companies
+    memo = _neardup_cache()
+    if memo is not None:
+        companies = memo.get(prompt)
+        if companies is not None:
+            metrics.incr("extraction_total", path="neardup")
+            return companies
+    metrics.incr("extraction_total", path="llm")
+
+    with metrics.timed("rewrite_tickers"):
+        enhanced_prompt, _ = _get_rewriter().rewrite(prompt)
+
+    companies = await _async_flights.ado(
+        _flight_key("company", prompt), lambda: arun_cascade("company", text=enhanced_prompt)
+    )
+    if memo is not None:
+        memo.put(prompt, companies)
+    return companies
+
+
+def _document_chunks(text: str, chunk_tokens: int) -> List[List[Sentence]]:
+    metrics = get_metrics()
+    with metrics.timed("segment"):
+        kept, dropped = prefilter(text, _get_gazetteer(), _get_rewriter())
+        chunks = pack_chunks(kept, chunk_tokens)
+    metrics.incr("document_sentences_total", len(kept), result="kept")
+    metrics.incr("document_sentences_total", dropped, result="dropped")
+    metrics.incr("document_chunks_total", len(chunks))
+    return chunks
+
+
+def _merge_chunks(chunks: List[List[Sentence]], names: List[List[str]]) -> List[Mention]:
+    rewriter = _get_rewriter()
+    return merge_mentions(
+        (name, locate(name, chunk, rewriter)) for chunk, chunk_names in zip(chunks, names) for name in chunk_names
+    )
 
 
-def _get_company(prompt: str) -> List[str]:
-    """Extract company names from a given prompt using OpenAI."""
-    if not prompt or not isinstance(prompt, str):
+def extract_document(
+    text: str, chunk_tokens: int = DEFAULT_CHUNK_TOKENS, concurrency: int = DEFAULT_DOCUMENT_CONCURRENCY
+) -> List[Mention]:
+    """Extract the companies in a long text, with the offsets where each one appears.
+
+    The text is split into sentences and those without a candidate name
+    are dropped.  The rest are packed into chunks of at most
+    ``chunk_tokens`` and extracted ``concurrency`` at a time, so a long
+    document takes about as long as one chunk.  Names from different
+    chunks that resolve to the same company are merged.
+    """
+    if not text or not isinstance(text, str):
         return []
+    chunks = _document_chunks(text, chunk_tokens)
+    if not chunks:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks)))) as pool:
+        # Worker threads do not inherit context variables such as the request priority.
+        futures = [pool.submit(contextvars.copy_context().run, _extract, chunk_text(chunk)) for chunk in chunks]
+        names = [future.result() for future in futures]
+    return _merge_chunks(chunks, names)
+
+
+async def aextract_document(
+    text: str, chunk_tokens: int = DEFAULT_CHUNK_TOKENS, concurrency: int = DEFAULT_DOCUMENT_CONCURRENCY
+) -> List[Mention]:
+    """Async version of extract_document."""
+    if not text or not isinstance(text, str):
+        return []
+    chunks = _document_chunks(text, chunk_tokens)
+    names: List[List[str]] = [[] for _ in chunks]
+    async for i, found in fan_out(lambda i: _aextract(chunk_text(chunks[i])), range(len(chunks)), concurrency):
+        names[i] = found
+    return _merge_chunks(chunks, names)
 
-    #ticker_map = _load_ticker_mapping()
-    #enhanced_prompt = _replace_tickers_with_names(prompt, ticker_map)
-    enhanced_prompt = prompt;  # TODO
 
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY environment variable is required")
+def _valid_company_args(company_name, company_ticker) -> bool:
+    if not company_name and not company_ticker:
+        return False
+    return isinstance(company_name, (str, type(None))) and isinstance(company_ticker, (str, type(None)))
 
-    template = """
-    Extract all company names from the following text. Return only a JSON array of company names, nothing else.
-    Rules:
-    - Include full company names (e.g., "Apple Inc", "Microsoft Corporation")
-    - Remove suffixes like Inc, Corp, LLC, Ltd when extracting the core name
-    - Return only the core company names
-    - If no companies found, return empty array
 
-    Text: {{text}}
+def _canonical_args(company_name: Optional[str], company_ticker: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Swap a name or ticker for its canonical SEC identity so aliases share cache entries.
 
-    JSON Array:
+    Names that only resolve fuzzily are kept as the caller spelled them.
     """
+    company = _get_resolver().identify(company_name, company_ticker)
+    if company is None:
+        return company_name, company_ticker
+    return company.name, company.ticker
 
-    prompt_builder = PromptBuilder(template=template, required_variables=["text"])
-    llm = OpenAIGenerator(
-        model="gpt-3.5-turbo",
-        generation_kwargs={"max_tokens": 200, "temperature": 0}
-    )
 
-    pipeline = Pipeline()
-    pipeline.add_component("prompt_builder", prompt_builder)
-    pipeline.add_component("llm", llm)
-    pipeline.connect("prompt_builder.prompt", "llm.prompt")
+# relation -> prompt template and model that key its cached results
+_RELATION_KEYS: Dict[str, Tuple[str, str]] = {
+    "competitors": (COMPETITORS_TEMPLATE, COMPETITORS_MODEL),
+    "subsidiaries": (SUBSIDIARIES_TEMPLATE, SUBSIDIARIES_MODEL),
+}
 
-    result = pipeline.run({
-        "prompt_builder": {"text": enhanced_prompt}
-    })
 
-    response = result["llm"]["replies"][0]
+def _stored(relation: str, company_name: Optional[str], company_ticker: Optional[str]) -> Optional[List[Dict]]:
+    """A lookup's result from the snapshot or the result cache, without calling the model."""
+    company_name, company_ticker = _canonical_args(company_name, company_ticker)
+    rows = _snapshot_rows(relation, company_ticker)
+    if rows is not None:
+        return rows
+    cache = _result_cache()
+    if cache is None:
+        return None
+    return cache.get(relation, (*_RELATION_KEYS[relation], company_name, company_ticker))
 
-    companies = json.loads(response.strip())
-    if isinstance(companies, list):
-        return sorted([c for c in companies if isinstance(c, str) and c.strip()])
-    return []
+
+def _store(relation: str, company_name: Optional[str], company_ticker: Optional[str], rows: List[Dict]) -> None:
+    """Cache a result assembled outside the regular lookup, e.g. from a batched or combined reply."""
+    cache = _result_cache()
+    if cache is not None:
+        company_name, company_ticker = _canonical_args(company_name, company_ticker)
+        cache.put(relation, (*_RELATION_KEYS[relation], company_name, company_ticker), rows)
+
+
+def _cached(relation: str, template: str, model: str, company_name: str, company_ticker: str, compute):
+    """Serve a relation lookup from the snapshot or the shared result cache, coalescing identical concurrent lookups.
+
+    Snapshot builds skip both and look everything up afresh (refreshing the
+    cache), since a snapshot is stamped with the time its rows were built.
+    """
+    rows = _snapshot_rows(relation, company_ticker)
+    if rows is not None:
+        return rows
+    key_parts = (template, model, company_name, company_ticker)
+
+    def lookup():
+        cache = _result_cache()
+        if cache is None:
+            return compute()
+        return cache.get_or_compute(relation, key_parts, compute)
+
+    if _building.get():
+        rows = compute()
+        _put(relation, key_parts, rows)
+        return rows
+    return _flights.do(_flight_key(relation, company_name, company_ticker), lookup)
+
+
+async def _acached(relation: str, template: str, model: str, company_name: str, company_ticker: str, compute):
+    """Async version of _cached; ``compute`` returns an awaitable."""
+    rows = _snapshot_rows(relation, company_ticker)
+    if rows is not None:
+        return rows
+    key_parts = (template, model, company_name, company_ticker)
+
+    async def lookup():
+        cache = _result_cache()
+        if cache is None:
+            return await compute()
+        return await cache.aget_or_compute(relation, key_parts, compute)
+
+    if _building.get():
+        rows = await compute()
+        _put(relation, key_parts, rows)
+        return rows
+    return await _async_flights.ado(_flight_key(relation, company_name, company_ticker), lookup)
+
+
+def _put(relation: str, key_parts: Tuple, rows: List[Dict]) -> None:
+    cache = _result_cache()
+    if cache is not None:
+        cache.put(relation, key_parts, rows)
+
+
+def _stream_relation(relation: str, template: str, model: str, company_name: str, company_ticker: str) -> Iterator[Dict]:
+    """Yield a relation's objects as they stream in, caching the list once the array is complete.
+
+    Streams use the strong model only, since a reply cannot be escalated
+    once its rows are shown; each row is still coerced to the schema.
+    """
+    cache = _result_cache()
+    key_parts = (template, model, company_name, company_ticker)
+    cached = _snapshot_rows(relation, company_ticker)
+    if cached is None and cache is not None:
+        cached = cache.get(relation, key_parts)
+    if cached is not None:
+        yield from cached
+        return
+
+    parser = JSONArrayParser()
+    rows = []
+    for chunk in _get_engine().stream(
+        relation, company_name=company_name or "N/A", company_ticker=company_ticker or "N/A"
+    ):
+        for row in parser.feed(chunk):
+            row, _, _ = _check_row(relation, len(rows), row)
+            if row is not None:
+                rows.append(row)
+                yield row
+    if cache is not None and parser.complete:
+        cache.put(relation, key_parts, rows)
+
+
+async def _astream_relation(
+    relation: str, template: str, model: str, company_name: str, company_ticker: str
+) -> AsyncIterator[Dict]:
+    """Async version of _stream_relation."""
+    cache = _result_cache()
+    key_parts = (template, model, company_name, company_ticker)
+    cached = _snapshot_rows(relation, company_ticker)
+    if cached is None and cache is not None:
+        cached = cache.get(relation, key_parts)
+    if cached is not None:
+        for row in cached:
+            yield row
+        return
+
+    parser = JSONArrayParser()
+    rows = []
+    async for chunk in _get_engine().astream(
+        relation, company_name=company_name or "N/A", company_ticker=company_ticker or "N/A"
+    ):
+        for row in parser.feed(chunk):
+            row, _, _ = _check_row(relation, len(rows), row)
+            if row is not None:
+                rows.append(row)
+                yield row
+    if cache is not None and parser.complete:
+        cache.put(relation, key_parts, rows)
 
 
 def _get_competitors(company_name: str = None, company_ticker: str = None) -> List[Dict]:
     """Get top 10 competitors for a given company."""
-    if not company_name and not company_ticker:
-        return []
-    
-    if not isinstance(company_name, (str, type(None))) or not isinstance(company_ticker, (str, type(None))):
+    if not _valid_company_args(company_name, company_ticker):
         return []
+    company_name, company_ticker = _canonical_args(company_name, company_ticker)
 
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY environment variable is required")
+    return _cached(
+        "competitors", COMPETITORS_TEMPLATE, COMPETITORS_MODEL, company_name, company_ticker,
+        lambda: _fetch_competitors(company_name, company_ticker),
+    )
 
-    template = """You are an expert market analyst specializing in competitive intelligence. Your task is to identify and rank up to 5 of the most direct competitors for the company provided.
 
-**Company Details:**
+def _fetch_competitors(company_name: str = None, company_ticker: str = None) -> List[Dict]:
+    """Ask OpenAI for the competitors of a company, cheapest model first."""
+    return run_cascade("competitors", company_name=company_name or "N/A", company_ticker=company_ticker or "N/A")
 
-Name: {{company_name}}
-Ticker: {{company_ticker}}
 
-**Instructions:**
+async def _aget_competitors(company_name: str = None, company_ticker: str = None) -> List[Dict]:
+    """Async version of _get_competitors."""
+    if not _valid_company_args(company_name, company_ticker):
+        return []
+    company_name, company_ticker = _canonical_args(company_name, company_ticker)
 
-1. Analyze the Core Business: First, precisely identify the primary business model of the target company ({{company_name}}). Focus on its main products, services, and revenue streams.
-2. Geographical Focus: Limit the competitor search to the target company's primary country of operation. Only list an international company if it has a significant, direct market presence and competes within that same country.
-3. Identify True Competitors: Based on this core business model and geographical focus, identify other companies that offer the exact same or highly similar services to the same target customers.
-4. Crucial Exclusion Criteria: Do NOT list companies that are primarily customers, clients, partners, or distributors.
-    Example: For a central securities depository like CDSL, its direct competitor is another depository (like NSDL). Do not list stock brokerage firms (like Zerodha or HDFC Securities) as they are clients (Depository Participants), not direct competitors to the core depository business.
-5. Provide a JSON Response: Your output must be a valid JSON array of objects, ordered from the most direct competitor (rank 1) to the least.
-6. JSON Object Keys: Each object must contain:
-    "rank": An integer ranking the competitor's significance.
-    "company_name": The official name of the competitor.
-    "ticker": The stock ticker on its primary local exchange (e.g., CDSL.NS for India's NSE, MSFT for the US). Use "N/A" if private or unknown.
-    "reason": A concise explanation of the specific business segment where the companies directly compete.
-7. No Competitors: If no direct competitors are found, return an empty JSON array: [].
+    return await _acached(
+        "competitors", COMPETITORS_TEMPLATE, COMPETITORS_MODEL, company_name, company_ticker,
+        lambda: _afetch_competitors(company_name, company_ticker),
+    )
 
-JSON Array:"""
 
-    prompt_builder = PromptBuilder(template=template, required_variables=["company_name", "company_ticker"])
-    llm = OpenAIGenerator(
-        model="gpt-4.1-mini",
-        generation_kwargs={"max_tokens": 800, "temperature": 0}
+async def _afetch_competitors(company_name: str = None, company_ticker: str = None) -> List[Dict]:
+    return await arun_cascade(
+        "competitors", company_name=company_name or "N/A", company_ticker=company_ticker or "N/A"
     )
 
-    pipeline = Pipeline()
-    pipeline.add_component("prompt_builder", prompt_builder)
-    pipeline.add_component("llm", llm)
-    pipeline.connect("prompt_builder.prompt", "llm.prompt")
 
-    result = pipeline.run({
-        "prompt_builder": {
-            "company_name": company_name or "N/A",
-            "company_ticker": company_ticker or "N/A"
-        }
-    })
+def _stream_competitors(company_name: str = None, company_ticker: str = None) -> Iterator[Dict]:
+    """Yield competitors one at a time as the model produces them."""
+    if not _valid_company_args(company_name, company_ticker):
+        return
+    company_name, company_ticker = _canonical_args(company_name, company_ticker)
+    yield from _stream_relation("competitors", COMPETITORS_TEMPLATE, COMPETITORS_MODEL, company_name, company_ticker)
 
-    response = result["llm"]["replies"][0]
 
-    competitors = json.loads(response.strip())
-    if isinstance(competitors, list):
-        return competitors
-    return []
+async def _astream_competitors(company_name: str = None, company_ticker: str = None) -> AsyncIterator[Dict]:
+    """Async version of _stream_competitors."""
+    if not _valid_company_args(company_name, company_ticker):
+        return
+    company_name, company_ticker = _canonical_args(company_name, company_ticker)
+    async for row in _astream_relation("competitors", COMPETITORS_TEMPLATE, COMPETITORS_MODEL, company_name, company_ticker):
+        yield row
 
 
 def _get_subsidiaries(company_name: str = None, company_ticker: str = None) -> List[Dict]:
     """Get subsidiaries for a given company."""
-    if not company_name and not company_ticker:
-        return []
-    
-    if not isinstance(company_name, (str, type(None))) or not isinstance(company_ticker, (str, type(None))):
+    if not _valid_company_args(company_name, company_ticker):
         return []
+    company_name, company_ticker = _canonical_args(company_name, company_ticker)
 
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY environment variable is required")
+    return _cached(
+        "subsidiaries", SUBSIDIARIES_TEMPLATE, SUBSIDIARIES_MODEL, company_name, company_ticker,
+        lambda: _fetch_subsidiaries(company_name, company_ticker),
+    )
 
-    template = """You are a corporate filing analyst. Your task is to provide a comprehensive list of all known, majority-owned subsidiaries for the parent company provided.
 
-**Company Details:**
-- Name: {{company_name}}
-- Ticker: {{company_ticker}}
+def _fetch_subsidiaries(company_name: str = None, company_ticker: str = None) -> List[Dict]:
+    """Ask OpenAI for the subsidiaries of a company, cheapest model first."""
+    return run_cascade("subsidiaries", company_name=company_name or "N/A", company_ticker=company_ticker or "N/A")
 
-**Instructions:**
-1. Identify all legal entities that are known to be majority-owned or fully-owned subsidiaries of the parent company.
-2. Provide your response as a valid JSON array of objects.
-3. The list does not need to be ranked.
-4. Each object in the array must contain the following keys:
-   - "company_name": The official legal name of the subsidiary.
-   - "ticker": The stock ticker if the subsidiary is also publicly traded. Use the string "N/A" otherwise.
-   - "details": A brief description of the subsidiary's business or its relationship to the parent company (e.g., "Acquired in 2006", "Manages cloud computing services").
-5. If the company has no known subsidiaries, return an empty JSON array: [].
 
-JSON Array:"""
+async def _aget_subsidiaries(company_name: str = None, company_ticker: str = None) -> List[Dict]:
+    """Async version of _get_subsidiaries."""
+    if not _valid_company_args(company_name, company_ticker):
+        return []
+    company_name, company_ticker = _canonical_args(company_name, company_ticker)
+
+    return await _acached(
+        "subsidiaries", SUBSIDIARIES_TEMPLATE, SUBSIDIARIES_MODEL, company_name, company_ticker,
+        lambda: _afetch_subsidiaries(company_name, company_ticker),
+    )
+
 
-    prompt_builder = PromptBuilder(template=template, required_variables=["company_name", "company_ticker"])
-    llm = OpenAIGenerator(
-        model="gpt-3.5-turbo",
-        generation_kwargs={"max_tokens": 800, "temperature": 0}
+async def _afetch_subsidiaries(company_name: str = None, company_ticker: str = None) -> List[Dict]:
+    return await arun_cascade(
+        "subsidiaries", company_name=company_name or "N/A", company_ticker=company_ticker or "N/A"
     )
 
-    pipeline = Pipeline()
-    pipeline.add_component("prompt_builder", prompt_builder)
-    pipeline.add_component("llm", llm)
-    pipeline.connect("prompt_builder.prompt", "llm.prompt")
 
-    result = pipeline.run({
-        "prompt_builder": {
-            "company_name": company_name or "N/A",
-            "company_ticker": company_ticker or "N/A"
-        }
-    })
+def _stream_subsidiaries(company_name: str = None, company_ticker: str = None) -> Iterator[Dict]:
+    """Yield subsidiaries one at a time as the model produces them."""
+    if not _valid_company_args(company_name, company_ticker):
+        return
+    company_name, company_ticker = _canonical_args(company_name, company_ticker)
+    yield from _stream_relation("subsidiaries", SUBSIDIARIES_TEMPLATE, SUBSIDIARIES_MODEL, company_name, company_ticker)
 
-    response = result["llm"]["replies"][0]
 
-    subsidiaries = json.loads(response.strip())
-    if isinstance(subsidiaries, list):
-        return subsidiaries
-    return []
\ No newline at end of file
+async def _astream_subsidiaries(company_name: str = None, company_ticker: str = None) -> AsyncIterator[Dict]:
+    """Async version of _stream_subsidiaries."""
+    if not _valid_company_args(company_name, company_ticker):
+        return
+    company_name, company_ticker = _canonical_args(company_name, company_ticker)
+    async for row in _astream_relation("subsidiaries", SUBSIDIARIES_TEMPLATE, SUBSIDIARIES_MODEL, company_name, company_ticker):
+        yield row
@@ -0,0 +1,150 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import re
+from .gazetteer import Gazetteer, _STOPWORDS, _SUFFIX_WORDS, _TOKEN_RE, _normalize_token
+from .resolver import _identity_key
+from .rewriter import TickerRewriter
+from .scheduler import estimate_tokens
+
+
+# Input tokens per extraction call.  Texts longer than one chunk go through
+# document mode; each chunk's reply fits the company prompt's 200 tokens.
+DEFAULT_CHUNK_TOKENS = 1000
+DEFAULT_CONCURRENCY = 4
+
+# A sentence ends at ., ! or ? (plus closing quotes and brackets) followed by
+# whitespace, or at a line break.
+_BOUNDARY_RE = re.compile(r"[.!?]+[\"'”’)\]]*\s+|\s*\n\s*")
+
+# Words whose trailing period rarely ends a sentence.  Legal suffixes still
+# do when the next word plainly opens one ("... Acme Corp. The deal ...").
+_TITLES = frozenset(["mr", "mrs", "ms", "dr", "prof", "st", "jr", "sr", "vs", "no", "e.g", "i.e", "approx"])
+_LEGAL_ABBREVIATIONS = frozenset(["inc", "corp", "co", "ltd", "bros", "cos"])
+
+
+class Sentence(NamedTuple):
+    start: int
+    end: int
+    text: str
+
+
+class Mention(NamedTuple):
+    """A company found in a document and the ``(start, end)`` offsets where it appears."""
+    name: str
+    offsets: List[Tuple[int, int]]
+
+
+def _continues(text: str, period: int, following: str) -> bool:
+    """Whether the period at ``period`` belongs to an abbreviation rather than ending the sentence."""
+    word = re.search(r"([\w.]+)$", text[:period])
+    if word is None:
+        return False
+    word = word.group(1).lower()
+    if word in _TITLES or (len(word) == 1 and word.isalpha()) or re.fullmatch(r"(?:\w\.)+\w", word):
+        return True
+    if word in _LEGAL_ABBREVIATIONS:
+        opener = _TOKEN_RE.match(following)
+        return opener is None or _normalize_token(opener.group()) not in _STOPWORDS
+    return False
+
+
+def segment_sentences(text: str) -> List[Sentence]:
+    """Split ``text`` into sentences with their offsets, keeping abbreviations such as "Inc." intact."""
+    sentences = []
+    start = 0
+    for m in _BOUNDARY_RE.finditer(text):
+        abbreviation = text[m.start()] == "." and "\n" not in m.group()
+        if abbreviation and _continues(text, m.start(), text[m.end():m.end() + 20]):
+            continue
+        end = m.end() - (len(m.group()) - len(m.group().rstrip()))
+        if text[start:end].strip():
+            sentences.append(Sentence(start, end, text[start:end]))
+        start = m.end()
+    if text[start:].strip():
+        sentences.append(Sentence(start, len(text.rstrip()), text[start:].rstrip()))
+    return sentences
+
+
+def has_candidate(sentence: str, gazetteer: Gazetteer, rewriter: TickerRewriter) -> bool:
+    """Cheap test for whether a sentence might name a company.
+
+    True for a recognized ticker, a known company, or a capitalized word
+    that is neither a stopword nor just the sentence's first word.  A lone
+    unknown name opening a sentence ("Zyxo said ...") is the one miss this
+    trades for dropping ordinary sentences.
+    """
+    tokens = _TOKEN_RE.findall(sentence)
+    for i, token in enumerate(tokens):
+        if not token[0].isupper():
+            continue
+        word = _normalize_token(token)
+        if word in _STOPWORDS or word in _SUFFIX_WORDS:
+            continue
+        if i > 0 or (len(tokens) > 1 and tokens[1][0].isupper()):
+            return True
+    return bool(rewriter.find(sentence)) or bool(gazetteer.extract(sentence)[0])
+
+
+def pack_chunks(sentences: Sequence[Sentence], max_tokens: int = DEFAULT_CHUNK_TOKENS) -> List[List[Sentence]]:
+    """Group consecutive sentences into chunks of at most ``max_tokens``; a longer sentence is a chunk of its own."""
+    chunks: List[List[Sentence]] = []
+    current: List[Sentence] = []
+    used = 0
+    for sentence in sentences:
+        tokens = estimate_tokens(sentence.text, 0) + 1
+        if current and used + tokens > max_tokens:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(sentence)
+        used += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def chunk_text(chunk: Sequence[Sentence]) -> str:
+    return "\n".join(sentence.text for sentence in chunk)
+
+
+def locate(name: str, chunk: Sequence[Sentence], rewriter: TickerRewriter) -> List[Tuple[int, int]]:
+    """Document offsets of ``name`` in a chunk: literal mentions, else the tickers that stand for it."""
+    pattern = re.compile(r"(?<!\w)" + r"\s+".join(map(re.escape, name.split())) + r"(?!\w)", re.IGNORECASE)
+    offsets = [
+        (sentence.start + m.start(), sentence.start + m.end())
+        for sentence in chunk for m in pattern.finditer(sentence.text)
+    ]
+    if offsets:
+        return offsets
+    folded = name.casefold()
+    return [
+        (sentence.start + span.start, sentence.start + span.end)
+        for sentence in chunk for span in rewriter.find(sentence.text)
+        if folded in span.name.casefold()
+    ]
+
+
+def merge_mentions(found: Iterable[Tuple[str, List[Tuple[int, int]]]]) -> List[Mention]:
+    """Merge per-chunk names that identify the same company, in order of first appearance.
+
+    The first spelling seen is kept; names that could not be located in
+    the text come last, alphabetically.
+    """
+    merged: Dict[object, Tuple[str, set]] = {}
+    for name, offsets in found:
+        key = _identity_key(name)
+        if key in merged:
+            merged[key][1].update(offsets)
+        else:
+            merged[key] = (name, set(offsets))
+    mentions = [Mention(name, sorted(offsets)) for name, offsets in merged.values()]
+    return sorted(mentions, key=lambda m: (not m.offsets, m.offsets[0] if m.offsets else (0, 0), m.name))
+
+
+def prefilter(text: str, gazetteer: Gazetteer, rewriter: TickerRewriter) -> Tuple[List[Sentence], int]:
+    """Sentences of ``text`` that may name a company, and how many were dropped."""
+    sentences = segment_sentences(text)
+    kept = [s for s in sentences if has_candidate(s.text, gazetteer, rewriter)]
+    return kept, len(sentences) - len(kept)
+
+
+def needs_chunking(text: Optional[str], max_tokens: int = DEFAULT_CHUNK_TOKENS) -> bool:
+    return isinstance(text, str) and estimate_tokens(text, 0) > max_tokens
@@ -0,0 +1,315 @@
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+import json
+import os
+import threading
+import time
+import weakref
+from .env import load_env
+from .metrics import get_metrics
+from .scheduler import Scheduler, _get_scheduler, estimate_tokens
+from .prompts import (
+    COMPANY_MODEL, COMPANY_TEMPLATE,
+    COMPETITORS_MODEL, COMPETITORS_TEMPLATE,
+    SUBSIDIARIES_MODEL, SUBSIDIARIES_TEMPLATE,
+    COMPETITORS_BATCH_TEMPLATE, SUBSIDIARIES_BATCH_TEMPLATE,
+    FAST_MODEL, COMPANY_FAST_TEMPLATE, COMPETITORS_FAST_TEMPLATE, SUBSIDIARIES_FAST_TEMPLATE,
+    ANALYZE_COMPETITORS_TEMPLATE, ANALYZE_SUBSIDIARIES_TEMPLATE,
+)
+
+
+_JSON_OBJECT = {"type": "json_object"}
+# Ask streamed completions for a final chunk carrying token usage.
+_USAGE = {"include_usage": True}
+
+# name -> (template, required variables, model, generation kwargs)
+PIPELINES: Dict[str, Tuple[str, List[str], str, Dict[str, Any]]] = {
+    "company": (COMPANY_TEMPLATE, ["text"], COMPANY_MODEL, {"max_tokens": 200, "temperature": 0}),
+    "competitors": (
+        COMPETITORS_TEMPLATE, ["company_name", "company_ticker"], COMPETITORS_MODEL,
+        {"max_tokens": 800, "temperature": 0},
+    ),
+    "subsidiaries": (
+        SUBSIDIARIES_TEMPLATE, ["company_name", "company_ticker"], SUBSIDIARIES_MODEL,
+        {"max_tokens": 800, "temperature": 0},
+    ),
+    "competitors_batch": (
+        COMPETITORS_BATCH_TEMPLATE, ["companies"], COMPETITORS_MODEL,
+        {"max_tokens": 4000, "temperature": 0, "response_format": _JSON_OBJECT},
+    ),
+    "subsidiaries_batch": (
+        SUBSIDIARIES_BATCH_TEMPLATE, ["companies"], SUBSIDIARIES_MODEL,
+        {"max_tokens": 4000, "temperature": 0, "response_format": _JSON_OBJECT},
+    ),
+    "company_fast": (
+        COMPANY_FAST_TEMPLATE, ["text"], FAST_MODEL,
+        {"max_tokens": 200, "temperature": 0, "response_format": _JSON_OBJECT},
+    ),
+    "competitors_fast": (
+        COMPETITORS_FAST_TEMPLATE, ["company_name", "company_ticker"], FAST_MODEL,
+        {"max_tokens": 800, "temperature": 0, "response_format": _JSON_OBJECT},
+    ),
+    "subsidiaries_fast": (
+        SUBSIDIARIES_FAST_TEMPLATE, ["company_name", "company_ticker"], FAST_MODEL,
+        {"max_tokens": 800, "temperature": 0, "response_format": _JSON_OBJECT},
+    ),
+    "analyze_competitors": (
+        ANALYZE_COMPETITORS_TEMPLATE, ["text"], COMPETITORS_MODEL,
+        {"max_tokens": 3000, "temperature": 0, "response_format": _JSON_OBJECT},
+    ),
+    "analyze_subsidiaries": (
+        ANALYZE_SUBSIDIARIES_TEMPLATE, ["text"], SUBSIDIARIES_MODEL,
+        {"max_tokens": 3000, "temperature": 0, "response_format": _JSON_OBJECT},
+    ),
+}
+
+if TYPE_CHECKING:
+    import asyncio
+    import httpx
+    from openai import AsyncOpenAI
+    from haystack import Pipeline
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def _request_model(request: "httpx.Request") -> Optional[str]:
+    try:
+        return json.loads(request.content).get("model")
+    except (ValueError, AttributeError):
+        return None
+
+
+class Engine:
+    """Long-lived prompt pipelines sharing one pooled OpenAI client.
+
+    The environment is validated once, each pipeline is built on first use
+    and reused, and all generators talk to OpenAI through a single
+    keep-alive ``httpx.Client`` that is safe to share between threads.
+    Async calls get one pooled ``AsyncOpenAI`` client per event loop.
+    Requests are admitted and retried by a Scheduler (the shared one unless
+    ``scheduler`` is given), so the OpenAI clients do not retry themselves.
+    httpx and openai are imported when the engine is created and haystack
+    when the first pipeline is built, so importing the package stays cheap.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_connections: int = 20,
+        timeout: float = 60.0,
+        scheduler: Optional[Scheduler] = None,
+    ):
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY environment variable is required")
+        import httpx
+        from openai import OpenAI
+        self._api_key = api_key
+        self._base_url = base_url or os.getenv("OPENAI_BASE_URL") or None
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._timeout = timeout
+        self._scheduler = scheduler
+        self._http = httpx.Client(limits=self._limits, timeout=timeout, event_hooks={"response": [self._on_response]})
+        self.client = OpenAI(api_key=api_key, base_url=self._base_url, http_client=self._http, max_retries=0)
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._pipelines: Dict[str, "Pipeline"] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def scheduler(self) -> Scheduler:
+        return self._scheduler or _get_scheduler()
+
+    def _on_response(self, response: "httpx.Response") -> None:
+        if response.status_code >= 400:
+            get_metrics().incr("llm_http_errors_total", status=response.status_code)
+        if "x-ratelimit-limit-requests" in response.headers or "x-ratelimit-remaining-tokens" in response.headers:
+            model = _request_model(response.request)
+            if model:
+                self.scheduler.observe_headers(model, response.headers)
+
+    async def _aon_response(self, response: "httpx.Response") -> None:
+        self._on_response(response)
+
+    def pipeline(self, name: str) -> "Pipeline":
+        """Return the named pipeline, building it the first time it is requested."""
+        pipeline = self._pipelines.get(name)
+        if pipeline is not None:
+            return pipeline
+        with self._lock:
+            if name not in self._pipelines:
+                with get_metrics().timed("pipeline_build", pipeline=name):
+                    from haystack import Pipeline
+                    from haystack.components.builders import PromptBuilder
+                    from haystack.components.generators import OpenAIGenerator
+                    from haystack.utils import Secret
+
+                    template, variables, model, generation_kwargs = PIPELINES[name]
+                    prompt_builder = PromptBuilder(template=template, required_variables=variables)
+                    llm = OpenAIGenerator(
+                        api_key=Secret.from_token(self._api_key),
+                        model=model,
+                        api_base_url=self._base_url,
+                        generation_kwargs=generation_kwargs
+                    )
+                    # Route every generator through the shared connection pool.
+                    llm.client = self.client
+
+                    pipeline = Pipeline()
+                    pipeline.add_component("prompt_builder", prompt_builder)
+                    pipeline.add_component("llm", llm)
+                    pipeline.connect("prompt_builder.prompt", "llm.prompt")
+                    self._pipelines[name] = pipeline
+            return self._pipelines[name]
+
+    def run(self, name: str, max_tokens: Optional[int] = None, **variables: Any) -> str:
+        """Render the named prompt with ``variables`` and return the model's first reply.
+
+        ``max_tokens`` overrides the pipeline's completion budget for this call.
+        The prompt builder and generator are run one after the other rather
+        than through ``Pipeline.run`` so each stage is timed on its own.
+        """
+        _, _, model, generation_kwargs = PIPELINES[name]
+        overrides = None
+        if max_tokens is not None:
+            overrides = generation_kwargs = dict(generation_kwargs, max_tokens=max_tokens)
+        prompt = self._render(name, variables)
+        llm = self.pipeline(name).get_component("llm")
+        metrics = get_metrics()
+
+        def generate() -> Dict[str, Any]:
+            with metrics.timed("llm", pipeline=name):
+                return llm.run(prompt=prompt, generation_kwargs=overrides)
+
+        cost = estimate_tokens(prompt, generation_kwargs.get("max_tokens", 0))
+        result = self.scheduler.call(model, cost, generate, pipeline=name)
+        meta = result["meta"][0] if result["meta"] else {}
+        metrics.record_usage(name, model, meta.get("usage"))
+        return result["replies"][0]
+
+    def async_client(self) -> "AsyncOpenAI":
+        """Return the pooled async client bound to the running event loop."""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            import httpx
+            from openai import AsyncOpenAI
+            http = httpx.AsyncClient(
+                limits=self._limits, timeout=self._timeout, event_hooks={"response": [self._aon_response]}
+            )
+            client = self._async_clients[loop] = AsyncOpenAI(
+                api_key=self._api_key, base_url=self._base_url, http_client=http, max_retries=0
+            )
+        return client
+
+    def _render(self, name: str, variables: Dict[str, Any]) -> str:
+        pipeline = self.pipeline(name)
+        with get_metrics().timed("prompt_build", pipeline=name):
+            return pipeline.get_component("prompt_builder").run(**variables)["prompt"]
+
+    def _request(self, name: str, max_tokens: Optional[int], variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Render the named prompt into chat-completion arguments for the raw OpenAI clients."""
+        _, _, model, generation_kwargs = PIPELINES[name]
+        if max_tokens is not None:
+            generation_kwargs = dict(generation_kwargs, max_tokens=max_tokens)
+        prompt = self._render(name, variables)
+        return dict(generation_kwargs, model=model, messages=[{"role": "user", "content": prompt}])
+
+    @staticmethod
+    def _cost(request: Dict[str, Any]) -> int:
+        return estimate_tokens(request["messages"][-1]["content"], request.get("max_tokens", 0))
+
+    async def arun(self, name: str, max_tokens: Optional[int] = None, **variables: Any) -> str:
+        """Async version of run, sending the rendered prompt through the async client."""
+        request = self._request(name, max_tokens, variables)
+        metrics = get_metrics()
+
+        async def generate():
+            with metrics.timed("llm", pipeline=name):
+                return await self.async_client().chat.completions.create(**request)
+
+        response = await self.scheduler.acall(request["model"], self._cost(request), generate, pipeline=name)
+        metrics.record_usage(name, request["model"], response.usage)
+        return response.choices[0].message.content
+
+    def stream(self, name: str, **variables: Any) -> Iterator[str]:
+        """Yield the reply text in chunks as the model generates it.
+
+        Only opening the stream is scheduled and retried; a failure after
+        chunks have been yielded propagates to the caller.
+        """
+        request = self._request(name, None, variables)
+        metrics = get_metrics()
+        start = time.perf_counter()
+        first = True
+
+        def open_stream():
+            nonlocal start
+            start = time.perf_counter()
+            return self.client.chat.completions.create(stream=True, stream_options=_USAGE, **request)
+
+        try:
+            stream = self.scheduler.call(request["model"], self._cost(request), open_stream, pipeline=name)
+            for chunk in stream:
+                if chunk.usage is not None:
+                    metrics.record_usage(name, request["model"], chunk.usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if first:
+                        metrics.observe(
+                            "stage_seconds", time.perf_counter() - start, stage="llm_first_chunk", pipeline=name
+                        )
+                        first = False
+                    yield chunk.choices[0].delta.content
+        finally:
+            metrics.observe("stage_seconds", time.perf_counter() - start, stage="llm", pipeline=name)
+
+    async def astream(self, name: str, **variables: Any) -> AsyncIterator[str]:
+        """Async version of stream."""
+        request = self._request(name, None, variables)
+        metrics = get_metrics()
+        start = time.perf_counter()
+        first = True
+
+        async def open_stream():
+            nonlocal start
+            start = time.perf_counter()
+            return await self.async_client().chat.completions.create(stream=True, stream_options=_USAGE, **request)
+
+        try:
+            stream = await self.scheduler.acall(request["model"], self._cost(request), open_stream, pipeline=name)
+            async for chunk in stream:
+                if chunk.usage is not None:
+                    metrics.record_usage(name, request["model"], chunk.usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if first:
+                        metrics.observe(
+                            "stage_seconds", time.perf_counter() - start, stage="llm_first_chunk", pipeline=name
+                        )
+                        first = False
+                    yield chunk.choices[0].delta.content
+        finally:
+            metrics.observe("stage_seconds", time.perf_counter() - start, stage="llm", pipeline=name)
+
+    def close(self) -> None:
+        self._http.close()
+
+
+def _get_engine() -> Engine:
+    """Return the process-wide engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                load_env()
+                _engine = Engine()
+    return _engine
+
+
+def set_engine(engine: Optional[Engine]) -> None:
+    """Replace the process-wide engine; ``None`` rebuilds it from the environment on next use."""
+    global _engine
+    with _engine_lock:
+        _engine = engine
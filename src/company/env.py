@@ -0,0 +1,26 @@
+from typing import Optional
+import threading
+from pathlib import Path
+
+
+_loaded = False
+_lock = threading.Lock()
+
+
+def load_env(path: Optional[Path] = None, override: bool = False) -> bool:
+    """Load a .env file into ``os.environ`` once per process.
+
+    The package calls this before it first reads its settings (the engine's
+    OpenAI key, the cache path), so applications only need to call it
+    themselves to read those variables earlier or to load a specific file.
+    Passing ``path`` always loads that file.  Returns whether a file was loaded.
+    """
+    global _loaded
+    with _lock:
+        if _loaded and path is None:
+            return False
+        from dotenv import find_dotenv, load_dotenv
+
+        _loaded = True
+        # Search upwards from this package, as the import-time load_dotenv() did.
+        return load_dotenv(path or find_dotenv(), override=override)
@@ -0,0 +1,39 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+DEFAULT_CONCURRENCY = 4
+
+
+async def fan_out(
+    func: Callable[[T], Awaitable[Any]],
+    items: Iterable[T],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    return_exceptions: bool = False,
+) -> AsyncIterator[Tuple[T, Any]]:
+    """Run ``func`` over ``items`` with at most ``concurrency`` calls in flight.
+
+    Yields ``(item, result)`` pairs in completion order.  As with
+    ``asyncio.gather``, a failing call raises unless ``return_exceptions`` is
+    set, in which case the exception is yielded as that item's result.
+    """
+    import asyncio
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def call(item: T) -> Tuple[T, Any]:
+        async with semaphore:
+            try:
+                return item, await func(item)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                return item, e
+
+    tasks = [asyncio.ensure_future(call(item)) for item in items]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,193 @@
+from typing import Dict, List, Mapping, Optional, Tuple
+import re
+
+
+# Trailing legal-form tokens dropped from SEC titles, mirroring the LLM rule
+# "Remove suffixes like Inc, Corp, LLC, Ltd".  Dotted forms such as "L.P."
+# tokenize into single letters, so those are listed as sequences.
+_SUFFIXES = (
+    ("inc",), ("incorporated",), ("corp",), ("corporation",), ("co",),
+    ("company",), ("llc",), ("ltd",), ("limited",), ("plc",), ("lp",),
+    ("llp",), ("sa",), ("ag",), ("nv",), ("se",), ("l", "p"), ("s", "a"),
+    ("n", "v"),
+)
+_SUFFIX_WORDS = frozenset(s[0] for s in _SUFFIXES if len(s) == 1)
+
+# Capitalized words that commonly open a sentence or a request and never
+# name a company on their own.
+_STOPWORDS = frozenset([
+    "a", "an", "the", "i", "we", "you", "they", "it", "this", "that", "these",
+    "those", "my", "our", "what", "which", "who", "how", "why", "when", "where",
+    "is", "are", "was", "were", "do", "does", "did", "can", "could", "would",
+    "should", "will", "has", "have", "and", "but", "or", "of", "to", "in", "on",
+    "for", "with", "about", "from", "by", "at", "please", "tell", "show",
+    "find", "get", "give", "list", "track", "compare", "news",
+])
+
+_TOKEN_RE = re.compile(r"\w+(?:['’]\w+)*")
+_FILING_MARKER_RE = re.compile(r"\s*/.*$")
+
+
+def _normalize_token(token: str) -> str:
+    """Lowercase a token and drop apostrophes so "McDonald's" matches "MCDONALDS"."""
+    return token.replace("'", "").replace("’", "").lower()
+
+
+def _strip_suffixes(tokens: List[str]) -> int:
+    """Return how many leading tokens remain once trailing legal suffixes are removed."""
+    end = len(tokens)
+    stripped = True
+    while stripped and end:
+        stripped = False
+        for suffix in _SUFFIXES:
+            n = len(suffix)
+            if end > n and tuple(tokens[end - n:end]) == suffix:
+                end -= n
+                stripped = True
+                break
+    return end
+
+
+def _core_title(title: str) -> Tuple[List[str], str]:
+    """Split an SEC title into normalized core tokens and its display name.
+
+    Filing markers ("/DE/", "/ADR") and legal suffixes are removed, e.g.
+    "COSTCO WHOLESALE CORP /NEW" -> (["costco", "wholesale"], "COSTCO WHOLESALE").
+    """
+    title = _FILING_MARKER_RE.sub("", title)
+    matches = list(_TOKEN_RE.finditer(title))
+    end = _strip_suffixes([_normalize_token(m.group()) for m in matches])
+    if not end:
+        return [], ""
+    core = matches[:end]
+    return [_normalize_token(m.group()) for m in core], title[:core[-1].end()]
+
+
+class Gazetteer:
+    """Word-level Aho-Corasick automaton over SEC company titles and tickers.
+
+    Prompts are tokenized once and scanned in a single pass; every pattern
+    ending at a token is reported through the precomputed output links.
+    """
+
+    def __init__(self, ticker_map: Mapping[str, str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self._lengths: List[int] = []
+        self._is_title: List[bool] = []
+        self._ticker_names: List[Optional[str]] = []
+        ids: Dict[Tuple[str, ...], int] = {}
+
+        def add(tokens: List[str]) -> int:
+            key = tuple(tokens)
+            pid = ids.get(key)
+            if pid is not None:
+                return pid
+            pid = ids[key] = len(self._lengths)
+            self._lengths.append(len(tokens))
+            self._is_title.append(False)
+            self._ticker_names.append(None)
+            state = 0
+            for token in tokens:
+                nxt = self._goto[state].get(token)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][token] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(pid)
+            return pid
+
+        for ticker, title in ticker_map.items():
+            tokens, name = _core_title(title)
+            # Single letters ("A", "V") collide with ordinary words.
+            if tokens and (len(tokens) > 1 or len(tokens[0]) > 1):
+                self._is_title[add(tokens)] = True
+            ticker_tokens = [_normalize_token(t) for t in _TOKEN_RE.findall(ticker)]
+            if name and ticker_tokens and len(ticker) > 1:
+                pid = add(ticker_tokens)
+                if self._ticker_names[pid] is None:
+                    self._ticker_names[pid] = name
+
+        self._build_failure_links()
+
+    def _build_failure_links(self) -> None:
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for token, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(token, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt].extend(self._out[self._fail[nxt]])
+
+    def extract(self, prompt: str) -> Tuple[List[str], bool]:
+        """Return the company names found in the prompt and whether the result is trustworthy.
+
+        The result is marked as not confident when a match is ambiguous (a
+        lowercase word, a bare ticker, a capitalized word opening a sentence)
+        or when a capitalized word is left unexplained by any match.
+        """
+        tokens = list(_TOKEN_RE.finditer(prompt))
+        normalized = [_normalize_token(m.group()) for m in tokens]
+
+        candidates = []
+        state = 0
+        for i, token in enumerate(normalized):
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+            for pid in self._out[state]:
+                candidates.append((i - self._lengths[pid] + 1, i, pid))
+
+        # Leftmost-longest, non-overlapping.
+        candidates.sort(key=lambda c: (c[0], c[0] - c[1]))
+        chosen = []
+        covered = -1
+        for start, end, pid in candidates:
+            if start > covered:
+                chosen.append((start, end, pid))
+                covered = end
+
+        def sentence_initial(i: int) -> bool:
+            j = tokens[i].start() - 1
+            while j >= 0 and prompt[j] in " \t":
+                j -= 1
+            return j < 0 or prompt[j] in ".!?\n"
+
+        names: Dict[str, str] = {}
+        confident = True
+        matched = set()
+        for start, end, pid in chosen:
+            matched.update(range(start, end + 1))
+            span = prompt[tokens[start].start():tokens[end].end()]
+            if self._is_title[pid] and span[0].isupper():
+                names.setdefault(span.lower(), span)
+                if start == end and span.istitle() and sentence_initial(start):
+                    confident = False
+            elif self._ticker_names[pid] and span.isupper():
+                name = self._ticker_names[pid]
+                names.setdefault(name.lower(), name)
+                # Bare tickers double as acronyms ("IT", "ON"); trust cashtags only.
+                if prompt[tokens[start].start() - 1:tokens[start].start()] != "$":
+                    confident = False
+            elif not (start == end and normalized[start] in _STOPWORDS):
+                confident = False
+
+        for i, m in enumerate(tokens):
+            if i in matched or not m.group()[0].isupper():
+                continue
+            if normalized[i] in _SUFFIX_WORDS or normalized[i] in _STOPWORDS:
+                continue
+            confident = False
+            break
+
+        return sorted(names.values()), confident and bool(names)
@@ -0,0 +1,305 @@
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from .cache import DEFAULT_TTLS
+from .company import _aget_competitors, _aget_subsidiaries, _get_competitors, _get_subsidiaries
+from .env import load_env
+from .fanout import fan_out
+from .resolver import _get_resolver
+
+
+DEFAULT_GRAPH_PATH = Path.home() / ".cache" / "company" / "graph.sqlite3"
+DEFAULT_CONCURRENCY = 4
+
+# relation -> (blocking lookup, async lookup)
+RELATIONS: Dict[str, Tuple[Callable, Callable]] = {
+    "competitors": (_get_competitors, _aget_competitors),
+    "subsidiaries": (_get_subsidiaries, _aget_subsidiaries),
+}
+
+# Ticker placeholders the prompts ask the model to use for unlisted companies.
+_NO_TICKER = frozenset(["", "N/A", "NA", "NONE", "PRIVATE", "UNLISTED", "-"])
+
+_graph = None
+_graph_configured = False
+
+
+class Edge(NamedTuple):
+    """A directed relation edge; ``attrs`` holds the rest of the model's row (rank, reason, details)."""
+    source: str
+    target: str
+    relation: str
+    attrs: Dict[str, Any]
+
+
+class Expansion(NamedTuple):
+    """Result of a k-hop expansion: nodes by key (with their hop ``depth``) and the edges walked.
+
+    ``errors`` holds the node lookups that failed; those nodes stay in the
+    result without edges, and the rest of the expansion goes on.
+    """
+    root: str
+    nodes: Dict[str, Dict[str, Any]]
+    edges: List[Edge]
+    errors: Dict[str, Exception]
+
+
+def _clean_ticker(ticker: Optional[str]) -> Optional[str]:
+    if not isinstance(ticker, str) or ticker.strip().upper() in _NO_TICKER:
+        return None
+    return ticker.strip()
+
+
+def node_key(name: Optional[str], ticker: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """Return the canonical key and attributes of a company.
+
+    Companies that resolve to an SEC registrant are keyed by CIK, so
+    "Google", "Alphabet" and "GOOGL" share a node; anything else is keyed
+    by its whitespace- and case-normalized name.
+    """
+    ticker = _clean_ticker(ticker)
+    company = _get_resolver().identify(name, ticker)
+    if company is not None:
+        return f"cik:{company.cik}", {"name": company.name, "ticker": company.ticker, "cik": company.cik}
+    label = " ".join((name or ticker or "").split())
+    return f"name:{label.casefold()}", {"name": label, "ticker": ticker, "cik": None}
+
+
+class RelationGraph:
+    """Adjacency index of competitor and subsidiary edges between canonical companies.
+
+    Each node's outgoing edges for a relation are fetched at most once per
+    TTL through the regular lookup functions (and so through the result
+    cache), then answered from memory.  With a ``path`` the graph is also
+    kept in SQLite and reloaded on start, so later processes reuse it.
+    """
+
+    def __init__(self, path: Optional[Path] = None, ttls: Optional[Dict[str, float]] = None):
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self._lock = threading.Lock()
+        self._nodes: Dict[str, Dict[str, Any]] = {}
+        # relation -> source -> outgoing edges, in the model's order
+        self._adjacency: Dict[str, Dict[str, List[Edge]]] = {relation: {} for relation in RELATIONS}
+        # relation -> source -> when its edges were fetched
+        self._fetched: Dict[str, Dict[str, float]] = {relation: {} for relation in RELATIONS}
+        self._conn = None
+        if path is not None:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS nodes (key TEXT PRIMARY KEY, attrs TEXT NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS fetched ("
+                " relation TEXT NOT NULL, source TEXT NOT NULL, at REAL NOT NULL,"
+                " PRIMARY KEY (relation, source));"
+                "CREATE TABLE IF NOT EXISTS edges ("
+                " relation TEXT NOT NULL, source TEXT NOT NULL, position INTEGER NOT NULL,"
+                " target TEXT NOT NULL, attrs TEXT NOT NULL, PRIMARY KEY (relation, source, position));"
+            )
+            self._conn.commit()
+            self._load()
+
+    def _load(self) -> None:
+        for key, attrs in self._conn.execute("SELECT key, attrs FROM nodes"):
+            self._nodes[key] = json.loads(attrs)
+        for relation, source, at in self._conn.execute("SELECT relation, source, at FROM fetched"):
+            self._fetched.setdefault(relation, {})[source] = at
+        for relation, source, target, attrs in self._conn.execute(
+            "SELECT relation, source, target, attrs FROM edges ORDER BY relation, source, position"
+        ):
+            self._adjacency.setdefault(relation, {}).setdefault(source, []).append(
+                Edge(source, target, relation, json.loads(attrs))
+            )
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def node(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            node = self._nodes.get(key)
+            return dict(node) if node is not None else None
+
+    def add_node(self, name: Optional[str], ticker: Optional[str] = None) -> str:
+        """Register a company and return its canonical key."""
+        key, attrs = node_key(name, ticker)
+        with self._lock:
+            self._nodes.setdefault(key, attrs)
+        return key
+
+    def edges(self, key: str, relation: str) -> Optional[List[Edge]]:
+        """Outgoing edges of a node, or None if they have not been fetched."""
+        with self._lock:
+            if key not in self._fetched[relation]:
+                return None
+            return list(self._adjacency[relation].get(key, ()))
+
+    def is_fresh(self, key: str, relation: str) -> bool:
+        with self._lock:
+            fetched = self._fetched[relation].get(key)
+        return fetched is not None and time.time() - fetched <= self.ttls.get(relation, 0)
+
+    def set_edges(self, key: str, relation: str, rows: Iterable[Dict]) -> List[Edge]:
+        """Replace a node's outgoing edges with the rows a lookup returned."""
+        edges, targets = [], {}
+        for row in rows:
+            if not isinstance(row, dict) or not row.get("company_name"):
+                continue
+            target, attrs = node_key(row.get("company_name"), row.get("ticker"))
+            if target == key or target in targets:
+                continue
+            targets[target] = attrs
+            details = {k: v for k, v in row.items() if k not in ("company_name", "ticker")}
+            edges.append(Edge(key, target, relation, details))
+        now = time.time()
+        with self._lock:
+            for target, attrs in targets.items():
+                self._nodes.setdefault(target, attrs)
+            self._adjacency[relation][key] = edges
+            self._fetched[relation][key] = now
+            if self._conn is not None:
+                self._persist(key, relation, edges, [key, *targets], now)
+        return list(edges)
+
+    def _persist(self, key: str, relation: str, edges: List[Edge], keys: List[str], now: float) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO nodes VALUES (?, ?)", [(k, json.dumps(self._nodes[k])) for k in keys]
+        )
+        self._conn.execute("DELETE FROM edges WHERE relation = ? AND source = ?", (relation, key))
+        self._conn.executemany(
+            "INSERT INTO edges VALUES (?, ?, ?, ?, ?)",
+            [(relation, key, i, edge.target, json.dumps(edge.attrs)) for i, edge in enumerate(edges)],
+        )
+        self._conn.execute("INSERT OR REPLACE INTO fetched VALUES (?, ?, ?)", (relation, key, now))
+        self._conn.commit()
+
+    def _fetch(self, key: str, relation: str) -> List[Edge]:
+        node = self.node(key)
+        rows = RELATIONS[relation][0](company_name=node["name"], company_ticker=node["ticker"])
+        return self.set_edges(key, relation, rows)
+
+    async def _afetch(self, key: str, relation: str) -> List[Edge]:
+        node = self.node(key)
+        rows = await RELATIONS[relation][1](company_name=node["name"], company_ticker=node["ticker"])
+        return self.set_edges(key, relation, rows)
+
+    def _start(self, company: str, ticker: Optional[str], relation: str) -> Tuple[str, Dict, List[str]]:
+        if relation not in RELATIONS:
+            raise ValueError(f"unknown relation {relation!r}")
+        root = self.add_node(company, ticker)
+        nodes = {root: dict(self.node(root), depth=0)}
+        return root, nodes, [root]
+
+    def _advance(
+        self, relation: str, frontier: List[str], nodes: Dict[str, Dict], edges: List[Edge], depth: int,
+        max_nodes: Optional[int],
+    ) -> List[str]:
+        """Record the frontier's edges and return the unvisited targets forming the next frontier."""
+        following = []
+        for key in frontier:
+            for edge in self.edges(key, relation) or ():
+                if edge.target not in nodes:
+                    if max_nodes is not None and len(nodes) >= max_nodes:
+                        continue
+                    nodes[edge.target] = dict(self.node(edge.target), depth=depth)
+                    following.append(edge.target)
+                edges.append(edge)
+        return following
+
+    def expand(
+        self,
+        company: str,
+        relation: str = "competitors",
+        hops: int = 2,
+        ticker: Optional[str] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        max_nodes: Optional[int] = None,
+    ) -> Expansion:
+        """Breadth-first ``hops``-deep expansion from ``company``.
+
+        Each hop fetches the frontier nodes whose edges are missing or stale,
+        up to ``concurrency`` at a time; everything else comes from the
+        graph.  A failed lookup is recorded in ``errors`` without stopping
+        the others.  ``max_nodes`` caps the size of the result; once it is
+        reached no further hops are fetched.
+        """
+        root, nodes, frontier = self._start(company, ticker, relation)
+        edges: List[Edge] = []
+        errors: Dict[str, Exception] = {}
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            for depth in range(1, hops + 1):
+                missing = [key for key in frontier if not self.is_fresh(key, relation)]
+                # Worker threads do not inherit context variables such as the request priority.
+                futures = {
+                    key: pool.submit(contextvars.copy_context().run, self._fetch, key, relation) for key in missing
+                }
+                for key, future in futures.items():
+                    if future.exception() is not None:
+                        errors[key] = future.exception()
+                frontier = self._advance(relation, frontier, nodes, edges, depth, max_nodes)
+                if not frontier or (max_nodes is not None and len(nodes) >= max_nodes):
+                    break
+        return Expansion(root, nodes, edges, errors)
+
+    async def aexpand(
+        self,
+        company: str,
+        relation: str = "competitors",
+        hops: int = 2,
+        ticker: Optional[str] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        max_nodes: Optional[int] = None,
+    ) -> Expansion:
+        """Async version of expand."""
+        root, nodes, frontier = self._start(company, ticker, relation)
+        edges: List[Edge] = []
+        errors: Dict[str, Exception] = {}
+        for depth in range(1, hops + 1):
+            missing = [key for key in frontier if not self.is_fresh(key, relation)]
+            async for key, result in fan_out(
+                lambda key: self._afetch(key, relation), missing, concurrency, return_exceptions=True
+            ):
+                if isinstance(result, Exception):
+                    errors[key] = result
+            frontier = self._advance(relation, frontier, nodes, edges, depth, max_nodes)
+            if not frontier or (max_nodes is not None and len(nodes) >= max_nodes):
+                break
+        return Expansion(root, nodes, edges, errors)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+
+
+def _relation_graph() -> RelationGraph:
+    """Return the shared graph, persisted at COMPANY_GRAPH_PATH; an empty value keeps it in memory."""
+    global _graph, _graph_configured
+    if not _graph_configured:
+        load_env()
+        path = os.getenv("COMPANY_GRAPH_PATH", str(DEFAULT_GRAPH_PATH))
+        _graph = RelationGraph(Path(path) if path else None)
+        _graph_configured = True
+    return _graph
+
+
+def set_relation_graph(graph: Optional[RelationGraph]) -> None:
+    """Replace the shared graph; ``None`` recreates it from COMPANY_GRAPH_PATH on next use."""
+    global _graph, _graph_configured
+    _graph = graph
+    _graph_configured = graph is not None
+
+
+def expand_relations(company: str, relation: str = "competitors", hops: int = 2, **kwargs: Any) -> Expansion:
+    """Expand ``company`` ``hops`` deep over the shared graph, e.g. competitors of its competitors."""
+    return _relation_graph().expand(company, relation, hops, **kwargs)
+
+
+async def aexpand_relations(company: str, relation: str = "competitors", hops: int = 2, **kwargs: Any) -> Expansion:
+    """Async version of expand_relations."""
+    return await _relation_graph().aexpand(company, relation, hops, **kwargs)
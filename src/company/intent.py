@@ -0,0 +1,38 @@
+from typing import Iterable, Pattern
+import re
+
+
+COMPETITOR_TERMS = (
+    "competitor", "competitors", "rival", "rivals", "compete", "competes", "competing", "competition",
+    "vs", "versus", "against", "peer", "peers", "market share",
+)
+SUBSIDIARY_TERMS = (
+    "subsidiary", "subsidiaries", "child company", "child companies",
+    "division", "divisions", "business unit", "business units",
+    "owned subsidiary", "wholly owned", "acquired unit",
+)
+
+
+def _compile(terms: Iterable[str]) -> Pattern:
+    # Longest first so "business units" wins over "business unit"; inner
+    # spaces match any whitespace.
+    alternatives = sorted(terms, key=len, reverse=True)
+    body = "|".join(r"\s+".join(map(re.escape, term.split())) for term in alternatives)
+    return re.compile(rf"\b(?:{body})\b", re.IGNORECASE)
+
+
+_COMPETITORS_RE = _compile(COMPETITOR_TERMS)
+_SUBSIDIARIES_RE = _compile(SUBSIDIARY_TERMS)
+
+
+def infer_intent(prompt: str) -> str:
+    """Whether the prompt asks for "competitors" or "subsidiaries".
+
+    Terms are matched as whole words, so "canvas" no longer reads as "vs".
+    Subsidiaries are chosen only when no competitor term appears; anything
+    else, including a prompt with neither, means competitors.
+    """
+    text = prompt or ""
+    if _SUBSIDIARIES_RE.search(text) and not _COMPETITORS_RE.search(text):
+        return "subsidiaries"
+    return "competitors"
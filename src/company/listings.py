@@ -0,0 +1,285 @@
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import csv
+import json
+import os
+import threading
+from pathlib import Path
+from .env import load_env
+from .gazetteer import _core_title
+from .metrics import get_metrics
+from .ticker_index import _ticker_index
+
+
+NSE_FILE = Path(__file__).parent / "nse_equity_list.csv"
+BSE_FILE = Path(__file__).parent / "bse_india_list_of_scrips.json"
+
+# exchange -> ticker suffix, in the order name lookups prefer them
+EXCHANGES: Dict[str, str] = {"US": "", "NSE": ".NS", "BSE": ".BO"}
+_SUFFIXES = {suffix[1:]: exchange for exchange, suffix in EXCHANGES.items() if suffix}
+
+# "NSE:CDSL" style prefixes
+_PREFIXES = {
+    "NSE": "NSE", "BSE": "BSE", "BOM": "BSE",
+    "NASDAQ": "US", "NYSE": "US", "AMEX": "US", "NYSEAMERICAN": "US", "NYSEARCA": "US", "OTC": "US",
+}
+
+# "BRK.B" style share classes; other one-letter suffixes are exchanges, e.g. "7203.T" or "VOD.L".
+_SHARE_CLASSES = frozenset("ABCDE")
+
+# Ticker placeholders the prompts ask the model to use for unlisted companies.
+_NO_TICKER = frozenset(["", "N/A", "NA", "NONE", "NULL", "PRIVATE", "UNLISTED", "-"])
+
+# Indian legal forms _core_title keeps, e.g. "Tata Consultancy Services Pvt. Ltd."
+_EXTRA_SUFFIXES = frozenset(["pvt", "private"])
+
+_index = None
+_index_configured = False
+_index_lock = threading.Lock()
+
+
+class Listing(NamedTuple):
+    """One security: its symbol, exchange, issuer name and identifier (CIK for SEC, ISIN in India)."""
+    symbol: str
+    exchange: str
+    name: str
+    identifier: str
+
+    @property
+    def ticker(self) -> str:
+        return self.symbol + EXCHANGES[self.exchange]
+
+
+def _name_key(name: Optional[str]) -> Tuple[str, ...]:
+    tokens = _core_title(name or "")[0]
+    while len(tokens) > 1 and tokens[-1] in _EXTRA_SUFFIXES:
+        tokens = tokens[:-1]
+    return tuple(tokens)
+
+
+def _names_agree(a: Tuple[str, ...], b: Tuple[str, ...]) -> bool:
+    """Whether two name keys plausibly name the same issuer: equal, or a multi-word prefix of the other."""
+    if not a or not b:
+        return False
+    short, long = (a, b) if len(a) <= len(b) else (b, a)
+    return short == long or (len(short) >= 2 and long[:len(short)] == short)
+
+
+def split_ticker(ticker: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Return (symbol, exchange) for a ticker as models write it, or (None, None) for a placeholder.
+
+    Bare symbols are US listings, with share classes such as "BRK.B"
+    written "BRK-B" as in the SEC file.  Suffixes of exchanges the index does not know are
+    returned as-is, e.g. ("005930", ".KS").
+    """
+    if not isinstance(ticker, str):
+        return None, None
+    text = ticker.strip().lstrip("$").upper()
+    if text in _NO_TICKER:
+        return None, None
+    prefix, colon, rest = text.partition(":")
+    if colon and prefix.strip() in _PREFIXES and rest.strip():
+        exchange = _PREFIXES[prefix.strip()]
+        symbol = rest.strip()
+        return (symbol.replace(".", "-") if exchange == "US" else symbol), exchange
+    symbol, dot, suffix = text.rpartition(".")
+    if dot and symbol and suffix in _SUFFIXES:
+        return symbol, _SUFFIXES[suffix]
+    if dot and symbol.isalpha() and suffix in _SHARE_CLASSES:
+        return f"{symbol}-{suffix}", "US"
+    if dot and symbol:
+        return symbol, f".{suffix}"
+    return text, "US"
+
+
+def _records(path: Path) -> List[Dict[str, Any]]:
+    """Rows of a CSV or JSON listing file as dicts with lowercased, trimmed keys.
+
+    JSON may be a list of objects or an object holding one such list, as
+    exchange APIs return them; anything else is not a listing file.
+    """
+    path = Path(path)
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if path.suffix.lower() == ".json":
+            data = json.load(f)
+            if isinstance(data, dict):
+                lists = [v for v in data.values() if isinstance(v, list)]
+                data = lists[0] if len(lists) == 1 else None
+            rows = data if isinstance(data, list) else None
+        else:
+            rows = list(csv.DictReader(f))
+    if not rows or not all(isinstance(row, dict) for row in rows):
+        raise ValueError(f"{path} does not hold listings")
+    return [{str(k).strip().lower(): (v.strip() if isinstance(v, str) else v) for k, v in row.items()} for row in rows]
+
+
+def _field(row: Dict[str, Any], *names: str) -> str:
+    for name in names:
+        value = row.get(name)
+        if value not in (None, ""):
+            return str(value).strip()
+    return ""
+
+
+def load_sec_listings() -> Iterator[Listing]:
+    """US listings from the SEC ticker file, primary listings first."""
+    for ticker, cik, title, _ in sorted(_ticker_index().entries(), key=lambda entry: entry[3]):
+        yield Listing(ticker.upper(), "US", title, str(cik))
+
+
+def load_nse_listings(path: Path = NSE_FILE) -> Iterator[Listing]:
+    """NSE equities from the exchange's EQUITY_L.csv (SYMBOL, NAME OF COMPANY, ISIN NUMBER)."""
+    for row in _records(path):
+        symbol = _field(row, "symbol").upper()
+        if symbol:
+            yield Listing(symbol, "NSE", _field(row, "name of company", "company name", "name"), _field(row, "isin number", "isin"))
+
+
+def load_bse_listings(path: Path = BSE_FILE) -> Iterator[Listing]:
+    """Active BSE scrips from the exchange's scrip list, as its JSON API or CSV download returns it."""
+    for row in _records(path):
+        symbol = _field(row, "scrip_id", "security id", "symbol").upper()
+        status = _field(row, "status").lower()
+        if symbol and status in ("", "active"):
+            name = _field(row, "issuer_name", "issuer name", "scrip_name", "security name")
+            identifier = _field(row, "isin_number", "isin no", "isin", "scrip_cd", "security code")
+            yield Listing(symbol, "BSE", name, identifier)
+
+
+class ListingIndex:
+    """Compact in-memory index of listings across exchanges, for checking model-returned tickers.
+
+    Listings are kept as parallel columns with two dicts on top: exact
+    ticker -> listing and normalized issuer name -> listings.
+    """
+
+    def __init__(self, listings: Iterable[Listing]):
+        self._symbols: List[str] = []
+        self._exchanges: List[str] = []
+        self._names: List[str] = []
+        self._identifiers: List[str] = []
+        self._keys: List[Tuple[str, ...]] = []
+        self._by_ticker: Dict[Tuple[str, str], int] = {}
+        self._by_symbol: Dict[str, List[int]] = {}
+        self._by_name: Dict[Tuple[str, ...], List[int]] = {}
+        self.exchanges: Dict[str, int] = {}
+        for listing in listings:
+            if (listing.symbol, listing.exchange) in self._by_ticker:
+                continue
+            i = len(self._symbols)
+            key = _name_key(listing.name)
+            self._symbols.append(listing.symbol)
+            self._exchanges.append(listing.exchange)
+            self._names.append(listing.name)
+            self._identifiers.append(listing.identifier)
+            self._keys.append(key)
+            self._by_ticker[(listing.symbol, listing.exchange)] = i
+            self._by_symbol.setdefault(listing.symbol, []).append(i)
+            if key:
+                self._by_name.setdefault(key, []).append(i)
+            self.exchanges[listing.exchange] = self.exchanges.get(listing.exchange, 0) + 1
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def _listing(self, i: int) -> Listing:
+        return Listing(self._symbols[i], self._exchanges[i], self._names[i], self._identifiers[i])
+
+    def lookup(self, ticker: str) -> Optional[Listing]:
+        """The listing a ticker names exactly, or None."""
+        symbol, exchange = split_ticker(ticker)
+        i = self._by_ticker.get((symbol, exchange)) if symbol else None
+        return self._listing(i) if i is not None else None
+
+    def _by_issuer(self, key: Tuple[str, ...], exchange: Optional[str]) -> Optional[int]:
+        ids = self._by_name.get(key)
+        if not ids:
+            return None
+        for i in ids:
+            if self._exchanges[i] == exchange:
+                return i
+        return min(ids, key=lambda i: list(EXCHANGES).index(self._exchanges[i]))
+
+    def find(self, name: str, exchange: Optional[str] = None) -> Optional[Listing]:
+        """The listing of an issuer by name, on ``exchange`` if it is listed there."""
+        i = self._by_issuer(_name_key(name), exchange)
+        return self._listing(i) if i is not None else None
+
+    def check(self, name: Optional[str], ticker: Optional[str]) -> Tuple[str, str]:
+        """Return a row's checked ticker and what happened to it.
+
+        The outcome is "valid", "corrected" (listed under another symbol or
+        exchange), "filled" (from the name), "removed" (not listed on an
+        exchange the index covers, bare symbols included), "unverified"
+        (exchanges the index does not cover) or "missing".
+        """
+        symbol, exchange = split_ticker(ticker)
+        key = _name_key(name)
+        if symbol is not None and exchange not in self.exchanges:
+            # e.g. "7203.T": a primary listing elsewhere is not swapped for a covered one.
+            return ticker.strip(), "unverified"
+        named = self._by_issuer(key, exchange)
+        if symbol is None:
+            if named is not None:
+                return self._listing(named).ticker, "filled"
+            return "N/A", "missing"
+
+        found = self._by_ticker.get((symbol, exchange))
+        if found is not None:
+            if named is None or _names_agree(key, self._keys[found]) or not key:
+                return self._listing(found).ticker, "valid"
+            return self._listing(named).ticker, "corrected"
+        # Not listed where the model said: the same symbol elsewhere, or the issuer's own listing.
+        for other in self._by_symbol.get(symbol, ()):
+            if _names_agree(key, self._keys[other]):
+                return self._listing(other).ticker, "corrected"
+        if named is not None:
+            return self._listing(named).ticker, "corrected"
+        return "N/A", "removed"
+
+
+def _listing_index() -> Optional[ListingIndex]:
+    """Build the shared listing index on first use.
+
+    SEC listings are always included; COMPANY_NSE_LISTINGS and
+    COMPANY_BSE_LISTINGS point at the exchanges' listing files (defaulting
+    to the copies beside this module).  A missing or unusable file leaves
+    that exchange out, and its tickers are then kept unverified.
+    """
+    global _index, _index_configured
+    if not _index_configured:
+        with _index_lock:
+            if not _index_configured:
+                load_env()
+                listings: List[Listing] = list(load_sec_listings())
+                for env, default, loader in (
+                    ("COMPANY_NSE_LISTINGS", NSE_FILE, load_nse_listings),
+                    ("COMPANY_BSE_LISTINGS", BSE_FILE, load_bse_listings),
+                ):
+                    path = os.getenv(env, str(default)).strip()
+                    if not path:
+                        continue
+                    try:
+                        listings.extend(loader(Path(path)))
+                    except (OSError, ValueError):
+                        continue
+                _index = ListingIndex(listings)
+                _index_configured = True
+    return _index
+
+
+def set_listing_index(index: Optional[ListingIndex]) -> None:
+    """Replace the shared listing index; ``None`` passes tickers through unchecked."""
+    global _index, _index_configured
+    with _index_lock:
+        _index = index
+        _index_configured = True
+
+
+def check_ticker(relation: str, name: Optional[str], ticker: Optional[str]) -> str:
+    """Check one returned row's ticker against the shared listing index, counting the outcome."""
+    index = _listing_index()
+    if index is None:
+        return ticker
+    checked, result = index.check(name, ticker)
+    get_metrics().incr("ticker_checks_total", relation=relation, result=result)
+    return checked
@@ -0,0 +1,314 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+import json
+import threading
+import time
+from pathlib import Path
+
+
+# USD per million (prompt, completion) tokens.
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (50, 100, 200, 500, 1000, 2000, 4000, 8000, 16000)
+
+_PREFIX = "company_"
+
+Labels = Tuple[Tuple[str, str], ...]
+Hook = Callable[[Dict[str, Any]], None]
+
+_metrics = None
+_metrics_lock = threading.Lock()
+_events: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("company_metric_events", default=None)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost of a call; 0.0 for models missing from MODEL_PRICES."""
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+def _usage_counts(usage: Any) -> Tuple[int, int]:
+    """Read (prompt, completion) tokens from a usage dict or an openai usage object."""
+    if usage is None:
+        return 0, 0
+    get = usage.get if isinstance(usage, dict) else lambda k: getattr(usage, k, None)
+    return int(get("prompt_tokens") or 0), int(get("completion_tokens") or 0)
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _format_labels(labels: Labels, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th quantile (q in 0..1).
+
+        None means the quantile lies above the largest bucket, which has no
+        finite bound (and JSON has no Infinity).
+        """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return None
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Return (le, cumulative count) pairs ending with +Inf."""
+        pairs, seen = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            pairs.append((_format_number(bound), seen))
+        pairs.append(("+Inf", self.count))
+        return pairs
+
+
+class Metrics:
+    """In-memory counters and histograms for every stage of a lookup.
+
+    Stage latencies go to ``stage_seconds`` labelled by stage and pipeline,
+    token usage and estimated cost to per-model counters, and cache,
+    extraction and retry outcomes to their own counters.  Every recorded
+    value is also passed to the registered hooks and to the event list of
+    an active ``collect()`` block.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._buckets: Dict[str, Sequence[float]] = {"stage_seconds": LATENCY_BUCKETS, "llm_tokens": TOKEN_BUCKETS}
+        self._hooks: List[Hook] = []
+
+    def add_hook(self, hook: Hook) -> Hook:
+        """Call ``hook(event)`` for every value recorded from now on."""
+        with self._lock:
+            self._hooks.append(hook)
+        return hook
+
+    def remove_hook(self, hook: Hook) -> None:
+        with self._lock:
+            if hook in self._hooks:
+                self._hooks.remove(hook)
+
+    def _emit(self, kind: str, name: str, value: float, labels: Dict[str, Any]) -> None:
+        event = {"time": time.time(), "type": kind, "name": name, "value": value,
+                 "labels": {k: str(v) for k, v in labels.items() if v is not None}}
+        events = _events.get()
+        if events is not None:
+            events.append(event)
+        for hook in list(self._hooks):
+            try:
+                hook(event)
+            except Exception:
+                # A broken exporter must not fail the lookup it is measuring.
+                pass
+
+    def incr(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Add ``value`` to the counter ``name``."""
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        self._emit("counter", name, value, labels)
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Record ``value`` in the histogram ``name``."""
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self._buckets.get(name, LATENCY_BUCKETS))
+            histogram.observe(value)
+        self._emit("histogram", name, value, labels)
+
+    @contextmanager
+    def timed(self, stage: str, **labels: Any) -> Iterator[None]:
+        """Record the wall time of the block in ``stage_seconds``, failed or not."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - start, stage=stage, **labels)
+
+    def record_usage(self, pipeline: str, model: str, usage: Any) -> None:
+        """Count the tokens and estimated cost of one completion."""
+        prompt_tokens, completion_tokens = _usage_counts(usage)
+        if not prompt_tokens and not completion_tokens:
+            return
+        self.incr("llm_calls_total", pipeline=pipeline, model=model)
+        self.incr("llm_prompt_tokens_total", prompt_tokens, pipeline=pipeline, model=model)
+        self.incr("llm_completion_tokens_total", completion_tokens, pipeline=pipeline, model=model)
+        self.incr("llm_cost_usd_total", estimate_cost(model, prompt_tokens, completion_tokens),
+                  pipeline=pipeline, model=model)
+        self.observe("llm_tokens", prompt_tokens + completion_tokens, pipeline=pipeline, model=model)
+
+    def counter(self, name: str, **labels: Any) -> float:
+        """Current value of one counter series."""
+        with self._lock:
+            return self._counters.get((name, _labels(labels)), 0)
+
+    def histogram(self, name: str, **labels: Any) -> Optional[Histogram]:
+        """The histogram of one series, or None if nothing was observed."""
+        with self._lock:
+            return self._histograms.get((name, _labels(labels)))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Return every series as a JSON-serializable dict."""
+        with self._lock:
+            series = [
+                {"type": "counter", "name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                series.append({
+                    "type": "histogram", "name": name, "labels": dict(labels),
+                    "count": histogram.count, "sum": histogram.sum,
+                    "p50": histogram.quantile(0.5), "p95": histogram.quantile(0.95),
+                    "p99": histogram.quantile(0.99),
+                    "buckets": dict(histogram.cumulative()),
+                })
+        return series
+
+    def to_jsonl(self) -> str:
+        """Render the snapshot as one JSON object per line."""
+        return "".join(json.dumps(series, allow_nan=False) + "\n" for series in self.snapshot())
+
+    def to_prometheus(self) -> str:
+        """Render every series in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {_PREFIX}{name} counter")
+                    typed.add(name)
+                lines.append(f"{_PREFIX}{name}{_format_labels(labels)} {_format_number(value)}")
+            for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                if name not in typed:
+                    lines.append(f"# TYPE {_PREFIX}{name} histogram")
+                    typed.add(name)
+                for le, count in histogram.cumulative():
+                    lines.append(f"{_PREFIX}{name}_bucket{_format_labels(labels, [('le', le)])} {count}")
+                lines.append(f"{_PREFIX}{name}_sum{_format_labels(labels)} {_format_number(histogram.sum)}")
+                lines.append(f"{_PREFIX}{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+class JSONLExporter:
+    """Hook appending every recorded event to a JSON Lines file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Dict[str, Any]) -> None:
+        line = json.dumps(event) + "\n"
+        with self._lock, open(self.path, "a") as f:
+            f.write(line)
+
+
+@contextmanager
+def collect() -> Iterator[List[Dict[str, Any]]]:
+    """Gather the events recorded in this context (and tasks it starts) into a list.
+
+        with collect() as events:
+            _get_competitors(company_name="Apple")
+        summarize(events)
+    """
+    events: List[Dict[str, Any]] = []
+    token = _events.set(events)
+    try:
+        yield events
+    finally:
+        _events.reset(token)
+
+
+_USAGE_FIELDS = {
+    "llm_prompt_tokens_total": "prompt_tokens",
+    "llm_completion_tokens_total": "completion_tokens",
+    "llm_cost_usd_total": "cost_usd",
+}
+
+
+def summarize(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fold collected events into one row per stage and pipeline/model for display."""
+    rows: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+    for event in events:
+        labels = event["labels"]
+        if event["name"] == "stage_seconds":
+            key = ("stage", labels.get("stage", ""), labels.get("pipeline", ""))
+            row = rows.setdefault(key, {"stage": key[1], "pipeline": key[2], "calls": 0, "seconds": 0.0})
+            row["calls"] += 1
+            row["seconds"] += event["value"]
+        elif event["name"] in _USAGE_FIELDS:
+            key = ("usage", labels.get("model", ""), labels.get("pipeline", ""))
+            row = rows.setdefault(key, {"stage": "usage", "pipeline": key[2], "model": key[1],
+                                        "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0})
+            row[_USAGE_FIELDS[event["name"]]] += event["value"]
+        elif event["type"] == "counter":
+            detail = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+            key = ("counter", event["name"], detail)
+            row = rows.setdefault(key, {"stage": event["name"], "pipeline": detail, "calls": 0})
+            row["calls"] += event["value"]
+    return list(rows.values())
+
+
+def get_metrics() -> Metrics:
+    """Return the process-wide metrics registry."""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics()
+    return _metrics
+
+
+def set_metrics(metrics: Optional[Metrics]) -> None:
+    """Replace the process-wide registry; ``None`` starts a fresh one on next use."""
+    global _metrics
+    with _metrics_lock:
+        _metrics = metrics
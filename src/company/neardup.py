@@ -0,0 +1,234 @@
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional, Sequence, Set, Tuple
+from collections import OrderedDict
+import copy
+import itertools
+import os
+import random
+import threading
+import zlib
+from .env import load_env
+from .gazetteer import _STOPWORDS, _TOKEN_RE, _core_title, _normalize_token
+from .metrics import get_metrics
+from .ticker_index import _ticker_index
+
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 128
+DEFAULT_SHINGLE_SIZE = 3
+DEFAULT_MAX_ENTRIES = 10_000
+
+# Permutations are (a * x + b) mod a 31-bit prime over 32-bit shingle
+# hashes, so every product fits in a uint64 and NumPy agrees exactly with
+# the pure-Python fallback.
+_PRIME = (1 << 31) - 1
+_BLOCK = 4096
+
+_cache = None
+_cache_configured = False
+_company_words = None
+_lock = threading.Lock()
+
+
+def shingles(text: str, size: int = DEFAULT_SHINGLE_SIZE) -> Set[int]:
+    """Hashes of the overlapping ``size``-word sequences of ``text``, ignoring case and punctuation."""
+    words = [_normalize_token(w) for w in _TOKEN_RE.findall(text)]
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode())} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + size]).encode()) for i in range(len(words) - size + 1)}
+
+
+def _get_company_words() -> FrozenSet[str]:
+    """Every word of an SEC company title or ticker, normalized like prompt tokens."""
+    global _company_words
+    if _company_words is None:
+        with _lock:
+            if _company_words is None:
+                words: Set[str] = set()
+                for ticker, _, title, _ in _ticker_index().entries():
+                    words.update(_core_title(title)[0])
+                    if len(ticker) > 1:
+                        words.update(_normalize_token(t) for t in _TOKEN_RE.findall(ticker))
+                _company_words = frozenset(words)
+    return _company_words
+
+
+def _entities(text: str) -> FrozenSet[str]:
+    """Words that may name a company, compared before a near-duplicate is reused.
+
+    Capitalized words count, and so does any word of a listed company's
+    title or ticker however it is cased, so "amazon" in place of
+    "alphabet" blocks reuse in a lowercase prompt too.
+    """
+    company_words = _get_company_words()
+    entities = set()
+    for w in _TOKEN_RE.findall(text):
+        token = _normalize_token(w)
+        if token not in _STOPWORDS and (w[0].isupper() or token in company_words):
+            entities.add(token)
+    return frozenset(entities)
+
+
+class MinHasher:
+    """MinHash signatures of shingle sets, vectorized with NumPy when it is installed."""
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._a = [rng.randrange(1, _PRIME) for _ in range(num_perm)]
+        self._b = [rng.randrange(0, _PRIME) for _ in range(num_perm)]
+        try:
+            import numpy as np
+        except ImportError:
+            self._np = None
+        else:
+            self._np = np
+            self._a_np = np.array(self._a, dtype=np.uint64)[:, None]
+            self._b_np = np.array(self._b, dtype=np.uint64)[:, None]
+
+    def signature(self, hashes: Set[int]) -> Tuple[int, ...]:
+        if not hashes:
+            return (_PRIME,) * self.num_perm
+        if self._np is None:
+            return tuple(min((a * x + b) % _PRIME for x in hashes) for a, b in zip(self._a, self._b))
+        np = self._np
+        values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+        minimum = np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        for start in range(0, len(values), _BLOCK):
+            block = (self._a_np * values[None, start:start + _BLOCK] + self._b_np) % _PRIME
+            np.minimum(minimum, block.min(axis=1), out=minimum)
+        return tuple(minimum.tolist())
+
+
+def _band_rows(num_perm: int, threshold: float) -> int:
+    """Rows per LSH band: the most selective split whose candidate curve still rises below ``threshold``.
+
+    Pairs with similarity s share a bucket with probability 1 - (1 - s^r)^b,
+    which climbs steeply around (1/b)^(1/r); keeping that point at least
+    0.05 under the threshold makes misses of true near-duplicates rare.
+    """
+    rows = 1
+    for r in range(1, num_perm + 1):
+        if num_perm % r == 0 and (r / num_perm) ** (1 / r) <= threshold - 0.05:
+            rows = r
+    return rows
+
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class NearDuplicateCache:
+    """Memo of extraction results keyed by near-identical text.
+
+    Each text is shingled into word trigrams and MinHashed; the signature
+    is split into bands (sized for ``threshold`` unless given) and indexed
+    in an LSH table, so candidates are found without comparing against
+    every entry.  A lookup reuses the stored value of the most similar
+    candidate whose estimated Jaccard similarity reaches ``threshold`` and
+    whose possible company names (see _entities) include all of the new
+    text's, so a templated story about a different company never reuses
+    another company's answer.  At most ``max_entries`` are
+    kept, evicting the least recently used.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        num_perm: int = DEFAULT_NUM_PERM,
+        bands: Optional[int] = None,
+        shingle_size: int = DEFAULT_SHINGLE_SIZE,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        if bands is not None and num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.rows = num_perm // bands if bands is not None else _band_rows(num_perm, threshold)
+        self.bands = num_perm // self.rows
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+        self._hasher = MinHasher(num_perm)
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        # id -> (signature, entities, value), least recently used first
+        self._entries: "OrderedDict[int, Tuple[Tuple[int, ...], FrozenSet[str], Any]]" = OrderedDict()
+        self._buckets: List[Dict[Hashable, Set[int]]] = [{} for _ in range(self.bands)]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _bands(self, signature: Tuple[int, ...]) -> List[Tuple[int, ...]]:
+        return [signature[i * self.rows:(i + 1) * self.rows] for i in range(self.bands)]
+
+    def _key(self, text: str) -> Tuple[Tuple[int, ...], FrozenSet[str]]:
+        with get_metrics().timed("minhash"):
+            return self._hasher.signature(shingles(text, self.shingle_size)), _entities(text)
+
+    def get(self, text: str) -> Optional[Any]:
+        """Return the value stored for a near-duplicate of ``text``, or None."""
+        signature, entities = self._key(text)
+        best, best_score, value = None, self.threshold, None
+        with self._lock:
+            candidates: Set[int] = set()
+            for bucket, band in zip(self._buckets, self._bands(signature)):
+                candidates.update(bucket.get(band, ()))
+            for entry_id in candidates:
+                stored, stored_entities, _ = self._entries[entry_id]
+                score = similarity(signature, stored)
+                if score >= best_score and entities <= stored_entities:
+                    best, best_score = entry_id, score
+            if best is not None:
+                self._entries.move_to_end(best)
+                value = copy.deepcopy(self._entries[best][2])
+        get_metrics().incr("neardup_total", result="hits" if best is not None else "misses")
+        return value
+
+    def put(self, text: str, value: Any) -> None:
+        signature, entities = self._key(text)
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = (signature, entities, copy.deepcopy(value))
+            for bucket, band in zip(self._buckets, self._bands(signature)):
+                bucket.setdefault(band, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._evict()
+
+    def _evict(self) -> None:
+        entry_id, (signature, _, _) = self._entries.popitem(last=False)
+        for bucket, band in zip(self._buckets, self._bands(signature)):
+            ids = bucket.get(band)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del bucket[band]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets = [{} for _ in range(self.bands)]
+
+
+def _neardup_cache() -> Optional[NearDuplicateCache]:
+    """Return the shared near-duplicate cache for extraction.
+
+    COMPANY_NEARDUP_THRESHOLD sets the similarity needed to reuse a result;
+    0 or an empty value disables the cache.
+    """
+    global _cache, _cache_configured
+    if not _cache_configured:
+        with _lock:
+            if not _cache_configured:
+                load_env()
+                raw = os.getenv("COMPANY_NEARDUP_THRESHOLD", str(DEFAULT_THRESHOLD)).strip()
+                threshold = float(raw) if raw else 0.0
+                _cache = NearDuplicateCache(threshold) if threshold > 0 else None
+                _cache_configured = True
+    return _cache
+
+
+def set_neardup_cache(cache: Optional[NearDuplicateCache]) -> None:
+    """Replace the shared near-duplicate cache; ``None`` disables it."""
+    global _cache, _cache_configured
+    with _lock:
+        _cache = cache
+        _cache_configured = True
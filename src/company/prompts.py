@@ -0,0 +1,146 @@
+COMPANY_MODEL = "gpt-3.5-turbo"
+COMPANY_TEMPLATE = """
+    Extract all company names from the following text. Return only a JSON array of company names, nothing else.
+    Rules:
+    - Include full company names (e.g., "Apple Inc", "Microsoft Corporation")
+    - Remove suffixes like Inc, Corp, LLC, Ltd when extracting the core name
+    - Return only the core company names
+    - If no companies found, return empty array
+
+    Text: {{text}}
+
+    JSON Array:
+    """
+
+COMPETITORS_MODEL = "gpt-4.1-mini"
+COMPETITORS_TEMPLATE = """You are an expert market analyst specializing in competitive intelligence. Your task is to identify and rank up to 5 of the most direct competitors for the company provided.
+
+**Company Details:**
+
+Name: {{company_name}}
+Ticker: {{company_ticker}}
+
+**Instructions:**
+
+1. Analyze the Core Business: First, precisely identify the primary business model of the target company ({{company_name}}). Focus on its main products, services, and revenue streams.
+2. Geographical Focus: Limit the competitor search to the target company's primary country of operation. Only list an international company if it has a significant, direct market presence and competes within that same country.
+3. Identify True Competitors: Based on this core business model and geographical focus, identify other companies that offer the exact same or highly similar services to the same target customers.
+4. Crucial Exclusion Criteria: Do NOT list companies that are primarily customers, clients, partners, or distributors.
+    Example: For a central securities depository like CDSL, its direct competitor is another depository (like NSDL). Do not list stock brokerage firms (like Zerodha or HDFC Securities) as they are clients (Depository Participants), not direct competitors to the core depository business.
+5. Provide a JSON Response: Your output must be a valid JSON array of objects, ordered from the most direct competitor (rank 1) to the least.
+6. JSON Object Keys: Each object must contain:
+    "rank": An integer ranking the competitor's significance.
+    "company_name": The official name of the competitor.
+    "ticker": The stock ticker on its primary local exchange (e.g., CDSL.NS for India's NSE, MSFT for the US). Use "N/A" if private or unknown.
+    "reason": A concise explanation of the specific business segment where the companies directly compete.
+7. No Competitors: If no direct competitors are found, return an empty JSON array: [].
+
+JSON Array:"""
+
+SUBSIDIARIES_MODEL = "gpt-3.5-turbo"
+SUBSIDIARIES_TEMPLATE = """You are a corporate filing analyst. Your task is to provide a comprehensive list of all known, majority-owned subsidiaries for the parent company provided.
+
+**Company Details:**
+- Name: {{company_name}}
+- Ticker: {{company_ticker}}
+
+**Instructions:**
+1. Identify all legal entities that are known to be majority-owned or fully-owned subsidiaries of the parent company.
+2. Provide your response as a valid JSON array of objects.
+3. The list does not need to be ranked.
+4. Each object in the array must contain the following keys:
+   - "company_name": The official legal name of the subsidiary.
+   - "ticker": The stock ticker if the subsidiary is also publicly traded. Use the string "N/A" otherwise.
+   - "details": A brief description of the subsidiary's business or its relationship to the parent company (e.g., "Acquired in 2006", "Manages cloud computing services").
+5. If the company has no known subsidiaries, return an empty JSON array: [].
+
+JSON Array:"""
+
+COMPETITORS_BATCH_TEMPLATE = """You are an expert market analyst specializing in competitive intelligence. Your task is to identify and rank up to 5 of the most direct competitors for each company listed below.
+
+**Companies:**
+{% for company in companies %}
+- Key: {{company.key}} | Name: {{company.name}} | Ticker: {{company.ticker}}
+{% endfor %}
+
+**Instructions:**
+
+1. Analyze the Core Business: For each company, precisely identify its primary business model. Focus on its main products, services, and revenue streams.
+2. Geographical Focus: Limit the competitor search to each company's primary country of operation. Only list an international company if it has a significant, direct market presence and competes within that same country.
+3. Identify True Competitors: Based on this core business model and geographical focus, identify other companies that offer the exact same or highly similar services to the same target customers.
+4. Crucial Exclusion Criteria: Do NOT list companies that are primarily customers, clients, partners, or distributors.
+5. Provide a JSON Response: Your output must be a single valid JSON object. Use each company's Key exactly as given as a property name, and give as its value a JSON array of competitor objects ordered from the most direct competitor (rank 1) to the least.
+6. JSON Object Keys: Each competitor object must contain:
+    "rank": An integer ranking the competitor's significance.
+    "company_name": The official name of the competitor.
+    "ticker": The stock ticker on its primary local exchange (e.g., CDSL.NS for India's NSE, MSFT for the US). Use "N/A" if private or unknown.
+    "reason": A concise explanation of the specific business segment where the companies directly compete.
+7. No Competitors: If no direct competitors are found for a company, use an empty JSON array: [].
+
+JSON Object:"""
+
+SUBSIDIARIES_BATCH_TEMPLATE = """You are a corporate filing analyst. Your task is to provide a comprehensive list of all known, majority-owned subsidiaries for each parent company listed below.
+
+**Companies:**
+{% for company in companies %}
+- Key: {{company.key}} | Name: {{company.name}} | Ticker: {{company.ticker}}
+{% endfor %}
+
+**Instructions:**
+1. Identify all legal entities that are known to be majority-owned or fully-owned subsidiaries of each parent company.
+2. Provide your response as a single valid JSON object. Use each company's Key exactly as given as a property name, and give as its value a JSON array of subsidiary objects.
+3. The lists do not need to be ranked.
+4. Each subsidiary object must contain the following keys:
+   - "company_name": The official legal name of the subsidiary.
+   - "ticker": The stock ticker if the subsidiary is also publicly traded. Use the string "N/A" otherwise.
+   - "details": A brief description of the subsidiary's business or its relationship to the parent company (e.g., "Acquired in 2006", "Manages cloud computing services").
+5. If a company has no known subsidiaries, use an empty JSON array: [].
+
+JSON Object:"""
+
+# The cascade's first tier: a cheaper model in JSON mode.  JSON mode only
+# returns objects, so these variants ask for the usual array under "items".
+FAST_MODEL = "gpt-4.1-nano"
+_ITEMS_OBJECT = 'Return a JSON object whose "items" key holds that array, e.g. {"items": []}.\n\nJSON Object:'
+
+
+def _items_object(template: str) -> str:
+    return template.rstrip().rsplit("JSON Array:", 1)[0] + _ITEMS_OBJECT
+
+
+COMPANY_FAST_TEMPLATE = _items_object(COMPANY_TEMPLATE)
+COMPETITORS_FAST_TEMPLATE = _items_object(COMPETITORS_TEMPLATE)
+SUBSIDIARIES_FAST_TEMPLATE = _items_object(SUBSIDIARIES_TEMPLATE)
+
+# One round trip for the main UI flow: the companies in a text together with
+# each one's competitors or subsidiaries.
+ANALYZE_COMPETITORS_TEMPLATE = """You are an expert market analyst specializing in competitive intelligence. Your task is to find the companies named in a text and, for each one, rank up to 5 of its most direct competitors.
+
+**Text:**
+{{text}}
+
+**Instructions:**
+
+1. Extract Companies: List every company named in the text. Remove suffixes like Inc, Corp, LLC, Ltd from the names. If no companies are named, return {"companies": []}.
+2. Identify True Competitors: For each company, identify other companies in its primary country of operation that offer the exact same or highly similar products or services to the same target customers. Do NOT list companies that are primarily customers, clients, partners, or distributors.
+3. Provide a JSON Response: Your output must be a single valid JSON object whose "companies" key holds an array with one object per extracted company, containing:
+    "company_name": The company's name as extracted.
+    "ticker": Its stock ticker on its primary local exchange. Use "N/A" if private or unknown.
+    "competitors": A JSON array of competitor objects ordered from the most direct competitor (rank 1) to the least, each containing "rank" (an integer), "company_name", "ticker" ("N/A" if private or unknown) and "reason" (a concise explanation of the business segment where they compete). Use [] if there are none.
+
+JSON Object:"""
+
+ANALYZE_SUBSIDIARIES_TEMPLATE = """You are a corporate filing analyst. Your task is to find the companies named in a text and, for each one, list all of its known, majority-owned subsidiaries.
+
+**Text:**
+{{text}}
+
+**Instructions:**
+1. Extract Companies: List every company named in the text. Remove suffixes like Inc, Corp, LLC, Ltd from the names. If no companies are named, return {"companies": []}.
+2. Identify all legal entities that are known to be majority-owned or fully-owned subsidiaries of each company.
+3. Provide your response as a single valid JSON object whose "companies" key holds an array with one object per extracted company, containing:
+   - "company_name": The company's name as extracted.
+   - "ticker": Its stock ticker, or the string "N/A" if private or unknown.
+   - "subsidiaries": A JSON array of subsidiary objects, each containing "company_name" (the official legal name), "ticker" (the string "N/A" unless it is publicly traded) and "details" (a brief description of its business or its relationship to the parent). Use [] if there are none.
+
+JSON Object:"""
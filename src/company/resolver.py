@@ -0,0 +1,196 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from collections import defaultdict
+import threading
+from .gazetteer import _core_title
+from .ticker_index import _ticker_index
+
+
+DEFAULT_CUTOFF = 0.6
+
+# Brand names that share no spelling with the registrant's SEC title.
+ALIASES = {
+    "google": "GOOGL",
+    "meta": "META",
+    "facebook": "META",
+    "instagram": "META",
+    "whatsapp": "META",
+    "youtube": "GOOGL",
+    "chase": "JPM",
+    "jp morgan": "JPM",
+    "berkshire": "BRK-B",
+    "walmart": "WMT",
+    "coca cola": "KO",
+    "coke": "KO",
+    "pepsi": "PEP",
+    "disney": "DIS",
+}
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+class Company(NamedTuple):
+    """Canonical SEC identity of a company."""
+    cik: int
+    ticker: str
+    title: str
+
+    @property
+    def name(self) -> str:
+        """The title without legal suffixes, e.g. "Alphabet" for "Alphabet Inc."."""
+        return _core_title(self.title)[1] or self.title
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_core_title(text)[0])
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Resolver:
+    """Map free-form company names and tickers to canonical (CIK, ticker, title).
+
+    Lookups try an exact ticker, an exact suffix-normalized title and the
+    alias table, then fall back to a character-trigram inverted index that
+    ranks titles by Dice similarity.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, int, str, int]], aliases: Optional[Dict[str, Optional[str]]] = None):
+        # The primary listing of a CIK is the one the SEC file ranks first.
+        primary: Dict[int, Tuple[int, Company]] = {}
+        self._by_ticker: Dict[str, int] = {}
+        for ticker, cik, title, rank in entries:
+            self._by_ticker[ticker.upper()] = cik
+            if cik not in primary or rank < primary[cik][0]:
+                primary[cik] = (rank, Company(cik, ticker, title))
+        self._companies: Dict[int, Company] = {cik: company for cik, (_, company) in primary.items()}
+
+        self._by_name: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._name_ciks: List[int] = []
+        self._gram_counts: List[int] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        for cik, company in self._companies.items():
+            name = _normalize(company.title)
+            if not name or name in self._by_name:
+                continue
+            self._by_name[name] = cik
+            name_id = len(self._names)
+            self._names.append(name)
+            self._name_ciks.append(cik)
+            grams = _trigrams(name)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(name_id)
+
+        self._aliases: Dict[str, int] = {}
+        for alias, ticker in (ALIASES if aliases is None else aliases).items():
+            cik = self._by_ticker.get(ticker) if ticker else None
+            if cik is not None:
+                self._aliases[_normalize(alias)] = cik
+
+    def candidates(self, query: str, k: int = 5, cutoff: float = DEFAULT_CUTOFF) -> List[Tuple[Company, float]]:
+        """Return up to ``k`` fuzzy title matches scoring at least ``cutoff``, best first."""
+        name = _normalize(query or "")
+        if not name:
+            return []
+        grams = _trigrams(name)
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for name_id in self._postings.get(gram, ()):
+                shared[name_id] += 1
+        scored = []
+        for name_id, count in shared.items():
+            score = 2 * count / (len(grams) + self._gram_counts[name_id])
+            if score >= cutoff:
+                scored.append((score, name_id))
+        scored.sort(key=lambda s: (-s[0], self._names[s[1]]))
+        return [(self._companies[self._name_ciks[name_id]], score) for score, name_id in scored[:k]]
+
+    def ticker(self, symbol: str) -> Optional[Company]:
+        """Return the company listed under ``symbol``, e.g. "brk.b", or None."""
+        if not symbol or not isinstance(symbol, str):
+            return None
+        cik = self._by_ticker.get(symbol.strip().lstrip("$").upper().replace(".", "-"))
+        return self._companies[cik] if cik is not None else None
+
+    def resolve(self, query: str, cutoff: Optional[float] = DEFAULT_CUTOFF) -> Optional[Company]:
+        """Return the canonical company for a name or ticker, or None if nothing is close enough.
+
+        Only "$GOOG" or all-caps queries are looked up as tickers, so a name
+        such as "Ford" is not taken for the FORD listing.  With ``cutoff``
+        None only exact titles and aliases match.
+        """
+        if not query or not isinstance(query, str):
+            return None
+        query = query.strip()
+        name = _normalize(query)
+        cik = self._by_name.get(name)
+        if cik is None:
+            cik = self._aliases.get(name)
+        if cik is not None:
+            return self._companies[cik]
+        if _is_symbol(query):
+            company = self.ticker(query)
+            if company is not None:
+                return company
+        if cutoff is None:
+            return None
+        best = self.candidates(query.lstrip("$"), k=1, cutoff=cutoff)
+        return best[0][0] if best else None
+
+    def identify(self, name: Optional[str], ticker: Optional[str]) -> Optional[Company]:
+        """The company a lookup's name and ticker unambiguously name, or None.
+
+        A given ticker is looked up in the ticker table; a name must match a
+        title or alias exactly.  Fuzzy matches are never taken as the caller's
+        identity: "Goldman Sachs" scores higher against "Goldman Sachs BDC"
+        than against "Goldman Sachs Group".
+        """
+        company = self.ticker(ticker) if ticker else None
+        if company is None and name:
+            company = self.resolve(name, cutoff=None)
+        return company
+
+
+def _is_symbol(query: str) -> bool:
+    symbol = query.lstrip("$")
+    return query.startswith("$") or (" " not in symbol and symbol.isupper())
+
+
+def _get_resolver() -> Resolver:
+    """Build the resolver over the shared ticker index on first use."""
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                _resolver = Resolver(_ticker_index().entries())
+    return _resolver
+
+
+def resolve_company(query: str, cutoff: float = DEFAULT_CUTOFF) -> Optional[Company]:
+    """Resolve an extracted company name or ticker to its canonical SEC identity."""
+    return _get_resolver().resolve(query, cutoff)
+
+
+def _identity_key(name: str) -> object:
+    """CIK of a name's exact identity, else its normalized spelling; fuzzy matches never merge."""
+    company = _get_resolver().identify(name, None)
+    if company is not None:
+        return company.cik
+    return _normalize(name) or " ".join(name.split()).casefold()
+
+
+def dedupe_companies(names: Iterable[str]) -> List[str]:
+    """Drop names that identify a company already listed, e.g. "Google" after "Alphabet"."""
+    seen: Set[object] = set()
+    unique = []
+    for name in names:
+        key = _identity_key(name)
+        if key not in seen:
+            seen.add(key)
+            unique.append(name)
+    return unique
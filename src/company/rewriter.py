@@ -0,0 +1,110 @@
+from typing import List, Mapping, NamedTuple, Optional, Tuple
+import re
+import threading
+from .gazetteer import _FILING_MARKER_RE, _STOPWORDS
+from .ticker_index import _ticker_index
+
+
+# Exchange suffixes appended to local listings ("INFY.NS", "SHOP.TO").  A
+# suffixed symbol falls back to the base ticker when only that is indexed.
+EXCHANGE_SUFFIXES = frozenset([
+    "NS", "BO", "L", "TO", "V", "NE", "HK", "T", "AX", "NZ", "PA", "DE", "F",
+    "SW", "AS", "BR", "MI", "MC", "LS", "ST", "OL", "CO", "HE", "SS", "SZ",
+    "KS", "KQ", "TW", "SI", "JK", "BK", "SA", "MX", "US",
+])
+
+# Uppercase words that are also tickers but far more often mean themselves.
+# A cashtag ("$ON") still rewrites them.
+_AMBIGUOUS = _STOPWORDS | frozenset([
+    "ai", "all", "now", "be", "go", "so", "see", "big", "key", "fun", "low",
+    "new", "one", "two", "run", "cash", "life", "love", "well", "real", "open",
+    "true", "free", "good", "best", "fast", "ceo", "cfo", "cto", "coo", "ipo",
+    "etf", "esg", "gdp", "eps", "pe", "api", "ev", "ar", "vr", "us", "usa",
+    "uk", "eu", "un", "fy", "yoy", "qoq", "q1", "q2", "q3", "q4", "ok",
+])
+
+# Cashtags in any case; bare symbols only in uppercase.  Either may carry one
+# class or exchange suffix ("BRK.B", "BRK-B", "INFY.NS").  The lookarounds
+# keep the scan from starting or stopping inside a longer word or symbol.
+_SYMBOL_RE = re.compile(
+    r"(?<![\w$.\-])"
+    r"(?:\$(?P<cashtag>[A-Za-z][A-Za-z0-9]*(?:[.\-][A-Za-z0-9]+)?)"
+    r"|(?P<bare>[A-Z][A-Z0-9]*(?:[.\-][A-Z0-9]+)?))"
+    r"(?![\w$]|[.\-][A-Za-z0-9])"
+)
+
+_rewriter = None
+_rewriter_lock = threading.Lock()
+
+
+class TickerSpan(NamedTuple):
+    """A ticker found in a prompt; ``start``/``end`` are offsets into the original text."""
+    start: int
+    end: int
+    symbol: str
+    ticker: str
+    name: str
+
+
+class TickerRewriter:
+    """Replace ticker symbols in free text with the company names they stand for.
+
+    The text is scanned once with a precompiled pattern that only stops on
+    cashtags and uppercase symbols, so ordinary words cost nothing beyond
+    the regex scan.  The output is assembled from slices of the original
+    text, which keeps its spacing and punctuation intact.
+    """
+
+    def __init__(self, ticker_map: Mapping[str, str]):
+        self._tickers = ticker_map
+
+    def _lookup(self, symbol: str, cashtag: bool) -> Optional[Tuple[str, str]]:
+        key = symbol.upper()
+        candidates = [key]
+        if "." in key:
+            base, suffix = key.rsplit(".", 1)
+            # Share classes are dotted in prose but dashed in the SEC file.
+            candidates.append(f"{base}-{suffix}")
+            if suffix in EXCHANGE_SUFFIXES:
+                candidates.append(base)
+        elif not cashtag and (len(key) < 2 or key.lower() in _AMBIGUOUS):
+            return None
+        for ticker in candidates:
+            title = self._tickers.get(ticker)
+            if title:
+                return ticker, _FILING_MARKER_RE.sub("", title)
+        return None
+
+    def find(self, text: str) -> List[TickerSpan]:
+        """Return every recognized ticker in ``text`` in order of appearance."""
+        spans = []
+        for m in _SYMBOL_RE.finditer(text):
+            symbol = m.group("cashtag") or m.group("bare")
+            found = self._lookup(symbol, m.group("cashtag") is not None)
+            if found is not None:
+                spans.append(TickerSpan(m.start(), m.end(), m.group(), found[0], found[1]))
+        return spans
+
+    def rewrite(self, text: str) -> Tuple[str, List[TickerSpan]]:
+        """Return ``text`` with each ticker replaced by its company name, and the replaced spans."""
+        spans = self.find(text)
+        if not spans:
+            return text, spans
+        parts = []
+        position = 0
+        for span in spans:
+            parts.append(text[position:span.start])
+            parts.append(span.name)
+            position = span.end
+        parts.append(text[position:])
+        return "".join(parts), spans
+
+
+def _get_rewriter() -> TickerRewriter:
+    """Build the rewriter over the shared ticker index on first use."""
+    global _rewriter
+    if _rewriter is None:
+        with _rewriter_lock:
+            if _rewriter is None:
+                _rewriter = TickerRewriter(_ticker_index())
+    return _rewriter
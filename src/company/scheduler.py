@@ -0,0 +1,301 @@
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+import heapq
+import itertools
+import random
+import threading
+import time
+from .metrics import get_metrics
+
+
+# Lower values are served first.
+INTERACTIVE = 0
+BATCH = 10
+
+# model -> (requests per minute, tokens per minute).  Conservative defaults;
+# the limits OpenAI reports in x-ratelimit-* headers replace them.
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    "gpt-3.5-turbo": (3500, 200_000),
+    "gpt-4o-mini": (500, 200_000),
+    "gpt-4.1-mini": (500, 200_000),
+    "gpt-4.1-nano": (500, 200_000),
+}
+FALLBACK_LIMITS = (500, 30_000)
+
+# Requests waiting behind the head of a queue re-check this often.
+_POLL_SECONDS = 0.02
+
+_priority: ContextVar[int] = ContextVar("company_request_priority", default=INTERACTIVE)
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def estimate_tokens(prompt: str, max_tokens: int) -> int:
+    """Tokens a request counts against TPM: roughly 4 characters per prompt token plus the completion budget."""
+    return len(prompt) // 4 + max_tokens
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """Run the block's LLM requests at ``priority`` (INTERACTIVE or BATCH)."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """Continuously refilled bucket holding ``burst_seconds`` worth of a per-minute limit."""
+
+    def __init__(self, per_minute: float, burst_seconds: float = 10.0):
+        self.burst_seconds = burst_seconds
+        self.updated = time.monotonic()
+        self.level = float("inf")
+        self.set_limit(per_minute)
+
+    def set_limit(self, per_minute: float) -> None:
+        self.per_minute = per_minute
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * self.burst_seconds)
+        self.level = min(self.level, self.capacity)
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost: float, now: float) -> float:
+        """Seconds until ``cost`` can be taken (requests larger than the bucket take a full one)."""
+        self._refill(now)
+        missing = min(cost, self.capacity) - self.level
+        return max(0.0, missing / self.rate) if self.rate else float("inf")
+
+    def take(self, cost: float) -> None:
+        self.level -= min(cost, self.capacity)
+
+
+class _ModelLimiter:
+    def __init__(self, rpm: float, tpm: float, burst_seconds: float):
+        self.requests = TokenBucket(rpm, burst_seconds)
+        self.tokens = TokenBucket(tpm, burst_seconds)
+        self.paused_until = 0.0
+        self.waiters: List[Tuple[int, int]] = []
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait, from retry-after-ms or retry-after."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return max(0.0, float(value) * scale)
+            except ValueError:
+                continue
+    return None
+
+
+def _retry_reason(error: BaseException) -> Optional[str]:
+    """Why a failed request may be retried, or None if retrying cannot help."""
+    status = getattr(error, "status_code", None)
+    if status == 429:
+        # An exhausted quota or billing limit will not recover by waiting.
+        return None if getattr(error, "code", None) == "insufficient_quota" else "rate_limit"
+    if status in (408, 409) or (status is not None and status >= 500):
+        return f"status_{status}"
+    if type(error).__name__ in ("APIConnectionError", "APITimeoutError"):
+        return "connection"
+    return None
+
+
+class Scheduler:
+    """Admit LLM requests per model within RPM and TPM budgets, highest priority first.
+
+    Every request waits in its model's priority queue until it is at the
+    head and both buckets can pay for it, so interactive requests overtake
+    queued batch work.  Retryable failures are retried with jittered
+    exponential backoff; a 429 also pauses the whole model for the
+    server's retry-after so queued requests do not pile onto the limit.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Mapping[str, Tuple[float, float]]] = None,
+        max_attempts: int = 6,
+        base_delay: float = 0.5,
+        max_delay: float = 60.0,
+        burst_seconds: float = 10.0,
+    ):
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.burst_seconds = burst_seconds
+        self._cond = threading.Condition()
+        self._models: Dict[str, _ModelLimiter] = {}
+        self._seq = itertools.count()
+
+    def _limiter(self, model: str) -> _ModelLimiter:
+        limiter = self._models.get(model)
+        if limiter is None:
+            rpm, tpm = self.limits.get(model, FALLBACK_LIMITS)
+            limiter = self._models[model] = _ModelLimiter(rpm, tpm, self.burst_seconds)
+        return limiter
+
+    def _enqueue(self, model: str) -> Tuple[_ModelLimiter, Tuple[int, int]]:
+        with self._cond:
+            limiter = self._limiter(model)
+            ticket = (_priority.get(), next(self._seq))
+            heapq.heappush(limiter.waiters, ticket)
+            return limiter, ticket
+
+    def _try_take(self, limiter: _ModelLimiter, ticket: Tuple[int, int], cost: float) -> Optional[float]:
+        """Take capacity for ``ticket`` and return 0, or return how long to wait (None: not at the head)."""
+        if limiter.waiters[0] != ticket:
+            return None
+        now = time.monotonic()
+        delay = max(
+            limiter.paused_until - now,
+            limiter.requests.wait_time(1, now),
+            limiter.tokens.wait_time(cost, now),
+        )
+        if delay > 0:
+            return delay
+        limiter.requests.take(1)
+        limiter.tokens.take(cost)
+        heapq.heappop(limiter.waiters)
+        self._cond.notify_all()
+        return 0.0
+
+    def _leave(self, limiter: _ModelLimiter, ticket: Tuple[int, int]) -> None:
+        with self._cond:
+            if ticket in limiter.waiters:
+                limiter.waiters.remove(ticket)
+                heapq.heapify(limiter.waiters)
+                self._cond.notify_all()
+
+    def acquire(self, model: str, cost: float) -> float:
+        """Block until a request costing ``cost`` tokens may be sent; return the seconds waited."""
+        start = time.monotonic()
+        limiter, ticket = self._enqueue(model)
+        granted = False
+        try:
+            with self._cond:
+                while True:
+                    delay = self._try_take(limiter, ticket, cost)
+                    if delay == 0:
+                        granted = True
+                        return time.monotonic() - start
+                    self._cond.wait(delay)
+        finally:
+            if not granted:
+                self._leave(limiter, ticket)
+
+    async def aacquire(self, model: str, cost: float) -> float:
+        """Async version of acquire; waits by sleeping instead of blocking the event loop."""
+        import asyncio
+        start = time.monotonic()
+        limiter, ticket = self._enqueue(model)
+        granted = False
+        try:
+            while True:
+                with self._cond:
+                    delay = self._try_take(limiter, ticket, cost)
+                if delay == 0:
+                    granted = True
+                    return time.monotonic() - start
+                await asyncio.sleep(_POLL_SECONDS if delay is None else min(delay, 1.0))
+        finally:
+            if not granted:
+                self._leave(limiter, ticket)
+
+    def _backoff(self, model: str, error: BaseException, attempt: int, pipeline: Optional[str]) -> Optional[float]:
+        """Return the delay before retrying after ``error``, or None to give up."""
+        reason = _retry_reason(error)
+        if reason is None or attempt + 1 >= self.max_attempts:
+            return None
+        retry_after = _retry_after(error)
+        if reason == "rate_limit":
+            with self._cond:
+                limiter = self._limiter(model)
+                pause = retry_after if retry_after is not None else self.base_delay * 2 ** attempt
+                limiter.paused_until = max(limiter.paused_until, time.monotonic() + pause)
+        get_metrics().incr("llm_retries_total", pipeline=pipeline, reason=reason)
+        # Full jitter on the exponential step, never sooner than the server asked.
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
+
+    def call(self, model: str, cost: float, func: Callable[[], Any], pipeline: Optional[str] = None) -> Any:
+        """Run ``func`` once the model's budget allows it, retrying retryable failures."""
+        for attempt in itertools.count():
+            waited = self.acquire(model, cost)
+            get_metrics().observe("stage_seconds", waited, stage="queue", pipeline=pipeline)
+            try:
+                return func()
+            except Exception as e:
+                delay = self._backoff(model, e, attempt, pipeline)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+
+    async def acall(
+        self, model: str, cost: float, func: Callable[[], Awaitable[Any]], pipeline: Optional[str] = None
+    ) -> Any:
+        """Async version of call; ``func`` returns an awaitable."""
+        import asyncio
+        for attempt in itertools.count():
+            waited = await self.aacquire(model, cost)
+            get_metrics().observe("stage_seconds", waited, stage="queue", pipeline=pipeline)
+            try:
+                return await func()
+            except Exception as e:
+                delay = self._backoff(model, e, attempt, pipeline)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+
+    def observe_headers(self, model: str, headers: Mapping[str, str]) -> None:
+        """Adopt the limits OpenAI reports and never assume more headroom than it says is left."""
+        with self._cond:
+            limiter = self._limiter(model)
+            now = time.monotonic()
+            for bucket, kind in ((limiter.requests, "requests"), (limiter.tokens, "tokens")):
+                limit = headers.get(f"x-ratelimit-limit-{kind}")
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                try:
+                    if limit is not None and float(limit) != bucket.per_minute:
+                        bucket.set_limit(float(limit))
+                    if remaining is not None:
+                        bucket._refill(now)
+                        bucket.level = min(bucket.level, float(remaining))
+                except ValueError:
+                    continue
+
+    def queued(self, model: Optional[str] = None) -> int:
+        """Number of requests waiting for capacity, for one model or all."""
+        with self._cond:
+            limiters = [self._models[model]] if model in self._models else (
+                [] if model is not None else list(self._models.values())
+            )
+            return sum(len(limiter.waiters) for limiter in limiters)
+
+
+def _get_scheduler() -> Scheduler:
+    """Return the process-wide scheduler shared by every engine."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = Scheduler()
+    return _scheduler
+
+
+def set_scheduler(scheduler: Optional[Scheduler]) -> None:
+    """Replace the process-wide scheduler; ``None`` restores the defaults on next use."""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = scheduler
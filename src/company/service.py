@@ -0,0 +1,428 @@
+"""Asyncio HTTP service over the company lookups: ``python -m company.service``.
+
+Routes take and return JSON:
+
+    GET  /health                       liveness, load and snapshot age
+    GET  /metrics                      every metric in Prometheus text format
+    POST /companies     {"prompt"}     company names in a prompt
+    POST /analyze       {"prompt"}     companies with their competitors or subsidiaries
+    POST /competitors   {"company_name", "company_ticker"}
+    POST /subsidiaries  {"company_name", "company_ticker"}
+
+Relation lookups arriving within a few milliseconds of each other are
+grouped into shared upstream calls; posting ``"stream": true`` (or
+``?stream=1``) streams one company's rows as NDJSON instead.  Client
+connections are kept alive, and the whole process shares one pooled
+upstream client.  At most ``max_inflight`` requests run at once and
+``max_queue`` more may wait; beyond that the service answers 503 with
+Retry-After rather than queueing without bound.
+"""
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import sys
+import time
+from urllib.parse import parse_qsl, urlsplit
+from .analyze import aanalyze
+from .batch import get_competitors_many, get_subsidiaries_many
+from .company import _aget_company, _aget_competitors, _aget_subsidiaries, _astream_competitors, _astream_subsidiaries
+from .env import load_env
+from .metrics import get_metrics
+from .resolver import dedupe_companies
+from .snapshot import snapshot_age
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+DEFAULT_WINDOW = 0.005
+DEFAULT_MAX_BATCH = 10
+DEFAULT_MAX_INFLIGHT = 64
+DEFAULT_MAX_QUEUE = 256
+DEFAULT_MAX_BODY = 1 << 20
+DEFAULT_IDLE_TIMEOUT = 30.0
+
+# relation -> (batched lookup, async single lookup, async stream)
+RELATIONS: Dict[str, Tuple[Callable, Callable, Callable]] = {
+    "competitors": (get_competitors_many, _aget_competitors, _astream_competitors),
+    "subsidiaries": (get_subsidiaries_many, _aget_subsidiaries, _astream_subsidiaries),
+}
+
+_REASONS = {
+    200: "OK", 204: "No Content", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 500: "Internal Server Error", 502: "Bad Gateway", 503: "Service Unavailable",
+}
+
+CompanyKey = Tuple[Optional[str], Optional[str]]
+
+
+class HTTPError(Exception):
+    """A request the service answers with ``status`` and a JSON error message."""
+
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    query: Dict[str, str]
+    headers: Dict[str, str]
+    body: bytes
+    keep_alive: bool
+
+
+class MicroBatcher:
+    """Group one relation's lookups that arrive within ``window`` seconds into shared upstream calls.
+
+    Identical lookups in a window share one result.  A window that holds a
+    single company uses the regular async lookup; larger ones go through
+    the batched lookup on a worker thread, which serves cached companies
+    locally and packs the rest into as few calls as its token budget allows.
+    If the batched lookup fails, each company is looked up on its own, so
+    only the callers of a failing company see its error.
+    A window closes early once it holds ``max_batch`` companies.
+    """
+
+    def __init__(self, relation: str, window: float = DEFAULT_WINDOW, max_batch: int = DEFAULT_MAX_BATCH):
+        self.relation = relation
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self._pending: Dict[CompanyKey, "asyncio.Future[List[Dict]]"] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set["asyncio.Task"] = set()
+
+    async def lookup(self, company_name: Optional[str] = None, company_ticker: Optional[str] = None) -> List[Dict]:
+        loop = asyncio.get_running_loop()
+        key = (company_name or None, company_ticker or None)
+        future = self._pending.get(key)
+        if future is None:
+            future = self._pending[key] = loop.create_future()
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush)
+        # One caller disconnecting must not cancel the lookup others are waiting on.
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: Dict[CompanyKey, "asyncio.Future[List[Dict]]"]) -> None:
+        many, single, _ = RELATIONS[self.relation]
+        metrics = get_metrics()
+        metrics.incr("service_batches_total", relation=self.relation)
+        metrics.incr("service_batched_lookups_total", len(batch), relation=self.relation)
+        if len(batch) > 1:
+            try:
+                # Worker threads do not inherit context variables such as the request priority.
+                context = contextvars.copy_context()
+                results = await asyncio.get_running_loop().run_in_executor(None, context.run, many, list(batch))
+            except Exception:
+                # One company's failure must not fail everyone else in the window.
+                metrics.incr("service_batch_failures_total", relation=self.relation)
+            else:
+                for key, future in batch.items():
+                    if not future.done():
+                        future.set_result(results.get(key, []))
+                return
+        keys = list(batch)
+        outcomes = await asyncio.gather(
+            *(single(company_name=name, company_ticker=ticker) for name, ticker in keys), return_exceptions=True
+        )
+        for key, outcome in zip(keys, outcomes):
+            future = batch[key]
+            if future.done():
+                continue
+            if isinstance(outcome, BaseException):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+
+async def _read_request(reader: asyncio.StreamReader, max_body: int) -> Optional[Request]:
+    """Read one HTTP/1.x request, or return None once the client has closed the connection."""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "malformed request line")
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPError(400, "invalid Content-Length")
+    if length > max_body:
+        raise HTTPError(413, f"request body is larger than {max_body} bytes")
+    body = await reader.readexactly(length) if length else b""
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    url = urlsplit(target)
+    return Request(method.upper(), url.path.rstrip("/") or "/", dict(parse_qsl(url.query)), headers, body, keep_alive)
+
+
+def _head(status: int, headers: Dict[str, str], keep_alive: bool) -> bytes:
+    lines = [f"HTTP/1.1 {status} {_REASONS.get(status, 'Unknown')}"]
+    headers = dict(headers, **{
+        "Connection": "keep-alive" if keep_alive else "close",
+        "Access-Control-Allow-Origin": "*",
+    })
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def _send(
+    writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool,
+    headers: Optional[Dict[str, str]] = None, content_type: str = "application/json",
+) -> None:
+    body = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode()
+    writer.write(_head(status, dict(headers or {}, **{
+        "Content-Type": content_type, "Content-Length": str(len(body)),
+    }), keep_alive) + body)
+    await writer.drain()
+
+
+async def _send_stream(writer: asyncio.StreamWriter, rows: AsyncIterator[Dict], keep_alive: bool) -> None:
+    """Send each row as an NDJSON line in its own chunk as soon as it is parsed.
+
+    A failure after the first row cannot change the status any more, so it
+    is reported as a final ``{"error": ...}`` line.
+    """
+    writer.write(_head(200, {"Content-Type": "application/x-ndjson", "Transfer-Encoding": "chunked"}, keep_alive))
+    try:
+        async for row in rows:
+            line = json.dumps(row, ensure_ascii=False).encode() + b"\n"
+            writer.write(b"%x\r\n%s\r\n" % (len(line), line))
+            await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        raise
+    except Exception as e:
+        line = json.dumps({"error": f"{type(e).__name__}: {e}"}).encode() + b"\n"
+        writer.write(b"%x\r\n%s\r\n" % (len(line), line))
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+
+def _json_body(request: Request) -> Dict[str, Any]:
+    try:
+        body = json.loads(request.body or b"{}")
+    except ValueError:
+        raise HTTPError(400, "body is not valid JSON")
+    if not isinstance(body, dict):
+        raise HTTPError(400, "body must be a JSON object")
+    return body
+
+
+def _text_field(body: Dict[str, Any], field: str) -> Optional[str]:
+    value = body.get(field)
+    if value is not None and not isinstance(value, str):
+        raise HTTPError(400, f"{field!r} must be a string")
+    return (value.strip() or None) if value else None
+
+
+class Service:
+    """Serve the company lookups to many concurrent HTTP clients from one event loop."""
+
+    def __init__(
+        self,
+        window: float = DEFAULT_WINDOW,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_inflight: int = DEFAULT_MAX_INFLIGHT,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        max_body: int = DEFAULT_MAX_BODY,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    ):
+        self.batchers = {relation: MicroBatcher(relation, window, max_batch) for relation in RELATIONS}
+        self.max_inflight = max(1, max_inflight)
+        self.max_queue = max(0, max_queue)
+        self.max_body = max_body
+        self.idle_timeout = idle_timeout
+        self.inflight = 0
+        self.queued = 0
+        self.started = time.time()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._routes: Dict[str, Callable] = {
+            "/companies": self._companies,
+            "/analyze": self._analyze,
+            "/competitors": self._relation,
+            "/subsidiaries": self._relation,
+        }
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        """Start listening; ``port`` 0 picks a free port, readable from ``address``."""
+        self._slots = asyncio.Semaphore(self.max_inflight)
+        self._server = await asyncio.start_server(self._connection, host, port)
+        return self._server
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer requests on one connection until the client closes it or stays idle too long."""
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(_read_request(reader, self.max_body), self.idle_timeout)
+                except HTTPError as e:
+                    # The rest of the request was not read, so the connection cannot be reused.
+                    await _send(writer, e.status, {"error": str(e)}, False, e.headers)
+                    break
+                if request is None or not await self._handle(request, writer):
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle(self, request: Request, writer: asyncio.StreamWriter) -> bool:
+        """Route one request; returns whether the connection stays open."""
+        route = request.path if request.path in self._routes or request.path in ("/health", "/metrics") else "other"
+        metrics = get_metrics()
+        status = 200
+        try:
+            with metrics.timed("request", route=route):
+                if request.method == "OPTIONS":
+                    status = 204
+                    writer.write(_head(204, {
+                        "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+                        "Access-Control-Allow-Headers": "Content-Type",
+                        "Content-Length": "0",
+                    }, request.keep_alive))
+                    await writer.drain()
+                elif request.path == "/health":
+                    await _send(writer, 200, self.health(), request.keep_alive)
+                elif request.path == "/metrics":
+                    await _send(writer, 200, metrics.to_prometheus().encode(), request.keep_alive,
+                                content_type="text/plain; version=0.0.4")
+                elif request.path not in self._routes:
+                    raise HTTPError(404, f"unknown path {request.path}")
+                elif request.method != "POST":
+                    raise HTTPError(405, "use POST", {"Allow": "POST, OPTIONS"})
+                else:
+                    await self._admit(request, writer, self._routes[request.path])
+        except HTTPError as e:
+            status = e.status
+            await _send(writer, e.status, {"error": str(e)}, request.keep_alive, e.headers)
+        except (ConnectionError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            status = 502
+            await _send(writer, 502, {"error": f"{type(e).__name__}: {e}"}, request.keep_alive)
+        metrics.incr("service_requests_total", route=route, status=status)
+        return request.keep_alive
+
+    async def _admit(self, request: Request, writer: asyncio.StreamWriter, handler: Callable) -> None:
+        """Run ``handler`` once a slot is free, refusing work when the wait queue is full."""
+        if self._slots.locked() and self.queued >= self.max_queue:
+            raise HTTPError(503, "too many requests in flight", {"Retry-After": "1"})
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        self.inflight += 1
+        try:
+            await handler(request, writer)
+        finally:
+            self.inflight -= 1
+            self._slots.release()
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "uptime": round(time.time() - self.started, 3),
+            "inflight": self.inflight,
+            "queued": self.queued,
+            "max_inflight": self.max_inflight,
+            "max_queue": self.max_queue,
+            "snapshot_age": snapshot_age(),
+        }
+
+    async def _companies(self, request: Request, writer: asyncio.StreamWriter) -> None:
+        prompt = _text_field(_json_body(request), "prompt")
+        companies = dedupe_companies(await _aget_company(prompt)) if prompt else []
+        await _send(writer, 200, {"companies": companies}, request.keep_alive)
+
+    async def _analyze(self, request: Request, writer: asyncio.StreamWriter) -> None:
+        prompt = _text_field(_json_body(request), "prompt")
+        analysis = await aanalyze(prompt or "")
+        await _send(writer, 200, {
+            "intent": analysis.intent,
+            "companies": analysis.companies,
+            "relations": analysis.relations,
+            "fused": analysis.fused,
+            "errors": {company: f"{type(e).__name__}: {e}" for company, e in analysis.errors.items()},
+        }, request.keep_alive)
+
+    async def _relation(self, request: Request, writer: asyncio.StreamWriter) -> None:
+        relation = request.path.lstrip("/")
+        body = _json_body(request)
+        name, ticker = _text_field(body, "company_name"), _text_field(body, "company_ticker")
+        if not name and not ticker:
+            raise HTTPError(400, "give company_name or company_ticker")
+        if body.get("stream") is True or request.query.get("stream") in ("1", "true"):
+            stream = RELATIONS[relation][2]
+            await _send_stream(writer, stream(company_name=name, company_ticker=ticker), request.keep_alive)
+            return
+        rows = await self.batchers[relation].lookup(name, ticker)
+        await _send(writer, 200, {relation: rows}, request.keep_alive)
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m company.service", description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=os.getenv("COMPANY_SERVICE_HOST", DEFAULT_HOST))
+    parser.add_argument("--port", type=int, default=int(os.getenv("COMPANY_SERVICE_PORT", DEFAULT_PORT)))
+    parser.add_argument("--window-ms", type=float, default=DEFAULT_WINDOW * 1000,
+                        help="how long lookups wait to be grouped into a shared call")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH, help="companies per shared call")
+    parser.add_argument("--max-inflight", type=int, default=DEFAULT_MAX_INFLIGHT, help="requests handled at once")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE, help="requests waiting before 503")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    load_env()
+    args = _parser().parse_args(argv)
+    service = Service(args.window_ms / 1000, args.max_batch, args.max_inflight, args.max_queue)
+
+    async def serve() -> None:
+        server = await service.start(args.host, args.port)
+        host, port = service.address
+        print(f"serving on http://{host}:{port}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
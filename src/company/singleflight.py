@@ -0,0 +1,91 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+import asyncio
+import copy
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Coalesce concurrent calls sharing a key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait on the same future and receive a copy of its result,
+    or the same exception.  Futures are ``concurrent.futures.Future`` so
+    waiters may be threads or coroutines on any event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._tasks: Set["asyncio.Task"] = set()
+        self.coalesced = 0
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def _finish(self, key: Hashable, future: Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            del self._calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Run ``func`` unless a call with ``key`` is already in flight, then share its outcome."""
+        future, leader = self._join(key)
+        if not leader:
+            return copy.deepcopy(future.result())
+        try:
+            result = func()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def ado(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Async version of do; ``func`` returns an awaitable.
+
+        The work runs in its own task, so a leader that is cancelled (say its
+        client disconnected) stops waiting without cancelling it for the
+        callers coalesced onto it.
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return copy.deepcopy(await asyncio.wrap_future(future))
+
+        async def run():
+            return await func()
+
+        task = asyncio.ensure_future(run())
+        self._tasks.add(task)
+
+        def finish(task: "asyncio.Task") -> None:
+            self._tasks.discard(task)
+            if task.cancelled():
+                self._finish(key, future, error=asyncio.CancelledError())
+            elif task.exception() is not None:
+                self._finish(key, future, error=task.exception())
+            else:
+                self._finish(key, future, task.result())
+
+        task.add_done_callback(finish)
+        return await asyncio.shield(task)
+
+
+def _flight_key(relation: str, *parts: Optional[str]) -> Tuple[str, ...]:
+    """Normalize lookup inputs so trivially different spellings share a flight."""
+    return (relation,) + tuple(" ".join(p.split()).casefold() if p else "" for p in parts)
+
+
+# Blocking and async callers coalesce separately so a blocking call made on an
+# event loop thread can never wait on a coroutine that loop has to run.
+_flights = SingleFlight()
+_async_flights = SingleFlight()
@@ -0,0 +1,482 @@
+"""Precomputed relation results for every SEC registrant: ``python -m company.snapshot {build,info}``.
+
+``build`` looks up the competitors and subsidiaries of each company in
+``sec_company_tickers.json`` and compiles them into a memory-mapped
+snapshot that relation lookups consult before calling the model, so the
+common case is a local binary search and only the long tail goes live.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from .cascade import SCHEMAS
+from .env import load_env
+from .metrics import get_metrics
+from .prompts import COMPETITORS_MODEL, COMPETITORS_TEMPLATE, SUBSIDIARIES_MODEL, SUBSIDIARIES_TEMPLATE
+from .ticker_index import _ticker_index
+
+
+DEFAULT_SNAPSHOT_PATH = Path.home() / ".cache" / "company" / "relations.snap"
+DEFAULT_WORKERS = 8
+DAY = 24 * 60 * 60
+
+# Relations stored in a snapshot, in file order, with the prompt each was built from.
+RELATIONS: Dict[str, Tuple[str, str]] = {
+    "competitors": (COMPETITORS_TEMPLATE, COMPETITORS_MODEL),
+    "subsidiaries": (SUBSIDIARIES_TEMPLATE, SUBSIDIARIES_MODEL),
+}
+
+# Layout: header, row count per relation, string offsets, company columns
+# (cik, name, ticker) sorted by CIK, then per relation each company's first
+# row and row count followed by one column per schema field, then the
+# ticker index (ticker string, company) sorted by ticker, and last the
+# string pool.  Every array holds little-endian 32-bit integers; string
+# fields are ids into the pool.
+_MAGIC = b"CRSN"
+_VERSION = 1
+_HEADER = struct.Struct("<4sId16sIII")  # magic, version, built at, prompts digest, strings, companies, tickers
+_COUNTS = struct.Struct("<" + "I" * len(RELATIONS))
+_U32 = struct.Struct("<I")
+_I32 = struct.Struct("<i")
+_ABSENT = 0xFFFFFFFF
+
+_shared: Optional["Snapshot"] = None
+_shared_configured = False
+_max_age = 0.0
+
+# Set while a build runs so its own lookups never read the snapshot they replace.
+_building: ContextVar[bool] = ContextVar("company_snapshot_building", default=False)
+
+
+def _prompts_digest() -> bytes:
+    """Fingerprint of the prompts and models behind the stored relations."""
+    raw = json.dumps([[relation, *RELATIONS[relation]] for relation in RELATIONS], ensure_ascii=False)
+    return hashlib.sha256(raw.encode()).digest()[:16]
+
+
+def _pack(fmt: str, values: Sequence[int]) -> bytes:
+    return struct.pack("<%d%s" % (len(values), fmt), *values)
+
+
+def write_snapshot(
+    target: Path,
+    companies: Dict[int, Tuple[str, List[str]]],
+    results: Dict[Tuple[str, int], List[Dict]],
+    built_at: Optional[float] = None,
+) -> Path:
+    """Compile relation results into a snapshot file at ``target``.
+
+    ``companies`` maps each CIK to its name and tickers (primary listing
+    first); ``results`` maps (relation, CIK) to that company's rows.  A
+    company with no entry for a relation is stored as absent and stays a
+    live lookup, which is different from an empty list.
+    """
+    strings: Dict[str, int] = {}
+
+    def sid(text: str) -> int:
+        if text not in strings:
+            strings[text] = len(strings)
+        return strings[text]
+
+    ciks = sorted(companies)
+    names = [sid(companies[cik][0]) for cik in ciks]
+    primary = [sid(companies[cik][1][0]) for cik in ciks]
+
+    counts, sections = [], []
+    for relation in RELATIONS:
+        fields = SCHEMAS[relation]
+        first, count = [], []
+        columns: Dict[str, List[int]] = {key: [] for key in fields}
+        for cik in ciks:
+            rows = results.get((relation, cik))
+            if rows is None:
+                first.append(_ABSENT)
+                count.append(0)
+                continue
+            first.append(len(columns["company_name"]))
+            count.append(len(rows))
+            for row in rows:
+                for key, kind in fields.items():
+                    columns[key].append(int(row[key]) if kind is int else sid(str(row[key])))
+        counts.append(len(columns["company_name"]))
+        sections.append(_pack("I", first) + _pack("I", count) + b"".join(
+            _pack("i" if kind is int else "I", columns[key]) for key, kind in fields.items()
+        ))
+
+    listings = sorted(
+        ((ticker.upper().encode(), position) for position, cik in enumerate(ciks) for ticker in companies[cik][1]),
+    )
+    index_tickers = [sid(ticker.decode()) for ticker, _ in listings]
+    index_companies = [position for _, position in listings]
+
+    pool, offsets = bytearray(), [0]
+    for text in strings:
+        pool += text.encode()
+        offsets.append(len(pool))
+
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".%d.tmp" % os.getpid())
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(
+            _MAGIC, _VERSION, time.time() if built_at is None else built_at, _prompts_digest(),
+            len(strings), len(ciks), len(listings),
+        ))
+        f.write(_COUNTS.pack(*counts))
+        f.write(_pack("I", offsets))
+        f.write(_pack("I", ciks) + _pack("I", names) + _pack("I", primary))
+        for section in sections:
+            f.write(section)
+        f.write(_pack("I", index_tickers) + _pack("I", index_companies))
+        f.write(pool)
+    os.replace(tmp, target)
+    return target
+
+
+class Snapshot:
+    """Read-only relation rows for SEC registrants, memory-mapped from a snapshot file.
+
+    Companies are found by binary search over the CIK column or the sorted
+    ticker index, and only the rows asked for are decoded, so opening a
+    snapshot costs no parsing and its pages are shared between processes.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._layout()
+        except (ValueError, struct.error):
+            self._mm.close()
+            raise ValueError(f"{self.path} is not a version {_VERSION} relation snapshot")
+
+    def _layout(self) -> None:
+        magic, version, self.built_at, self.prompts, strings, self._count, self._tickers = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError
+        self.rows = dict(zip(RELATIONS, _COUNTS.unpack_from(self._mm, _HEADER.size)))
+        pos = _HEADER.size + _COUNTS.size
+        self._strings, pos = pos, pos + 4 * (strings + 1)
+        self._ciks, pos = pos, pos + 4 * self._count
+        self._names, pos = pos, pos + 4 * self._count
+        self._primary, pos = pos, pos + 4 * self._count
+        # relation -> (first row column, row count column, {field: column})
+        self._relations: Dict[str, Tuple[int, int, Dict[str, int]]] = {}
+        for relation, rows in self.rows.items():
+            first, count, pos = pos, pos + 4 * self._count, pos + 8 * self._count
+            columns = {}
+            for key in SCHEMAS[relation]:
+                columns[key], pos = pos, pos + 4 * rows
+            self._relations[relation] = (first, count, columns)
+        self._index_tickers, pos = pos, pos + 4 * self._tickers
+        self._index_companies, pos = pos, pos + 4 * self._tickers
+        self._pool = pos
+        if self._pool + self._u32(self._strings, strings) != len(self._mm):
+            raise ValueError
+
+    def _u32(self, column: int, i: int) -> int:
+        return _U32.unpack_from(self._mm, column + 4 * i)[0]
+
+    def _bytes(self, string_id: int) -> bytes:
+        start, end = struct.unpack_from("<II", self._mm, self._strings + 4 * string_id)
+        return self._mm[self._pool + start:self._pool + end]
+
+    def _string(self, string_id: int) -> str:
+        return self._bytes(string_id).decode()
+
+    def _find_cik(self, cik: int) -> int:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._u32(self._ciks, mid) < cik:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self._count and self._u32(self._ciks, lo) == cik else -1
+
+    def _find_ticker(self, ticker: str) -> int:
+        key = ticker.strip().upper().encode()
+        lo, hi = 0, self._tickers
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._bytes(self._u32(self._index_tickers, mid)) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._tickers and self._bytes(self._u32(self._index_tickers, lo)) == key:
+            return self._u32(self._index_companies, lo)
+        return -1
+
+    def company(self, ticker: Optional[str] = None, cik: Optional[int] = None) -> Optional[Tuple[int, str, str]]:
+        """Return (CIK, name, primary ticker) for a ticker or CIK, or None if the snapshot lacks it."""
+        i = self._find_cik(cik) if cik is not None else self._find_ticker(ticker) if ticker else -1
+        if i < 0:
+            return None
+        return self._u32(self._ciks, i), self._string(self._u32(self._names, i)), self._string(self._u32(self._primary, i))
+
+    def get(self, relation: str, ticker: Optional[str] = None, cik: Optional[int] = None) -> Optional[List[Dict]]:
+        """Return a company's stored rows for ``relation``, or None if it has to be looked up live."""
+        if relation not in self._relations:
+            return None
+        i = self._find_cik(cik) if cik is not None else self._find_ticker(ticker) if ticker else -1
+        if i < 0:
+            return None
+        first_column, count_column, columns = self._relations[relation]
+        first = self._u32(first_column, i)
+        if first == _ABSENT:
+            return None
+        rows = []
+        for row in range(first, first + self._u32(count_column, i)):
+            rows.append({
+                key: _I32.unpack_from(self._mm, column + 4 * row)[0] if SCHEMAS[relation][key] is int
+                else self._string(self._u32(column, row))
+                for key, column in columns.items()
+            })
+        return rows
+
+    @property
+    def age(self) -> float:
+        """Seconds since the oldest result in the snapshot was looked up."""
+        return max(0.0, time.time() - self.built_at)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+def _snapshot() -> Optional[Snapshot]:
+    """Open the shared relation snapshot on first use.
+
+    COMPANY_SNAPSHOT_PATH locates it (an empty value disables it) and
+    COMPANY_SNAPSHOT_MAX_AGE_DAYS, if set, stops serving it once it is
+    older.  A missing or unreadable file, or one built from other prompts,
+    leaves every lookup live.
+    """
+    global _shared, _shared_configured, _max_age
+    if not _shared_configured:
+        load_env()
+        path = os.getenv("COMPANY_SNAPSHOT_PATH", str(DEFAULT_SNAPSHOT_PATH)).strip()
+        _max_age = float(os.getenv("COMPANY_SNAPSHOT_MAX_AGE_DAYS", "0") or 0) * DAY
+        _shared = None
+        if path:
+            try:
+                snapshot = Snapshot(Path(path))
+            except (OSError, ValueError):
+                snapshot = None
+            if snapshot is not None and snapshot.prompts == _prompts_digest():
+                _shared = snapshot
+        _shared_configured = True
+    return _shared
+
+
+def set_snapshot(snapshot: Optional[Snapshot]) -> None:
+    """Replace the shared relation snapshot; ``None`` sends every lookup live."""
+    global _shared, _shared_configured
+    _shared = snapshot
+    _shared_configured = True
+
+
+def snapshot_age() -> Optional[float]:
+    """Seconds since the shared snapshot's results were looked up, or None if there is no snapshot."""
+    snapshot = _snapshot()
+    return snapshot.age if snapshot is not None else None
+
+
+def _snapshot_rows(relation: str, company_ticker: Optional[str]) -> Optional[List[Dict]]:
+    """A canonical company's rows from the shared snapshot, or None to look them up live."""
+    if not company_ticker or _building.get():
+        return None
+    snapshot = _snapshot()
+    if snapshot is None:
+        return None
+    if _max_age and snapshot.age > _max_age:
+        get_metrics().incr("snapshot_total", relation=relation, result="stale")
+        return None
+    rows = snapshot.get(relation, company_ticker)
+    get_metrics().incr("snapshot_total", relation=relation, result="hits" if rows is not None else "misses")
+    return rows
+
+
+def _universe(tickers: Optional[Iterable[str]] = None) -> Dict[int, Tuple[str, List[str]]]:
+    """SEC registrants by CIK: canonical name and tickers, primary listing first."""
+    from .resolver import _get_resolver
+    listings: Dict[int, List[Tuple[int, str]]] = {}
+    for ticker, cik, _, rank in _ticker_index().entries():
+        listings.setdefault(cik, []).append((rank, ticker))
+    wanted = {t.strip().upper() for t in tickers} if tickers is not None else None
+    companies = {}
+    for cik, company in _get_resolver()._companies.items():
+        symbols = [company.ticker] + [t for _, t in sorted(listings.get(cik, ())) if t != company.ticker]
+        if wanted is None or wanted & set(symbols):
+            companies[cik] = (company.name, symbols)
+    return companies
+
+
+def _read_checkpoint(path: Path) -> Dict[Tuple[str, int], Tuple[List[Dict], float]]:
+    """Successful lookups in ``path`` as (relation, CIK) -> (rows, time); a torn final line is truncated away."""
+    done: Dict[Tuple[str, int], Tuple[List[Dict], float]] = {}
+    if not path.exists():
+        return done
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+    for line in data[:end].splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict) and isinstance(record.get("rows"), list):
+            done[(record.get("relation"), record.get("cik"))] = (record["rows"], record.get("at", 0.0))
+    return done
+
+
+class _Checkpoint:
+    """Append each finished lookup to the checkpoint as soon as it completes.
+
+    Has the writer interface cli._run_threads expects, with (relation, CIK)
+    in place of the row number.
+    """
+
+    def __init__(self, out, done: Dict[Tuple[str, int], Tuple[List[Dict], float]], total: int, progress: float):
+        self.out = out
+        self.done = done
+        self.total = total
+        self.progress = progress
+        self.ok = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    def write(self, key: Tuple[str, int], record: Any, result: Any = None, error: Optional[BaseException] = None) -> None:
+        relation, cik = key
+        entry: Dict[str, Any] = {"relation": relation, "cik": cik, "at": time.time()}
+        if error is not None:
+            entry["error"] = f"{type(error).__name__}: {error}"
+            self.errors += 1
+        else:
+            entry["rows"] = result
+            self.done[key] = (result, entry["at"])
+            self.ok += 1
+        self.out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.out.flush()
+        now = time.perf_counter()
+        if self.progress and now - self._last_report >= self.progress:
+            self._last_report = now
+            print(f"{self.ok + self.errors}/{self.total} lookups, {self.errors} errors", file=sys.stderr)
+
+
+def _lookup(relation: str, company_name: str, company_ticker: str) -> List[Dict]:
+    from .company import _get_competitors, _get_subsidiaries
+    func = _get_competitors if relation == "competitors" else _get_subsidiaries
+    return func(company_name=company_name, company_ticker=company_ticker)
+
+
+def build_snapshot(
+    target: Path = DEFAULT_SNAPSHOT_PATH,
+    relations: Iterable[str] = tuple(RELATIONS),
+    tickers: Optional[Iterable[str]] = None,
+    workers: int = DEFAULT_WORKERS,
+    checkpoint: Optional[Path] = None,
+    progress: float = 10.0,
+) -> Path:
+    """Look up ``relations`` for every SEC registrant (or just ``tickers``) and write a snapshot to ``target``.
+
+    Each finished lookup is appended to ``checkpoint`` (``target`` plus
+    ".jsonl" by default), so an interrupted build resumes where it
+    stopped; delete it to look everything up again.  Lookups run at BATCH
+    priority with at most ``workers`` in flight, paced by the shared
+    scheduler's rate limits.  Companies whose lookup failed are left out
+    and stay live until a later build succeeds.
+    """
+    from .cli import _run_threads
+    from .scheduler import BATCH, request_priority
+
+    target = Path(target)
+    checkpoint = Path(checkpoint) if checkpoint is not None else target.with_name(target.name + ".jsonl")
+    checkpoint.parent.mkdir(parents=True, exist_ok=True)
+    relations = [relation for relation in RELATIONS if relation in set(relations)]
+    companies = _universe(tickers)
+    done = _read_checkpoint(checkpoint)
+    todo = [(relation, cik) for relation in relations for cik in sorted(companies) if (relation, cik) not in done]
+
+    jobs = (
+        ((relation, cik), None, {"relation": relation, "company_name": companies[cik][0], "company_ticker": companies[cik][1][0]})
+        for relation, cik in todo
+    )
+    token = _building.set(True)
+    try:
+        with open(checkpoint, "a", encoding="utf-8") as out, request_priority(BATCH):
+            writer = _Checkpoint(out, done, len(todo), progress)
+            _run_threads(_lookup, jobs, max(1, workers), writer)
+    finally:
+        _building.reset(token)
+
+    results = {key: rows for key, (rows, _) in done.items() if key[0] in relations and key[1] in companies}
+    built_at = min((at for key, (_, at) in done.items() if key in results), default=None)
+    return write_snapshot(target, companies, results, built_at)
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m company.snapshot", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="look up every SEC registrant and write the snapshot")
+    build.add_argument("-o", "--output", help="snapshot file (default COMPANY_SNAPSHOT_PATH)")
+    build.add_argument("--relation", action="append", choices=list(RELATIONS), help="relation to build (default all)")
+    build.add_argument("--tickers", help="file with one ticker per line to build instead of every registrant")
+    build.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="concurrent lookups")
+    build.add_argument("--fresh", action="store_true", help="discard the checkpoint and look everything up again")
+    build.add_argument("--progress", type=float, default=10.0, help="seconds between progress lines (0 disables)")
+    info = commands.add_parser("info", help="describe a snapshot")
+    info.add_argument("path", nargs="?", help="snapshot file (default COMPANY_SNAPSHOT_PATH)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parser().parse_args(argv)
+    load_env()
+    default = os.getenv("COMPANY_SNAPSHOT_PATH", "").strip() or str(DEFAULT_SNAPSHOT_PATH)
+    if args.command == "info":
+        try:
+            snapshot = Snapshot(Path(args.path or default))
+        except (OSError, ValueError) as e:
+            print(f"company: {e}", file=sys.stderr)
+            return 1
+        built = time.strftime("%Y-%m-%d %H:%M", time.localtime(snapshot.built_at))
+        print(f"{snapshot.path}: {len(snapshot)} companies, built {built} ({snapshot.age / DAY:.1f} days ago)")
+        for relation, rows in snapshot.rows.items():
+            print(f"  {relation}: {rows} rows")
+        if snapshot.prompts != _prompts_digest():
+            print("  built from other prompts; lookups will not use it", file=sys.stderr)
+        return 0
+
+    target = Path(args.output or default)
+    checkpoint = target.with_name(target.name + ".jsonl")
+    if args.fresh and checkpoint.exists():
+        checkpoint.unlink()
+    tickers = None
+    if args.tickers:
+        with open(args.tickers, "r", encoding="utf-8") as f:
+            tickers = [line.strip() for line in f if line.strip()]
+    start = time.perf_counter()
+    path = build_snapshot(target, args.relation or tuple(RELATIONS), tickers, args.workers, checkpoint, args.progress)
+    snapshot = Snapshot(path)
+    print(f"wrote {path}: {len(snapshot)} companies, "
+          + ", ".join(f"{rows} {relation} rows" for relation, rows in snapshot.rows.items())
+          + f" in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
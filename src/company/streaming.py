@@ -0,0 +1,68 @@
+from typing import Dict, List
+import json
+
+
+class JSONArrayParser:
+    """Incremental parser for a top-level JSON array of objects.
+
+    Text is fed in arbitrary chunks; each object is returned as soon as its
+    closing brace arrives.  Anything before the opening bracket (a code
+    fence, a preamble) is skipped and anything after the closing bracket is
+    ignored.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.complete = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._buf: List[str] = []
+
+    def feed(self, text: str) -> List[Dict]:
+        """Consume a chunk of text and return the objects it completed."""
+        objects = []
+        for ch in text:
+            if self.complete:
+                break
+            if not self.started:
+                if ch == "[":
+                    self.started = True
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._depth >= 2:
+                    self._buf.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = True
+                if self._depth >= 2:
+                    self._buf.append(ch)
+            elif ch in "{[":
+                if self._depth == 1:
+                    self._buf = []
+                self._depth += 1
+                self._buf.append(ch)
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth >= 1:
+                    self._buf.append(ch)
+                if self._depth == 1:
+                    try:
+                        value = json.loads("".join(self._buf))
+                    except json.JSONDecodeError:
+                        value = None
+                    if isinstance(value, dict):
+                        objects.append(value)
+                    self._buf = []
+                elif self._depth == 0:
+                    self.complete = True
+            elif self._depth >= 2:
+                self._buf.append(ch)
+        return objects
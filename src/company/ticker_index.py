@@ -0,0 +1,174 @@
+from typing import Dict, Iterator, Mapping, Optional, Tuple
+import json
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+
+
+SOURCE_FILE = Path(__file__).parent / "sec_company_tickers.json"
+INDEX_FILE = Path(__file__).parent / "sec_company_tickers.idx"
+
+# Layout: header, fixed-size entry table sorted by ticker, ticker pool, title
+# pool.  Offsets in the entry table are absolute file positions.
+_MAGIC = b"CTIX"
+_VERSION = 2
+_HEADER = struct.Struct("<4sII")       # magic, version, entry count
+_ENTRY = struct.Struct("<IIIIII")      # ticker off, ticker len, title off, title len, cik, rank
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def build_index(source: Path = SOURCE_FILE, target: Path = INDEX_FILE) -> Path:
+    """Compile the SEC ticker JSON into the binary index read by TickerIndex."""
+    with open(source, 'r') as f:
+        data = json.load(f)
+
+    # rank is the position in the SEC file, which lists primary listings first.
+    entries: Dict[str, Tuple[str, int, int]] = {}
+    for rank, entry in enumerate(data.values()):
+        ticker = entry.get('ticker', '').upper()
+        title = entry.get('title', '')
+        if ticker and title:
+            entries[ticker] = (title, int(entry.get('cik_str') or 0), rank)
+
+    tickers = sorted(entries, key=lambda t: t.encode())
+    ticker_pool = bytearray()
+    title_pool = bytearray()
+    title_offsets: Dict[str, int] = {}
+    rows = []
+    for ticker in tickers:
+        title, cik, rank = entries[ticker]
+        key = ticker.encode()
+        raw = title.encode()
+        if title not in title_offsets:
+            title_offsets[title] = len(title_pool)
+            title_pool += raw
+        rows.append((len(ticker_pool), len(key), title_offsets[title], len(raw), cik, rank))
+        ticker_pool += key
+
+    ticker_base = _HEADER.size + _ENTRY.size * len(rows)
+    title_base = ticker_base + len(ticker_pool)
+    tmp = target.with_name(target.name + ".%d.tmp" % os.getpid())
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(rows)))
+        for key_off, key_len, title_off, title_len, cik, rank in rows:
+            f.write(_ENTRY.pack(ticker_base + key_off, key_len, title_base + title_off, title_len, cik, rank))
+        f.write(ticker_pool)
+        f.write(title_pool)
+    os.replace(tmp, target)
+    return target
+
+
+class TickerIndex(Mapping[str, str]):
+    """Read-only ticker -> SEC title mapping backed by a memory-mapped index.
+
+    Lookups binary-search the sorted entry table in place, so opening the
+    index costs no parsing and the pages are shared between processes.
+    """
+
+    def __init__(self, path: Path = INDEX_FILE):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._count = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a version {_VERSION} ticker index")
+
+    def _entry(self, i: int) -> Tuple[int, int, int, int, int, int]:
+        return _ENTRY.unpack_from(self._mm, _HEADER.size + i * _ENTRY.size)
+
+    def _ticker(self, i: int) -> bytes:
+        off, length = self._entry(i)[:2]
+        return self._mm[off:off + length]
+
+    def _find(self, ticker: str) -> int:
+        key = ticker.upper().encode()
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ticker(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count and self._ticker(lo) == key:
+            return lo
+        return -1
+
+    def lookup(self, ticker: str) -> Optional[Tuple[int, str]]:
+        """Return (CIK, title) for a ticker, or None if it is not listed."""
+        if not isinstance(ticker, str):
+            return None
+        i = self._find(ticker)
+        if i < 0:
+            return None
+        _, _, off, length, cik, _ = self._entry(i)
+        return cik, self._mm[off:off + length].decode()
+
+    def entries(self) -> Iterator[Tuple[str, int, str, int]]:
+        """Yield (ticker, CIK, title, rank) for every listing in ticker order."""
+        for i in range(self._count):
+            key_off, key_len, off, length, cik, rank = self._entry(i)
+            yield (
+                self._mm[key_off:key_off + key_len].decode(), cik, self._mm[off:off + length].decode(), rank
+            )
+
+    def __getitem__(self, ticker: str) -> str:
+        found = self.lookup(ticker)
+        if found is None:
+            raise KeyError(ticker)
+        return found[1]
+
+    def __contains__(self, ticker: object) -> bool:
+        return isinstance(ticker, str) and self._find(ticker) >= 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._count):
+            yield self._ticker(i).decode()
+
+
+def _is_current(path: Path, source_mtime: float) -> bool:
+    """Check that an index file exists, is newer than the JSON and has the current layout."""
+    try:
+        if path.stat().st_mtime < source_mtime:
+            return False
+        with open(path, 'rb') as f:
+            magic, version, _ = _HEADER.unpack(f.read(_HEADER.size))
+    except (OSError, struct.error):
+        return False
+    return magic == _MAGIC and version == _VERSION
+
+
+def _index_path() -> Path:
+    """Return an up-to-date index file, building it beside the JSON or in the temp dir."""
+    import tempfile
+    source_mtime = SOURCE_FILE.stat().st_mtime
+    candidates = [INDEX_FILE, Path(tempfile.gettempdir()) / "company_sec_tickers.idx"]
+    for path in candidates:
+        if _is_current(path, source_mtime):
+            return path
+    for path in candidates:
+        try:
+            return build_index(SOURCE_FILE, path)
+        except OSError:
+            continue
+    raise OSError("could not write a ticker index")
+
+
+def _ticker_index() -> TickerIndex:
+    """Open the shared ticker index on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = TickerIndex(_index_path())
+    return _index
+
+
+if __name__ == "__main__":
+    print(build_index())
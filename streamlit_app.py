@@ -1,3 +1,4 @@
+import asyncio
 import os
 import sys
 from pathlib import Path
@@ -5,34 +6,90 @@ import streamlit as st
 
 # Ensure src is on path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
-from company import _get_company, _get_competitors, _get_subsidiaries
-
-
-def infer_intent(prompt: str) -> str:
-    """Infer whether the user asks for competitors or subsidiaries based on the prompt.
-    Returns one of: "competitors", "subsidiaries", or "unknown".
-    """
-    text = (prompt or "").lower()
-
-    competitors_kw = [
-        "competitor", "competitors", "rival", "rivals", "compete",
-        "vs", "versus", "against", "peer", "peers", "market share",
-    ]
-    subsidiaries_kw = [
-        "subsidiary", "subsidiaries", "child company", "child companies",
-        "division", "divisions", "business unit", "business units",
-        "owned subsidiary", "wholly owned", "acquired unit",
-    ]
-
-    comp_hit = any(k in text for k in competitors_kw)
-    subs_hit = any(k in text for k in subsidiaries_kw)
-
-    if comp_hit and not subs_hit:
-        return "competitors"
-    if subs_hit and not comp_hit:
-        return "subsidiaries"
-    # If ambiguous or no keywords, default to competitors for now
-    return "competitors" if comp_hit or not subs_hit else "unknown"
+from company import (
+    _astream_competitors, _astream_subsidiaries, analyze, collect, fan_out, load_env, snapshot_age, summarize,
+)
+
+load_env()
+
+# Maximum number of per-company lookups in flight at once
+MAX_CONCURRENCY = int(os.getenv("COMPANY_MAX_CONCURRENCY", "4"))
+
+
+RELATION_VIEWS = {
+    "competitors": (
+        "Step 2: Competitors", _astream_competitors, "Finding competitors for {}...", "No competitors found.",
+        ["rank", "company_name", "ticker", "reason"],
+    ),
+    "subsidiaries": (
+        "Step 2: Subsidiaries", _astream_subsidiaries, "Fetching subsidiaries for {}...", "No subsidiaries found.",
+        ["company_name", "ticker", "details"],
+    ),
+}
+
+
+def render_relations(analysis):
+    """Show every company's rows from a combined answer at once."""
+    title, _, _, empty_message, fields = RELATION_VIEWS[analysis.intent]
+    st.subheader(title)
+    for company in analysis.companies:
+        st.markdown(f"### {company}")
+        rows = analysis.relations.get(company) or []
+        for row in rows:
+            st.write({field: row.get(field) for field in fields})
+        if not rows:
+            st.write(empty_message)
+
+
+async def stream_relations(analysis):
+    """Stream every company's rows concurrently, drawing each row as soon as it is parsed."""
+    title, stream, pending_message, empty_message, fields = RELATION_VIEWS[analysis.intent]
+    st.subheader(title)
+    sections = []
+    for company in analysis.companies:
+        section = st.container()
+        section.markdown(f"### {company}")
+        sections.append((section, section.info(pending_message.format(company))))
+
+    async def fill(item):
+        i, company = item
+        section, pending = sections[i]
+        rows = 0
+        async for row in stream(company_name=company):
+            if not rows:
+                pending.empty()
+            section.write({field: row.get(field) for field in fields})
+            rows += 1
+        pending.empty()
+        if not rows:
+            section.write(empty_message)
+
+    async for (i, company), error in fan_out(
+        fill,
+        list(enumerate(analysis.companies)),
+        concurrency=MAX_CONCURRENCY,
+        return_exceptions=True,
+    ):
+        if isinstance(error, Exception):
+            section, pending = sections[i]
+            pending.empty()
+            section.error(f"Lookup failed for {company}: {error}")
+
+
+def render_debug(events):
+    """Show per-stage timings, token usage and cache outcomes recorded during this request."""
+    rows = summarize(events)
+    usage = [row for row in rows if row["stage"] == "usage"]
+    with st.expander("Debug metrics", expanded=True):
+        llm_seconds = sum(row["seconds"] for row in rows if row["stage"] == "llm")
+        tokens = sum(row["prompt_tokens"] + row["completion_tokens"] for row in usage)
+        cost = sum(row["cost_usd"] for row in usage)
+        left, middle, right = st.columns(3)
+        left.metric("LLM time", f"{llm_seconds:.2f} s")
+        middle.metric("Tokens", f"{tokens:,}")
+        right.metric("Estimated cost", f"${cost:.4f}")
+        st.dataframe(rows, use_container_width=True)
+
 
 st.set_page_config(page_title="Company Analyzer", page_icon="📈", layout="centered")
 
@@ -46,6 +103,11 @@ with st.expander("Environment Status", expanded=not api_key_present):
         st.success("OPENAI_API_KEY is configured via .env")
     else:
         st.error("OPENAI_API_KEY is not set. Add it to .env and restart.")
+    age = snapshot_age()
+    if age is None:
+        st.info("No relationship snapshot; every lookup calls the model.")
+    else:
+        st.success(f"Relationship snapshot built {age / 86400:.1f} days ago")
 
 prompt = st.text_area(
     "Enter your prompt",
@@ -54,54 +116,26 @@ prompt = st.text_area(
 )
 
 run = st.button("Analyze", type="primary")
+debug = st.sidebar.checkbox("Show debug metrics", value=os.getenv("COMPANY_DEBUG") == "1")
 
 if run:
     if not prompt.strip():
         st.warning("Please enter a prompt.")
         st.stop()
 
-    st.subheader("Step 1: Extracting company names")
-    with st.spinner("Extracting companies..."):
-        companies = _get_company(prompt)
-    st.write({"Extracted companies": companies})
+    with collect() as events:
+        st.subheader("Step 1: Extracting company names")
+        with st.spinner("Analyzing companies..."):
+            # Staged lookups are left to stream_relations so rows appear as they arrive.
+            analysis = analyze(prompt, lookups=False)
+        st.write({"Extracted companies": analysis.companies})
 
-    if not companies:
-        st.info("No companies extracted from the prompt.")
-        st.stop()
+        if not analysis.companies:
+            st.info("No companies extracted from the prompt.")
+        elif analysis.fused:
+            render_relations(analysis)
+        else:
+            asyncio.run(stream_relations(analysis))
 
-    action = infer_intent(prompt)
-    if action == "competitors":
-        st.subheader("Step 2: Competitors")
-        for company in companies:
-            st.markdown(f"### {company}")
-            with st.spinner(f"Finding competitors for {company}..."):
-                competitors = _get_competitors(company_name=company)
-            if not competitors:
-                st.write("No competitors found.")
-                continue
-            for c in competitors:
-                st.write(
-                    {
-                        "rank": c.get("rank"),
-                        "company_name": c.get("company_name"),
-                        "ticker": c.get("ticker"),
-                        "reason": c.get("reason"),
-                    }
-                )
-    elif action == "subsidiaries":
-        st.subheader("Step 2: Subsidiaries")
-        for company in companies:
-            st.markdown(f"### {company}")
-            with st.spinner(f"Fetching subsidiaries for {company}..."):
-                subsidiaries = _get_subsidiaries(company_name=company)
-            if not subsidiaries:
-                st.write("No subsidiaries found.")
-                continue
-            for s in subsidiaries:
-                st.write(
-                    {
-                        "company_name": s.get("company_name"),
-                        "ticker": s.get("ticker"),
-                        "details": s.get("details"),
-                    }
-                )
+    if debug:
+        render_debug(events)
@@ -0,0 +1,104 @@
+import unittest
+import asyncio
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+from fake_openai import FakeOpenAI, synthetic_reply
+from company import (
+    Engine, Metrics, ResultCache, aanalyze, analyze, infer_intent, set_engine, set_metrics, set_neardup_cache,
+    set_result_cache, _get_competitors,
+)
+
+
+PROMPT = "keep me posted on Initech and Globex Dynamics and their rivals"
+
+
+class FusedOutage(Engine):
+    """An engine whose combined calls fail, as during an API outage or rate limiting."""
+
+    def run(self, name, max_tokens=None, **variables):
+        if name.startswith("analyze_"):
+            raise RuntimeError("rate limited")
+        return super().run(name, max_tokens, **variables)
+
+    async def arun(self, name, max_tokens=None, **variables):
+        if name.startswith("analyze_"):
+            raise RuntimeError("rate limited")
+        return await super().arun(name, max_tokens, **variables)
+
+
+class TestInferIntent(unittest.TestCase):
+
+    def test_whole_words_only(self):
+        self.assertEqual(infer_intent("Show the subsidiaries of Acme"), "subsidiaries")
+        self.assertEqual(infer_intent("Acme business  units on canvas"), "subsidiaries")
+        self.assertEqual(infer_intent("Acme vs Initech"), "competitors")
+        self.assertEqual(infer_intent("Acme subsidiaries and rivals"), "competitors")
+        self.assertEqual(infer_intent("news about Acme"), "competitors")
+
+
+class TestAnalyze(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeOpenAI().start()
+        self.metrics = Metrics()
+        set_metrics(self.metrics)
+        set_engine(Engine(api_key="fake", base_url=self.server.base_url))
+        set_result_cache(None)
+        set_neardup_cache(None)
+
+    def tearDown(self):
+        self.server.stop()
+        set_engine(None)
+        set_metrics(None)
+        set_result_cache(None)
+
+    def test_one_request_answers_everything(self):
+        analysis = analyze(PROMPT)
+        self.assertTrue(analysis.fused)
+        self.assertEqual(analysis.intent, "competitors")
+        self.assertEqual(sorted(analysis.companies), ["Globex Dynamics", "Initech"])
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(analysis.relations["Initech"][0]["rank"], 1)
+        self.assertEqual(self.metrics.counter("analyze_total", intent="competitors", path="fused"), 1)
+        self.assertEqual(asyncio.run(aanalyze(PROMPT)).companies, analysis.companies)
+
+    def test_invalid_replies_fall_back_to_the_staged_path(self):
+        def responder(request):
+            prompt = str(request["messages"])
+            return "not json" if "**Text:**" in prompt else synthetic_reply(request)
+
+        self.server.responder = responder
+        analysis = analyze("Initech subsidiaries please")
+        self.assertFalse(analysis.fused)
+        self.assertEqual(analysis.intent, "subsidiaries")
+        self.assertIn("Initech", analysis.companies)
+        self.assertEqual(set(analysis.relations), set(analysis.companies))
+        self.assertEqual(self.metrics.counter("analyze_total", intent="subsidiaries", path="fused_invalid"), 1)
+        self.assertEqual(self.metrics.counter("analyze_total", intent="subsidiaries", path="staged"), 1)
+
+    def test_failed_calls_fall_back_to_the_staged_path(self):
+        set_engine(FusedOutage(api_key="fake", base_url=self.server.base_url))
+        for analysis in (analyze(PROMPT), asyncio.run(aanalyze(PROMPT))):
+            self.assertFalse(analysis.fused)
+            self.assertEqual(sorted(analysis.relations), ["Globex Dynamics", "Initech"])
+        self.assertEqual(self.metrics.counter("analyze_total", intent="competitors", path="fused_failed"), 2)
+
+    def test_lookups_can_be_left_to_the_caller(self):
+        set_engine(FusedOutage(api_key="fake", base_url=self.server.base_url))
+        analysis = analyze(PROMPT, lookups=False)
+        self.assertEqual(sorted(analysis.companies), ["Globex Dynamics", "Initech"])
+        self.assertEqual(analysis.relations, {})
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_fused_rows_fill_the_result_cache(self):
+        set_result_cache(ResultCache())
+        analysis = analyze(PROMPT)
+        requests = len(self.server.requests)
+        self.assertEqual(_get_competitors(company_name="Initech"), analysis.relations["Initech"])
+        self.assertEqual(len(self.server.requests), requests)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+import json
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from company import ResultCache, set_cascade, set_engine, set_result_cache
+from company.batch import get_competitors_many, get_subsidiaries_many
+
+
+class FakeEngine:
+    """Answers batched prompts from canned replies and records every call."""
+
+    def __init__(self, batch_replies, single_reply="[]"):
+        self.batch_replies = list(batch_replies)
+        self.single_reply = single_reply
+        self.calls = []
+
+    def run(self, name, max_tokens=None, **variables):
+        self.calls.append((name, variables))
+        if name.endswith("_batch"):
+            reply = self.batch_replies.pop(0)
+            if isinstance(reply, Exception):
+                raise reply
+            return reply
+        return self.single_reply
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        set_result_cache(None)
+        set_cascade(False)
+
+    def tearDown(self):
+        set_engine(None)
+        set_result_cache(None)
+        set_cascade(None)
+
+    def test_splits_reply_per_company(self):
+        engine = FakeEngine([json.dumps({
+            "Apple": [{"rank": 1, "company_name": "Samsung", "ticker": "005930.KS", "reason": "Phones"}],
+            "Microsoft (MSFT)": [],
+        })])
+        set_engine(engine)
+        result = get_competitors_many(["Apple", ("Microsoft", "MSFT")])
+        self.assertEqual(result["Apple"][0]["company_name"], "Samsung")
+        self.assertEqual(result[("Microsoft", "MSFT")], [])
+        self.assertEqual([name for name, _ in engine.calls], ["competitors_batch"])
+
+    def test_missing_company_is_retried_alone(self):
+        engine = FakeEngine(
+            [json.dumps({"apple": []})],
+            single_reply='[{"company_name": "Beats", "ticker": "N/A", "details": "Audio"}]',
+        )
+        set_engine(engine)
+        result = get_subsidiaries_many(["Apple", "Alphabet"])
+        self.assertEqual(result["Apple"], [])
+        self.assertEqual(result["Alphabet"][0]["company_name"], "Beats")
+        self.assertEqual([name for name, _ in engine.calls], ["subsidiaries_batch", "subsidiaries"])
+        self.assertEqual(engine.calls[1][1]["company_name"], "Alphabet")
+
+    def test_unparseable_reply_falls_back_to_single_calls(self):
+        engine = FakeEngine(['{"Apple": [{"rank": 1'])
+        set_engine(engine)
+        result = get_competitors_many(["Apple"])
+        self.assertEqual(result, {"Apple": []})
+        self.assertEqual([name for name, _ in engine.calls], ["competitors_batch", "competitors"])
+
+    def test_garbled_entries_are_retried_alone_and_not_cached(self):
+        set_result_cache(ResultCache())
+        engine = FakeEngine(
+            [json.dumps({"Apple": [{"rank": "first"}], "Alphabet": [
+                {"rank": 1, "company_name": "Microsoft", "ticker": "MSFT", "reason": "Search"},
+            ]})],
+            single_reply='[{"rank": 1, "company_name": "Samsung", "ticker": "005930.KS", "reason": "Phones"}]',
+        )
+        set_engine(engine)
+        result = get_competitors_many(["Apple", "Alphabet"])
+        self.assertEqual(result["Apple"][0]["company_name"], "Samsung")
+        self.assertEqual(result["Alphabet"][0]["company_name"], "Microsoft")
+        self.assertEqual([name for name, _ in engine.calls], ["competitors_batch", "competitors"])
+        self.assertEqual(get_competitors_many(["Apple"])["Apple"][0]["company_name"], "Samsung")
+        self.assertEqual(len(engine.calls), 2)
+
+    def test_failed_batch_calls_fall_back_to_single_calls(self):
+        engine = FakeEngine(
+            [json.dumps({"A0": []}), RuntimeError("rate limited")],
+            single_reply='[{"company_name": "Beats", "ticker": "N/A", "details": "Audio"}]',
+        )
+        set_engine(engine)
+        result = get_subsidiaries_many(["A0", "A1", "A2"], max_batch_size=1)
+        self.assertEqual(result["A0"], [])
+        self.assertEqual(result["A1"][0]["company_name"], "Beats")
+        self.assertEqual([name for name, _ in engine.calls], [
+            "subsidiaries_batch", "subsidiaries_batch", "subsidiaries_batch", "subsidiaries", "subsidiaries",
+        ])
+
+    def test_batch_size_respects_limits(self):
+        engine = FakeEngine([json.dumps({}) for _ in range(3)])
+        set_engine(engine)
+        get_competitors_many(["A%d" % i for i in range(5)], max_batch_size=2)
+        batch_sizes = [len(v["companies"]) for name, v in engine.calls if name == "competitors_batch"]
+        self.assertEqual(batch_sizes, [2, 2, 1])
+
+        engine = FakeEngine([json.dumps({}) for _ in range(5)])
+        set_engine(engine)
+        get_subsidiaries_many(["A%d" % i for i in range(5)], token_budget=1400)
+        batch_sizes = [len(v["companies"]) for name, v in engine.calls if name == "subsidiaries_batch"]
+        self.assertEqual(batch_sizes, [2, 2, 1])
+
+    def test_empty_input(self):
+        self.assertEqual(get_competitors_many([]), {})
+        self.assertEqual(get_competitors_many(["", (None, None)]), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from company.cache import ResultCache, SQLiteBackend
+from company.scheduler import BATCH, _priority, request_priority
+
+
+class Counter:
+
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+class TestResultCache(unittest.TestCase):
+
+    def test_hit_after_miss(self):
+        cache = ResultCache()
+        compute = Counter([{"company_name": "Microsoft"}])
+        first = cache.get_or_compute("competitors", ("tpl", "model", "Apple", None), compute)
+        second = cache.get_or_compute("competitors", ("tpl", "model", "Apple", None), compute)
+        self.assertEqual(first, second)
+        self.assertEqual(compute.calls, 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_key_includes_template_and_model(self):
+        cache = ResultCache()
+        compute = Counter([])
+        cache.get_or_compute("competitors", ("tpl", "model-a", "Apple", None), compute)
+        cache.get_or_compute("competitors", ("tpl", "model-b", "Apple", None), compute)
+        cache.get_or_compute("competitors", ("tpl2", "model-a", "Apple", None), compute)
+        self.assertEqual(compute.calls, 3)
+
+    def test_returned_values_are_copies(self):
+        cache = ResultCache()
+        value = cache.get_or_compute("competitors", ("Apple",), Counter([{"rank": 1}]))
+        value.append({"rank": 2})
+        self.assertEqual(cache.get_or_compute("competitors", ("Apple",), Counter(None)), [{"rank": 1}])
+
+    def test_lru_eviction(self):
+        cache = ResultCache(max_entries=2)
+        for name in ("a", "b", "c"):
+            cache.get_or_compute("competitors", (name,), Counter([name]))
+        compute = Counter(["a"])
+        cache.get_or_compute("competitors", ("a",), compute)
+        self.assertEqual(compute.calls, 1)
+
+    def test_expired_entry_is_recomputed(self):
+        cache = ResultCache(ttls={"competitors": 0}, stale_ttl=0)
+        cache.get_or_compute("competitors", ("Apple",), Counter(["old"]))
+        time.sleep(0.01)
+        self.assertEqual(cache.get_or_compute("competitors", ("Apple",), Counter(["new"])), ["new"])
+
+    def test_stale_entry_is_served_while_revalidating(self):
+        cache = ResultCache(ttls={"competitors": 0}, stale_ttl=60)
+        cache.get_or_compute("competitors", ("Apple",), Counter(["old"]))
+        time.sleep(0.01)
+        self.assertEqual(cache.get_or_compute("competitors", ("Apple",), Counter(["new"])), ["old"])
+        for _ in range(100):
+            if cache.stats()["refreshes"] and not cache._refreshing:
+                break
+            time.sleep(0.01)
+        cache.ttls["competitors"] = 60
+        self.assertEqual(cache.get_or_compute("competitors", ("Apple",), Counter(None)), ["new"])
+        self.assertEqual(cache.stats()["stale_hits"], 1)
+
+    def test_refreshes_keep_the_callers_context(self):
+        cache = ResultCache(ttls={"competitors": 0}, stale_ttl=60)
+        cache.get_or_compute("competitors", ("Apple",), Counter(["old"]))
+        time.sleep(0.01)
+        priorities = []
+        with request_priority(BATCH):
+            cache.get_or_compute("competitors", ("Apple",), lambda: priorities.append(_priority.get()) or ["new"])
+        for _ in range(100):
+            if priorities:
+                break
+            time.sleep(0.01)
+        self.assertEqual(priorities, [BATCH])
+
+    def test_sqlite_backend_persists(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "results.sqlite3"
+            ResultCache(SQLiteBackend(path)).get_or_compute("subsidiaries", ("Apple",), Counter(["Beats"]))
+            compute = Counter(None)
+            value = ResultCache(SQLiteBackend(path)).get_or_compute("subsidiaries", ("Apple",), compute)
+            self.assertEqual(value, ["Beats"])
+            self.assertEqual(compute.calls, 0)
+
+    def test_sqlite_backend_size_cap(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = SQLiteBackend(Path(tmp) / "results.sqlite3", max_entries=2)
+            for i, key in enumerate(("a", "b", "c")):
+                backend.set(key, "competitors", [key], float(i))
+            self.assertIsNone(backend.get("a"))
+            self.assertEqual(backend.get("c")[0], ["c"])
+
+
+    def test_sqlite_reads_touch_access_times_sparingly(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = SQLiteBackend(Path(tmp) / "results.sqlite3", touch_interval=60)
+            backend.set("a", "competitors", ["a"], 0.0)
+            accessed = lambda: backend._conn.execute("SELECT accessed FROM results").fetchone()[0]
+            written = accessed()
+            backend.get("a")
+            self.assertEqual(accessed(), written)
+            backend._conn.execute("UPDATE results SET accessed = ?", (written - 120,))
+            backend.get("a")
+            self.assertGreaterEqual(accessed(), written)
+
+
+if __name__ == '__main__':
+    unittest.main()
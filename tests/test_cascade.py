@@ -0,0 +1,147 @@
+import unittest
+import asyncio
+import json
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+from fake_openai import FakeOpenAI, synthetic_reply
+from company import (
+    Engine, MalformedReplyError, Metrics, check_reply, set_cascade, set_engine, set_metrics, set_result_cache,
+    _aget_subsidiaries, _get_company, _get_competitors, set_listing_index,
+)
+from company.listings import _listing_index
+
+
+ROWS = [
+    {"rank": 1, "company_name": "Rival One", "ticker": "ONE", "reason": "Same market."},
+    {"rank": 2, "company_name": "Rival Two", "ticker": "N/A", "reason": "Same customers."},
+]
+
+
+class TestCheckReply(unittest.TestCase):
+
+    def setUp(self):
+        # Parsing only: the made-up tickers would otherwise be checked against real listings.
+        self.previous = _listing_index()
+        set_listing_index(None)
+
+    def tearDown(self):
+        set_listing_index(self.previous)
+
+    def test_valid_and_json_mode_replies(self):
+        self.assertEqual(check_reply("competitors", json.dumps(ROWS)), (ROWS, True, False))
+        self.assertEqual(check_reply("competitors", json.dumps({"items": ROWS})), (ROWS, True, False))
+        self.assertEqual(check_reply("company", '{"items": ["Zeta", "Alpha", ""]}').items, ["Alpha", "Zeta"])
+
+    def test_code_fences_are_repaired(self):
+        checked = check_reply("competitors", "```json\n" + json.dumps(ROWS) + "\n```")
+        self.assertEqual(checked, (ROWS, True, True))
+
+    def test_missing_fields_are_filled_in_but_fail_validation(self):
+        reply = json.dumps([{"company_name": "Sub", "ticker": None}, {"rank": "2", "company_name": "Other"}])
+        subsidiaries = check_reply("subsidiaries", reply)
+        self.assertFalse(subsidiaries.ok)
+        self.assertEqual(subsidiaries.items[0], {"company_name": "Sub", "ticker": "N/A", "details": ""})
+        competitors = check_reply("competitors", reply)
+        self.assertFalse(competitors.ok)
+        self.assertEqual([row["rank"] for row in competitors.items], [1, 2])
+
+    def test_wrong_types_are_coerced(self):
+        rows = [dict(row, rank=str(row["rank"])) for row in ROWS]
+        self.assertEqual(check_reply("competitors", json.dumps(rows)), (ROWS, True, True))
+        blank = [dict(ROWS[0], reason=" ")]
+        self.assertFalse(check_reply("competitors", json.dumps(blank)).ok)
+
+    def test_truncated_reply_keeps_complete_rows_but_fails(self):
+        text = json.dumps(ROWS)
+        checked = check_reply("competitors", text[:text.rindex("{") + 20])
+        self.assertEqual(checked, (ROWS[:1], False, True))
+        checked = check_reply("company", '["Apple", "Micro')
+        self.assertEqual(checked, (["Apple"], False, True))
+
+    def test_rows_without_a_name_fail_validation(self):
+        checked = check_reply("competitors", json.dumps(ROWS + [{"rank": 3, "ticker": "X"}]))
+        self.assertEqual(checked.items, ROWS)
+        self.assertFalse(checked.ok)
+
+
+class TestCascade(unittest.TestCase):
+
+    def setUp(self):
+        self.broken = set()
+        self.server = FakeOpenAI(responder=self.respond).start()
+        self.metrics = Metrics()
+        set_metrics(self.metrics)
+        set_engine(Engine(api_key="fake", base_url=self.server.base_url))
+        set_result_cache(None)
+        set_cascade(True)
+
+    def tearDown(self):
+        self.server.stop()
+        set_engine(None)
+        set_metrics(None)
+        set_cascade(None)
+
+    def respond(self, request):
+        reply = synthetic_reply(request)
+        if request["model"] in self.broken:
+            return reply[:len(reply) // 2]
+        return reply
+
+    def models(self):
+        return [request["model"] for request in self.server.requests]
+
+    def test_fast_tier_answers_valid_replies(self):
+        competitors = _get_competitors(company_name="Cascade Target")
+        self.assertEqual(len(competitors), 5)
+        self.assertEqual(self.models(), ["gpt-4.1-nano"])
+        self.assertEqual(self.server.requests[0]["response_format"], {"type": "json_object"})
+        self.assertEqual(_get_company("Shares of Initech and Globex rallied"), ["Globex", "Initech", "Shares"])
+
+    def test_invalid_replies_escalate_to_the_strong_model(self):
+        self.broken.add("gpt-4.1-nano")
+        competitors = _get_competitors(company_name="Cascade Target")
+        self.assertEqual(len(competitors), 5)
+        self.assertEqual(self.models(), ["gpt-4.1-nano", "gpt-4.1-mini"])
+        self.assertEqual(
+            self.metrics.counter("cascade_total", relation="competitors", pipeline="competitors_fast", result="escalated"),
+            1,
+        )
+        subsidiaries = asyncio.run(_aget_subsidiaries(company_name="Cascade Parent"))
+        self.assertEqual(len(subsidiaries), 3)
+        self.assertEqual(self.models()[2:], ["gpt-4.1-nano", "gpt-3.5-turbo"])
+
+    def test_replies_without_reasons_escalate(self):
+        def respond(request):
+            reply = synthetic_reply(request)
+            if request["model"] != "gpt-4.1-nano":
+                return reply
+            rows = json.loads(reply)
+            rows = rows.get("items", rows) if isinstance(rows, dict) else rows
+            return json.dumps([{k: v for k, v in row.items() if k != "reason"} for row in rows])
+
+        self.server.responder = respond
+        competitors = _get_competitors(company_name="Cascade Target")
+        self.assertEqual(self.models(), ["gpt-4.1-nano", "gpt-4.1-mini"])
+        self.assertTrue(all(row["reason"] for row in competitors))
+
+    def test_strong_tier_salvages_or_raises(self):
+        self.broken.update(["gpt-4.1-nano", "gpt-4.1-mini"])
+        competitors = _get_competitors(company_name="Cascade Target")
+        self.assertTrue(0 < len(competitors) < 5)
+        self.assertEqual(
+            self.metrics.counter("cascade_total", relation="competitors", pipeline="competitors", result="salvaged"), 1
+        )
+        self.server.responder = lambda request: "I cannot help with that."
+        with self.assertRaises(MalformedReplyError):
+            _get_competitors(company_name="Refused Target")
+
+    def test_disabled_cascade_uses_the_strong_model(self):
+        set_cascade(False)
+        _get_competitors(company_name="Cascade Target")
+        self.assertEqual(self.models(), ["gpt-4.1-mini"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import contextlib
+import io
+import json
+import sys
+import tempfile
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+from fake_openai import FakeOpenAI
+from company import Engine, set_engine, set_result_cache
+from company.cli import main
+
+
+def run(*argv):
+    stderr = io.StringIO()
+    with contextlib.redirect_stderr(stderr):
+        status = main(list(argv) + ["--progress", "0"])
+    return status, stderr.getvalue()
+
+
+def records(path):
+    return [json.loads(line) for line in Path(path).read_text().splitlines()]
+
+
+class TestCLI(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.server = FakeOpenAI().start()
+        set_engine(Engine(api_key="fake", base_url=self.server.base_url))
+        set_result_cache(None)
+
+    def tearDown(self):
+        self.server.stop()
+        set_engine(None)
+        set_result_cache(None)
+        self.tmp.cleanup()
+
+    def test_extract_from_jsonl(self):
+        source = self.dir / "news.jsonl"
+        source.write_text('{"text": "news about NVIDIA and Microsoft"}\n\n{"headline": "no text field"}\nnot json\n')
+        output = self.dir / "out.jsonl"
+        status, summary = run("extract", str(source), "-o", str(output))
+
+        by_row = {r["row"]: r for r in records(output)}
+        self.assertEqual(by_row[0]["companies"], ["Microsoft", "NVIDIA"])
+        self.assertIn("missing 'text'", by_row[1]["error"])
+        self.assertIn("invalid JSON", by_row[2]["error"])
+        self.assertEqual(status, 1)
+        self.assertIn("3 rows", summary)
+        self.assertIn("1 ok, 2 errors", summary)
+
+    def test_competitors_from_csv_on_both_pools(self):
+        source = self.dir / "companies.csv"
+        source.write_text("name,ticker\nFirst Target,\n,SECOND\nThird Target,THRD\n")
+        for pool in ("thread", "async"):
+            output = self.dir / f"{pool}.jsonl"
+            status, _ = run("competitors", str(source), "-o", str(output), "--pool", pool, "--workers", "2")
+            self.assertEqual(status, 0)
+            results = sorted(records(output), key=lambda r: r["row"])
+            self.assertEqual([r["row"] for r in results], [0, 1, 2])
+            self.assertEqual(results[1]["input"], {"name": "", "ticker": "SECOND"})
+            self.assertTrue(all(len(r["competitors"]) == 5 for r in results))
+
+    def test_resume_skips_completed_rows(self):
+        source = self.dir / "companies.txt"
+        source.write_text("First Target\nSecond Target\nThird Target\n")
+        output = self.dir / "out.jsonl"
+        output.write_text(
+            '{"row": 0, "input": "First Target", "subsidiaries": []}\n'
+            '{"row": 1, "input": "Second Target", "error": "RateLimitError: slow down"}\n'
+            '{"row": 2, "input": "Third Tar'
+        )
+        status, summary = run("subsidiaries", str(source), "-o", str(output), "--resume")
+
+        self.assertEqual(status, 0)
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertIn("1 skipped as already done", summary)
+        rows = [r["row"] for r in records(output)]
+        self.assertEqual(rows[:2], [0, 1])
+        self.assertEqual(sorted(rows[2:]), [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -73,19 +73,16 @@ class TestGetCompany(unittest.TestCase):
         apple_count = sum(1 for company in result if "Apple" in company)
         self.assertGreaterEqual(apple_count, 1)
 
-    @unittest.skip("Ticker mapping disabled")
     def test_googl_ticker_symbol(self):
         prompt = "tell me about GOOGL"
         result = _get_company(prompt)
         self.assertIn("Alphabet", result)
 
-    @unittest.skip("Ticker mapping disabled")
     def test_elcpf_ticker_symbol(self):
         prompt = "tell me about ELCPF"
         result = _get_company(prompt)
         self.assertIn("EDP ENERGIAS DE PORTUGAL SA", result)
 
-    @unittest.skip("Ticker mapping disabled")
     def test_cost_earnings_query(self):
         prompt = "did COST release earnings"
         result = _get_company(prompt)
@@ -0,0 +1,112 @@
+import unittest
+import asyncio
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+from fake_openai import FakeOpenAI
+from company import (
+    Engine, Metrics, aextract_document, extract_document, segment_sentences, set_engine, set_metrics,
+    set_result_cache, _get_company,
+)
+from company.document import Sentence, has_candidate, locate, merge_mentions, pack_chunks
+from company.gazetteer import Gazetteer
+from company.rewriter import TickerRewriter
+
+
+TICKERS = {"AAPL": "Apple Inc.", "MSFT": "MICROSOFT CORP"}
+
+FILLER = "the quarter was quiet and margins held steady across the board. "
+
+
+class TestDocumentHelpers(unittest.TestCase):
+
+    def setUp(self):
+        self.gazetteer = Gazetteer(TICKERS)
+        self.rewriter = TickerRewriter(TICKERS)
+
+    def test_sentences_keep_offsets_and_abbreviations(self):
+        text = "Apple Inc. beat estimates. It bought Acme Corp. The deal closed.\nMr. Smith agreed"
+        sentences = segment_sentences(text)
+        self.assertEqual([s.text for s in sentences], [
+            "Apple Inc. beat estimates.", "It bought Acme Corp.", "The deal closed.", "Mr. Smith agreed",
+        ])
+        for sentence in sentences:
+            self.assertEqual(text[sentence.start:sentence.end], sentence.text)
+
+    def test_prefilter(self):
+        self.assertTrue(has_candidate("Shares of Initech rose.", self.gazetteer, self.rewriter))
+        self.assertTrue(has_candidate("Apple said so.", self.gazetteer, self.rewriter))
+        self.assertTrue(has_candidate("buy $msft now", self.gazetteer, self.rewriter))
+        self.assertFalse(has_candidate("The quarter was quiet.", self.gazetteer, self.rewriter))
+        self.assertFalse(has_candidate("it was quiet, we think.", self.gazetteer, self.rewriter))
+
+    def test_chunks_respect_the_token_budget(self):
+        sentences = [Sentence(i * 40, i * 40 + 40, "x" * 40) for i in range(10)]
+        chunks = pack_chunks(sentences, max_tokens=25)
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 2, 2, 2])
+        self.assertEqual(len(pack_chunks([Sentence(0, 400, "x" * 400)], max_tokens=25)), 1)
+
+    def test_locate_and_merge(self):
+        text = "Apple rallied. Later AAPL fell and apple recovered."
+        sentences = segment_sentences(text)
+        self.assertEqual(locate("Apple", sentences, self.rewriter), [(0, 5), (35, 40)])
+        self.assertEqual(locate("Apple Inc", sentences, self.rewriter), [(21, 25)])
+        mentions = merge_mentions([("Zeta Labs", [(50, 59)]), ("Orphan", []), ("zeta  labs", [(5, 14)])])
+        self.assertEqual([(m.name, m.offsets) for m in mentions], [("Zeta Labs", [(5, 14), (50, 59)]), ("Orphan", [])])
+
+    def test_similar_names_are_not_merged(self):
+        mentions = merge_mentions([("Goldman Sachs", [(0, 13)]), ("Goldman Sachs BDC", [(30, 47)])])
+        self.assertEqual(
+            [(m.name, m.offsets) for m in mentions], [("Goldman Sachs", [(0, 13)]), ("Goldman Sachs BDC", [(30, 47)])]
+        )
+        mentions = merge_mentions([("Alphabet", [(0, 8)]), ("Google", [(20, 26)])])
+        self.assertEqual([(m.name, m.offsets) for m in mentions], [("Alphabet", [(0, 8), (20, 26)])])
+
+
+class TestExtractDocument(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeOpenAI().start()
+        self.metrics = Metrics()
+        set_metrics(self.metrics)
+        set_engine(Engine(api_key="fake", base_url=self.server.base_url))
+        set_result_cache(None)
+
+    def tearDown(self):
+        self.server.stop()
+        set_engine(None)
+        set_metrics(None)
+
+    def document(self):
+        return (
+            FILLER * 20 + "Shares of Initech jumped after Globex Dynamics bid. "
+            + FILLER * 20 + "Initech said talks with Hooli Widgets continue. " + FILLER * 20
+        )
+
+    def test_long_documents_are_prefiltered_and_chunked(self):
+        text = self.document()
+        mentions = extract_document(text, chunk_tokens=15)
+        self.assertEqual(len(self.server.requests), 2)
+        prompts = "".join(str(request["messages"]) for request in self.server.requests)
+        self.assertNotIn("quarter was quiet", prompts)
+
+        by_name = {mention.name: mention.offsets for mention in mentions}
+        self.assertEqual(len(by_name["Initech"]), 2)
+        for start, end in by_name["Initech"] + by_name["Globex Dynamics"]:
+            self.assertIn(text[start:end], ("Initech", "Globex Dynamics"))
+        self.assertEqual(mentions[0].name, "Shares")
+        self.assertEqual(self.metrics.counter("document_sentences_total", result="kept"), 2)
+        self.assertEqual(self.metrics.counter("document_sentences_total", result="dropped"), 60)
+
+    def test_long_prompts_route_through_document_mode(self):
+        text = self.document() * 2
+        names = _get_company(text)
+        self.assertEqual(names, sorted(names))
+        self.assertIn("Hooli Widgets", names)
+        self.assertGreater(self.metrics.counter("document_chunks_total"), 0)
+        self.assertEqual(asyncio.run(aextract_document(text, chunk_tokens=15))[0].name, "Shares")
+
+
+if __name__ == '__main__':
+    unittest.main()
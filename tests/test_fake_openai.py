@@ -0,0 +1,67 @@
+import unittest
+import json
+import sys
+import tempfile
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+import openai
+from fake_openai import FakeOpenAI, interaction_key
+from company import Engine, set_engine, set_result_cache, _get_competitors, _stream_subsidiaries
+
+
+def ask(server, content, **kwargs):
+    client = openai.OpenAI(api_key="fake", base_url=server.base_url, max_retries=0)
+    return client.chat.completions.create(
+        model="gpt-3.5-turbo", messages=[{"role": "user", "content": content}], **kwargs
+    )
+
+
+class TestFakeOpenAI(unittest.TestCase):
+
+    def tearDown(self):
+        set_engine(None)
+        set_result_cache(None)
+
+    def test_lookups_run_against_fake_server(self):
+        with FakeOpenAI() as server:
+            set_engine(Engine(api_key="fake", base_url=server.base_url))
+            set_result_cache(None)
+            competitors = _get_competitors(company_name="Benchmark Target")
+            subsidiaries = list(_stream_subsidiaries(company_name="Benchmark Target"))
+        self.assertEqual([c["rank"] for c in competitors], [1, 2, 3, 4, 5])
+        self.assertEqual(len(subsidiaries), 3)
+        self.assertTrue(server.requests[1]["stream"])
+
+    def test_usage_is_reported(self):
+        with FakeOpenAI() as server:
+            response = ask(server, "Extract all company names ... Text: Acme Corp and Globex JSON Array:")
+        self.assertEqual(json.loads(response.choices[0].message.content), ["Acme Corp", "Globex"])
+        self.assertGreater(response.usage.prompt_tokens, 0)
+
+    def test_rate_limit_injection(self):
+        with FakeOpenAI(rate_limit_rate=1.0, retry_after=2) as server:
+            with self.assertRaises(openai.RateLimitError) as ctx:
+                ask(server, "hello")
+        self.assertEqual(ctx.exception.response.headers["retry-after"], "2")
+
+    def test_server_error_injection(self):
+        with FakeOpenAI(server_error_rate=1.0) as server:
+            with self.assertRaises(openai.InternalServerError):
+                ask(server, "hello")
+
+    def test_replay_from_cassette(self):
+        request = {"model": "gpt-3.5-turbo", "messages": [{"role": "user", "content": "hello"}]}
+        with tempfile.TemporaryDirectory() as tmp:
+            cassette = Path(tmp) / "cassette.json"
+            cassette.write_text(json.dumps({"interactions": [
+                {"key": interaction_key(request), "content": "[\"Recorded\"]"},
+            ]}))
+            with FakeOpenAI(mode="replay", cassette=cassette) as server:
+                self.assertEqual(ask(server, "hello").choices[0].message.content, "[\"Recorded\"]")
+                with self.assertRaises(openai.NotFoundError):
+                    ask(server, "something else")
+
+
+if __name__ == '__main__':
+    unittest.main()
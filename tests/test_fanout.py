@@ -0,0 +1,56 @@
+import unittest
+import asyncio
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from company.fanout import fan_out
+
+
+async def collect(agen):
+    return [item async for item in agen]
+
+
+class TestFanOut(unittest.TestCase):
+
+    def test_results_in_completion_order(self):
+        async def lookup(delay):
+            await asyncio.sleep(delay)
+            return delay * 100
+
+        results = asyncio.run(collect(fan_out(lookup, [0.03, 0.01, 0.02])))
+        self.assertEqual(results, [(0.01, 1.0), (0.02, 2.0), (0.03, 3.0)])
+
+    def test_concurrency_is_bounded(self):
+        state = {"active": 0, "peak": 0}
+
+        async def lookup(item):
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(0.01)
+            state["active"] -= 1
+            return item
+
+        results = asyncio.run(collect(fan_out(lookup, range(10), concurrency=3)))
+        self.assertEqual(sorted(r for _, r in results), list(range(10)))
+        self.assertEqual(state["peak"], 3)
+
+    def test_exceptions_are_returned(self):
+        async def lookup(item):
+            if item == "bad":
+                raise ValueError(item)
+            return item
+
+        results = dict(asyncio.run(collect(fan_out(lookup, ["good", "bad"], return_exceptions=True))))
+        self.assertEqual(results["good"], "good")
+        self.assertIsInstance(results["bad"], ValueError)
+
+    def test_exceptions_are_raised_by_default(self):
+        async def lookup(item):
+            raise ValueError(item)
+
+        with self.assertRaises(ValueError):
+            asyncio.run(collect(fan_out(lookup, ["bad"])))
+
+
+if __name__ == '__main__':
+    unittest.main()
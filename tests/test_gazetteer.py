@@ -0,0 +1,62 @@
+import unittest
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from company.gazetteer import Gazetteer
+
+
+TICKERS = {
+    "NVDA": "NVIDIA CORP",
+    "MSFT": "MICROSOFT CORP",
+    "GOOGL": "Alphabet Inc.",
+    "MCD": "MCDONALDS CORP",
+    "BAC": "BANK OF AMERICA CORP /DE/",
+    "COST": "COSTCO WHOLESALE CORP /NEW",
+    "NWSA": "NEWS CORP",
+}
+
+
+class TestGazetteer(unittest.TestCase):
+
+    def setUp(self):
+        self.gazetteer = Gazetteer(TICKERS)
+
+    def test_confident_title_matches(self):
+        names, confident = self.gazetteer.extract("news about NVIDIA and Microsoft")
+        self.assertEqual(names, ["Microsoft", "NVIDIA"])
+        self.assertTrue(confident)
+
+    def test_suffix_and_apostrophe_normalization(self):
+        names, confident = self.gazetteer.extract("Why did McDonald's Corp fall?")
+        self.assertEqual(names, ["McDonald's"])
+        self.assertTrue(confident)
+
+    def test_multi_word_title_is_longest_match(self):
+        names, _ = self.gazetteer.extract("earnings from Bank of America today")
+        self.assertEqual(names, ["Bank of America"])
+
+    def test_cashtag_ticker_resolves_to_title(self):
+        names, confident = self.gazetteer.extract("tell me about $GOOGL and $COST")
+        self.assertEqual(names, ["Alphabet", "COSTCO WHOLESALE"])
+        self.assertTrue(confident)
+
+    def test_bare_ticker_is_not_confident(self):
+        names, confident = self.gazetteer.extract("tell me about GOOGL")
+        self.assertEqual(names, ["Alphabet"])
+        self.assertFalse(confident)
+
+    def test_lowercase_match_is_not_confident(self):
+        _, confident = self.gazetteer.extract("track alphabet and Microsoft")
+        self.assertFalse(confident)
+
+    def test_unknown_capitalized_word_is_not_confident(self):
+        names, confident = self.gazetteer.extract("both Microsoft and Google LLC")
+        self.assertEqual(names, ["Microsoft"])
+        self.assertFalse(confident)
+
+    def test_no_matches(self):
+        self.assertEqual(self.gazetteer.extract("just some random text"), ([], False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+from fake_openai import FakeOpenAI, synthetic_reply
+from company import Engine, RelationGraph, collect, set_cascade, set_engine, set_result_cache
+
+
+class TestRelationGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "graph.sqlite3"
+        self.server = FakeOpenAI().start()
+        set_engine(Engine(api_key="fake", base_url=self.server.base_url))
+        set_result_cache(None)
+
+    def tearDown(self):
+        self.server.stop()
+        set_engine(None)
+        set_result_cache(None)
+        self.tmp.cleanup()
+
+    def test_two_hop_expansion_fetches_each_node_once(self):
+        graph = RelationGraph(self.path)
+        result = graph.expand("Graph Target", "competitors", hops=2, concurrency=3)
+        self.assertEqual(len(self.server.requests), 6)
+        self.assertEqual(len(result.nodes), 31)
+        self.assertEqual(sorted({n["depth"] for n in result.nodes.values()}), [0, 1, 2])
+        self.assertEqual(len(result.edges), 30)
+        self.assertEqual(result.edges[0].attrs["rank"], 1)
+
+        again = graph.expand("graph  target", "competitors", hops=2)
+        self.assertEqual(len(self.server.requests), 6)
+        self.assertEqual(again.nodes, result.nodes)
+        graph.close()
+
+    def test_lookups_keep_the_callers_context(self):
+        graph = RelationGraph()
+        with collect() as events:
+            graph.expand("Graph Target", "competitors", hops=2, concurrency=3)
+        self.assertEqual(sum(1 for event in events if event["labels"].get("stage") == "llm"), 6)
+
+    def test_failed_lookups_do_not_stop_the_expansion(self):
+        def responder(request):
+            if "Rival 2 of" in str(request["messages"]):
+                return "I cannot help with that."
+            return synthetic_reply(request)
+
+        self.server.responder = responder
+        set_cascade(False)
+        try:
+            for result in (
+                RelationGraph().expand("Graph Target", "competitors", hops=2),
+                asyncio.run(RelationGraph().aexpand("Graph Target", "competitors", hops=2)),
+            ):
+                failed = [result.nodes[key]["name"] for key in result.errors]
+                self.assertEqual(failed, ["Rival 2 of Graph Target"])
+                self.assertEqual(len(result.edges), 25)
+        finally:
+            set_cascade(None)
+
+    def test_graph_is_reloaded_from_disk(self):
+        graph = RelationGraph(self.path)
+        first = graph.expand("Graph Target", "subsidiaries", hops=1)
+        graph.close()
+
+        reopened = RelationGraph(self.path)
+        second = reopened.expand("Graph Target", "subsidiaries", hops=1)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(second.edges, first.edges)
+        reopened.close()
+
+    def test_async_expansion_respects_max_nodes(self):
+        graph = RelationGraph()
+        result = asyncio.run(graph.aexpand("Graph Target", "competitors", hops=3, max_nodes=8))
+        self.assertEqual(len(result.nodes), 8)
+        self.assertTrue(all(edge.target in result.nodes for edge in result.edges))
+        self.assertEqual(len(self.server.requests), 6)
+
+    def test_aliases_collapse_to_one_node(self):
+        graph = RelationGraph()
+        root = graph.add_node("Graph Target")
+        edges = graph.set_edges(root, "competitors", [
+            {"rank": 1, "company_name": "Alphabet Inc.", "ticker": "GOOGL", "reason": "search"},
+            {"rank": 2, "company_name": "Google", "ticker": "N/A", "reason": "search again"},
+        ])
+        self.assertEqual(len(edges), 1)
+        self.assertEqual(graph.node(edges[0].target)["ticker"], "GOOGL")
+        self.assertEqual(graph.add_node("Google"), edges[0].target)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from company import env
+
+SRC = Path(__file__).parent.parent / "src"
+
+
+def loaded_after(code: str) -> set:
+    """Run ``code`` in a fresh interpreter and return the heavy packages it imported."""
+    probe = code + "\nimport sys\nprint(' '.join(m for m in ('haystack', 'openai', 'httpx', 'dotenv') if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", probe], env=dict(os.environ, PYTHONPATH=str(SRC)),
+        capture_output=True, text=True, check=True,
+    )
+    return set(result.stdout.split())
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_import_does_not_load_llm_stack(self):
+        self.assertEqual(loaded_after("import company"), set())
+
+    def test_local_lookups_do_not_load_llm_stack(self):
+        code = (
+            "import company\n"
+            "assert company._get_company('news about $NVDA and Microsoft')\n"
+            "assert company.resolve_company('GOOGL').ticker == 'GOOGL'\n"
+            "company.TickerRewriter({'AAPL': 'Apple Inc.'}).rewrite('$AAPL')"
+        )
+        self.assertEqual(loaded_after(code), set())
+
+
+class TestLoadEnv(unittest.TestCase):
+
+    def setUp(self):
+        self._loaded = env._loaded
+        os.environ.pop("COMPANY_TEST_SETTING", None)
+
+    def tearDown(self):
+        env._loaded = self._loaded
+        os.environ.pop("COMPANY_TEST_SETTING", None)
+
+    def test_loads_explicit_file_and_only_searches_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / ".env"
+            path.write_text("COMPANY_TEST_SETTING=from-dotenv\n")
+            self.assertTrue(env.load_env(path))
+        self.assertEqual(os.environ["COMPANY_TEST_SETTING"], "from-dotenv")
+        self.assertFalse(env.load_env())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+import json
+import sys
+import tempfile
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from company import (
+    Listing, ListingIndex, Metrics, check_reply, load_bse_listings, load_nse_listings, set_listing_index, set_metrics,
+)
+from company.listings import BSE_FILE, _listing_index, split_ticker
+
+
+NSE_CSV = (
+    "SYMBOL,NAME OF COMPANY, SERIES, DATE OF LISTING, PAID UP VALUE, MARKET LOT, ISIN NUMBER, FACE VALUE\n"
+    "CDSL,Central Depository Services (India) Limited,EQ,30-JUN-2017,10,1,INE736A01011,10\n"
+    "RELIANCE,Reliance Industries Limited,EQ,29-NOV-1995,10,1,INE002A01018,10\n"
+)
+BSE_SCRIPS = {"Table": [
+    {"SCRIP_CD": "500325", "scrip_id": "RELIANCE", "Issuer_Name": "Reliance Industries Ltd", "Status": "Active",
+     "ISIN_NUMBER": "INE002A01018"},
+    {"SCRIP_CD": "532627", "scrip_id": "JPINFRATEC", "Issuer_Name": "Jaypee Infratech Ltd", "Status": "Delisted",
+     "ISIN_NUMBER": "INE099J01015"},
+    {"SCRIP_CD": "544000", "scrip_id": "ACMEPVT", "Issuer_Name": "Acme Widgets Pvt. Ltd.", "Status": "Active",
+     "ISIN_NUMBER": "INE000X01000"},
+]}
+
+US = [
+    Listing("AAPL", "US", "Apple Inc.", "320193"),
+    Listing("GOOGL", "US", "Alphabet Inc.", "1652044"),
+    Listing("GOOG", "US", "Alphabet Inc.", "1652044"),
+    Listing("BRK-B", "US", "BERKSHIRE HATHAWAY INC", "1067983"),
+]
+
+
+class TestListingLoaders(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.dir.name)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_exchange_files(self):
+        (self.root / "EQUITY_L.csv").write_text(NSE_CSV)
+        (self.root / "scrips.json").write_text(json.dumps(BSE_SCRIPS))
+        nse = list(load_nse_listings(self.root / "EQUITY_L.csv"))
+        self.assertEqual(nse[0], Listing("CDSL", "NSE", "Central Depository Services (India) Limited", "INE736A01011"))
+        self.assertEqual(nse[0].ticker, "CDSL.NS")
+        bse = list(load_bse_listings(self.root / "scrips.json"))
+        self.assertEqual([listing.ticker for listing in bse], ["RELIANCE.BO", "ACMEPVT.BO"])
+        self.assertEqual(bse[0].identifier, "INE002A01018")
+
+    def test_error_payloads_are_not_listings(self):
+        with self.assertRaises(ValueError):
+            list(load_bse_listings(BSE_FILE))
+
+    def test_split_ticker(self):
+        self.assertEqual(split_ticker(" cdsl.ns "), ("CDSL", "NSE"))
+        self.assertEqual(split_ticker("BOM:500325"), ("500325", "BSE"))
+        self.assertEqual(split_ticker("$brk.b"), ("BRK-B", "US"))
+        self.assertEqual(split_ticker("7203.T"), ("7203", ".T"))
+        self.assertEqual(split_ticker("N/A"), (None, None))
+
+
+class TestListingIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = _listing_index()
+        self.dir = tempfile.TemporaryDirectory()
+        root = Path(self.dir.name)
+        (root / "EQUITY_L.csv").write_text(NSE_CSV)
+        (root / "scrips.json").write_text(json.dumps(BSE_SCRIPS))
+        self.index = ListingIndex(
+            US + list(load_nse_listings(root / "EQUITY_L.csv")) + list(load_bse_listings(root / "scrips.json"))
+        )
+
+    def tearDown(self):
+        self.dir.cleanup()
+        set_listing_index(self.previous)
+        set_metrics(None)
+
+    def test_checks(self):
+        check = self.index.check
+        self.assertEqual(check("Apple", "aapl"), ("AAPL", "valid"))
+        self.assertEqual(check("Alphabet", "GOOG"), ("GOOG", "valid"))
+        self.assertEqual(check("Berkshire Hathaway", "BRK.B"), ("BRK-B", "valid"))
+        self.assertEqual(check("Apple", "GOOGL"), ("AAPL", "corrected"))
+        self.assertEqual(check("Central Depository Services", "CDSL"), ("CDSL.NS", "corrected"))
+        self.assertEqual(check("Central Depository Services (India) Ltd", "CDSL.BO"), ("CDSL.NS", "corrected"))
+        self.assertEqual(check("Reliance Industries", "N/A"), ("RELIANCE.NS", "filled"))
+        self.assertEqual(check("Acme Widgets Private Limited", None), ("ACMEPVT.BO", "filled"))
+        self.assertEqual(check("Made Up Holdings", "MADEUP.NS"), ("N/A", "removed"))
+        self.assertEqual(check("Made Up Holdings", "MADEUP"), ("N/A", "removed"))
+        self.assertEqual(check("Apple", "ZZQX"), ("AAPL", "corrected"))
+        self.assertEqual(check("Toyota Motor", "7203.T"), ("7203.T", "unverified"))
+        self.assertEqual(check("Private Startup", "N/A"), ("N/A", "missing"))
+        self.assertEqual(self.index.exchanges, {"US": 4, "NSE": 2, "BSE": 2})
+
+    def test_returned_rows_are_checked(self):
+        metrics = Metrics()
+        set_metrics(metrics)
+        set_listing_index(self.index)
+        reply = json.dumps([
+            {"rank": 1, "company_name": "Central Depository Services", "ticker": "CDSL", "reason": "Depository"},
+            {"rank": 2, "company_name": "Reliance Industries", "ticker": "N/A", "reason": "Conglomerate"},
+        ])
+        rows = check_reply("competitors", reply).items
+        self.assertEqual([row["ticker"] for row in rows], ["CDSL.NS", "RELIANCE.NS"])
+        self.assertEqual(metrics.counter("ticker_checks_total", relation="competitors", result="corrected"), 1)
+        self.assertEqual(metrics.counter("ticker_checks_total", relation="competitors", result="filled"), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
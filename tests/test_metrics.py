@@ -0,0 +1,127 @@
+import unittest
+import asyncio
+import json
+import sys
+import tempfile
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+from fake_openai import FakeOpenAI
+from company import (
+    Engine, JSONLExporter, Metrics, ResultCache, Scheduler, collect, set_engine, set_metrics, set_result_cache,
+    set_scheduler, summarize,
+    _aget_competitors, _get_competitors, _stream_subsidiaries,
+)
+from company.metrics import estimate_cost
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_histogram_and_prometheus_export(self):
+        metrics = Metrics()
+        for seconds in (0.003, 0.02, 0.2):
+            metrics.observe("stage_seconds", seconds, stage="llm", pipeline="competitors")
+        metrics.incr("cache_total", relation="competitors", result="hits")
+
+        histogram = metrics.histogram("stage_seconds", stage="llm", pipeline="competitors")
+        self.assertEqual(histogram.count, 3)
+        self.assertEqual(histogram.quantile(0.5), 0.025)
+
+        metrics.observe("stage_seconds", 10_000.0, stage="llm", pipeline="slow")
+        self.assertIsNone(metrics.histogram("stage_seconds", stage="llm", pipeline="slow").quantile(0.99))
+        series = [json.loads(line) for line in metrics.to_jsonl().splitlines()]
+        self.assertIn(None, [entry.get("p99") for entry in series])
+
+        text = metrics.to_prometheus()
+        self.assertIn("# TYPE company_stage_seconds histogram", text)
+        self.assertIn('company_stage_seconds_bucket{pipeline="competitors",stage="llm",le="+Inf"} 3', text)
+        self.assertIn('company_stage_seconds_count{pipeline="competitors",stage="llm"} 3', text)
+        self.assertIn('company_cache_total{relation="competitors",result="hits"} 1', text)
+
+    def test_jsonl_export_and_hooks(self):
+        metrics = Metrics()
+        seen = []
+        metrics.add_hook(seen.append)
+        metrics.add_hook(lambda event: 1 / 0)
+        metrics.record_usage("competitors", "gpt-4.1-mini", {"prompt_tokens": 1000, "completion_tokens": 500})
+
+        self.assertEqual(metrics.counter("llm_cost_usd_total", pipeline="competitors", model="gpt-4.1-mini"),
+                         estimate_cost("gpt-4.1-mini", 1000, 500))
+        self.assertIn("llm_prompt_tokens_total", [event["name"] for event in seen])
+        series = [json.loads(line) for line in metrics.to_jsonl().splitlines()]
+        self.assertIn({"type": "counter", "name": "llm_completion_tokens_total",
+                       "labels": {"model": "gpt-4.1-mini", "pipeline": "competitors"}, "value": 500}, series)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "events.jsonl"
+            metrics.add_hook(JSONLExporter(path))
+            metrics.incr("extraction_total", path="local")
+            self.assertEqual(json.loads(path.read_text())["labels"], {"path": "local"})
+
+    def test_collect_is_scoped_to_context(self):
+        metrics = Metrics()
+        with collect() as events:
+            with metrics.timed("parse"):
+                pass
+        metrics.incr("outside")
+        self.assertEqual([event["name"] for event in events], ["stage_seconds"])
+
+
+class TestInstrumentedLookups(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeOpenAI().start()
+        self.metrics = Metrics()
+        set_metrics(self.metrics)
+        set_engine(Engine(api_key="fake", base_url=self.server.base_url))
+        set_result_cache(ResultCache())
+
+    def tearDown(self):
+        self.server.stop()
+        set_engine(None)
+        set_result_cache(None)
+        set_metrics(None)
+        set_scheduler(None)
+
+    def test_stages_tokens_and_cache(self):
+        with collect() as events:
+            _get_competitors(company_name="Metrics Target")
+            _get_competitors(company_name="Metrics Target")
+        # The cascade's fast tier answers well-formed replies on its own.
+        labels = {"pipeline": "competitors_fast", "model": "gpt-4.1-nano"}
+        self.assertEqual(self.metrics.counter("llm_calls_total", **labels), 1)
+        self.assertGreater(self.metrics.counter("llm_prompt_tokens_total", **labels), 0)
+        self.assertGreater(self.metrics.counter("llm_cost_usd_total", **labels), 0)
+        self.assertEqual(self.metrics.counter("cache_total", relation="competitors", result="hits"), 1)
+        for stage in ("pipeline_build", "prompt_build", "llm"):
+            self.assertIsNotNone(self.metrics.histogram("stage_seconds", stage=stage, pipeline="competitors_fast"))
+
+        stages = {row["stage"] for row in summarize(events)}
+        self.assertTrue({"llm", "parse", "usage", "cache_total"} <= stages)
+
+    def test_async_and_streamed_usage(self):
+        asyncio.run(_aget_competitors(company_name="Async Target"))
+        list(_stream_subsidiaries(company_name="Stream Target"))
+        self.assertEqual(
+            self.metrics.counter("llm_calls_total", pipeline="competitors_fast", model="gpt-4.1-nano"), 1
+        )
+        self.assertEqual(self.metrics.counter("llm_calls_total", pipeline="subsidiaries", model="gpt-3.5-turbo"), 1)
+        self.assertIsNotNone(self.metrics.histogram("stage_seconds", stage="llm_first_chunk", pipeline="subsidiaries"))
+
+    def test_retries_are_counted(self):
+        self.server.rate_limit_rate = 1.0
+        self.server.retry_after = 0.01
+        set_scheduler(Scheduler(max_attempts=3, base_delay=0.001))
+        with self.assertRaises(Exception):
+            _get_competitors(company_name="Throttled Target")
+        # Both cascade tiers are retried, and the fast tier's failure escalates.
+        for pipeline in ("competitors_fast", "competitors"):
+            self.assertEqual(self.metrics.counter("llm_retries_total", pipeline=pipeline, reason="rate_limit"), 2)
+        self.assertEqual(self.metrics.counter("llm_http_errors_total", status=429), 6)
+        self.assertEqual(
+            self.metrics.counter("cascade_total", relation="competitors", pipeline="competitors_fast", result="error"), 1
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
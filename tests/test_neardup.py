@@ -0,0 +1,97 @@
+import unittest
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+from fake_openai import FakeOpenAI
+from company import Engine, NearDuplicateCache, set_engine, set_neardup_cache, set_result_cache, _get_company
+from company.neardup import MinHasher, shingles, similarity
+
+
+STORY = (
+    "Initech agreed on Tuesday to buy Globex Dynamics for an undisclosed sum, extending its push into "
+    "industrial software. The deal is expected to close in the third quarter pending regulatory "
+    "approval, and the combined business will be run from the existing headquarters in Ohio."
+)
+COPY = STORY.replace("on Tuesday", "late on Tuesday").replace("undisclosed sum", "undisclosed amount")
+OTHER = STORY.replace("Initech", "Hooli")
+LOWERCASE = (
+    "any news on alphabet this week? i am tracking how the company is doing after the latest earnings call, "
+    "whether analysts changed their price targets, what management said about cloud growth and spending, "
+    "and if there were any new product launches or lawsuits i should know about before friday"
+)
+
+
+class TestMinHash(unittest.TestCase):
+
+    def test_signatures_estimate_jaccard(self):
+        hasher = MinHasher(256)
+        a, b = shingles(STORY), shingles(COPY)
+        exact = len(a & b) / len(a | b)
+        self.assertAlmostEqual(similarity(hasher.signature(a), hasher.signature(b)), exact, delta=0.1)
+        self.assertEqual(similarity(hasher.signature(a), hasher.signature(a)), 1.0)
+
+    def test_numpy_and_pure_python_agree(self):
+        hasher = MinHasher(64)
+        if hasher._np is None:
+            self.skipTest("numpy is not installed")
+        hashes = shingles(STORY)
+        vectorized = hasher.signature(hashes)
+        hasher._np = None
+        self.assertEqual(hasher.signature(hashes), vectorized)
+
+
+class TestNearDuplicateCache(unittest.TestCase):
+
+    def test_near_duplicates_reuse_the_result(self):
+        cache = NearDuplicateCache(threshold=0.6)
+        cache.put(STORY, ["Globex Dynamics", "Initech"])
+        self.assertEqual(cache.get(COPY), ["Globex Dynamics", "Initech"])
+        self.assertIsNone(cache.get("A completely different story about weather in Ohio on Tuesday."))
+
+    def test_a_different_company_is_never_reused(self):
+        cache = NearDuplicateCache(threshold=0.6)
+        cache.put(STORY, ["Globex Dynamics", "Initech"])
+        self.assertIsNone(cache.get(OTHER))
+
+    def test_lowercase_company_names_are_guarded(self):
+        cache = NearDuplicateCache(threshold=0.6)
+        cache.put(LOWERCASE, ["Alphabet"])
+        self.assertEqual(cache.get(LOWERCASE.replace("this week", "lately")), ["Alphabet"])
+        self.assertIsNone(cache.get(LOWERCASE.replace("alphabet", "amazon")))
+
+    def test_eviction_bounds_memory(self):
+        cache = NearDuplicateCache(max_entries=2)
+        texts = [f"Story number {i} about Acme and its {i} widgets shipped this week" for i in range(3)]
+        for i, text in enumerate(texts):
+            cache.put(text, [i])
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(texts[0]))
+        self.assertEqual(cache.get(texts[2]), [2])
+        buckets = sum(len(ids) for bucket in cache._buckets for ids in bucket.values())
+        self.assertEqual(buckets, 2 * cache.bands)
+
+
+class TestExtractionMemo(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeOpenAI().start()
+        set_engine(Engine(api_key="fake", base_url=self.server.base_url))
+        set_result_cache(None)
+        set_neardup_cache(NearDuplicateCache(threshold=0.6))
+
+    def tearDown(self):
+        self.server.stop()
+        set_engine(None)
+        set_neardup_cache(None)
+
+    def test_syndicated_copies_skip_the_llm(self):
+        first = _get_company(STORY)
+        self.assertEqual(_get_company(COPY), first)
+        self.assertEqual(len(self.server.requests), 1)
+        _get_company(OTHER)
+        self.assertEqual(len(self.server.requests), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
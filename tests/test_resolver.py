@@ -0,0 +1,91 @@
+import unittest
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from company.company import _canonical_args
+from company.resolver import Company, Resolver, dedupe_companies
+
+
+ENTRIES = [
+    ("GOOG", 1652044, "Alphabet Inc.", 4),
+    ("GOOGL", 1652044, "Alphabet Inc.", 3),
+    ("MSFT", 789019, "MICROSOFT CORP", 1),
+    ("BRK-B", 1067983, "BERKSHIRE HATHAWAY INC", 8),
+    ("BRK-A", 1067983, "BERKSHIRE HATHAWAY INC", 9),
+    ("MCD", 63908, "MCDONALDS CORP", 40),
+    ("F", 37996, "FORD MOTOR CO", 60),
+    ("FORD", 38264, "Forward Industries, Inc.", 9000),
+]
+
+
+class TestResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.resolver = Resolver(ENTRIES, aliases={"google": "GOOGL"})
+        self.alphabet = Company(1652044, "GOOGL", "Alphabet Inc.")
+
+    def test_aliases_and_tickers_share_identity(self):
+        for query in ("Alphabet", "alphabet inc", "GOOGL", "$goog", "Google"):
+            self.assertEqual(self.resolver.resolve(query), self.alphabet, query)
+        self.assertEqual(self.resolver.ticker("goog"), self.alphabet)
+
+    def test_names_are_not_tickers(self):
+        self.assertIsNone(self.resolver.resolve("Ford", cutoff=None))
+        self.assertEqual(self.resolver.resolve("FORD").ticker, "FORD")
+        self.assertEqual(self.resolver.identify("Ford", "F").ticker, "F")
+        self.assertIsNone(self.resolver.identify("Ford", None))
+
+    def test_primary_listing_is_canonical(self):
+        self.assertEqual(self.resolver.resolve("BRK.A").ticker, "BRK-B")
+
+    def test_suffix_and_apostrophe_normalization(self):
+        self.assertEqual(self.resolver.resolve("McDonald's Corporation").ticker, "MCD")
+
+    def test_fuzzy_match(self):
+        self.assertEqual(self.resolver.resolve("Microsft").ticker, "MSFT")
+        candidates = self.resolver.candidates("Berkshire Hathway")
+        self.assertEqual(candidates[0][0].ticker, "BRK-B")
+        self.assertGreater(candidates[0][1], 0.6)
+
+    def test_cutoff(self):
+        self.assertIsNone(self.resolver.resolve("Burger King"))
+        self.assertIsNone(self.resolver.resolve("Microsft", cutoff=0.99))
+
+    def test_name_strips_suffix(self):
+        self.assertEqual(self.alphabet.name, "Alphabet")
+
+    def test_fuzzy_matches_are_not_canonical(self):
+        self.assertEqual(self.resolver.resolve("Microsft").ticker, "MSFT")
+        self.assertIsNone(self.resolver.identify("Microsft", None))
+
+    def test_invalid_input(self):
+        self.assertIsNone(self.resolver.resolve(""))
+        self.assertIsNone(self.resolver.resolve(None))
+
+
+class TestCanonicalArgs(unittest.TestCase):
+
+    def test_callers_company_is_kept(self):
+        self.assertEqual(_canonical_args("Ford", None), ("Ford", None))
+        self.assertEqual(_canonical_args("Goldman Sachs", None), ("Goldman Sachs", None))
+        self.assertEqual(_canonical_args("Costco", None), ("Costco", None))
+
+    def test_exact_identities_are_canonical(self):
+        self.assertEqual(_canonical_args("Ford", "F"), ("FORD MOTOR", "F"))
+        self.assertEqual(_canonical_args("Goldman Sachs Group", None), ("GOLDMAN SACHS GROUP", "GS"))
+        self.assertEqual(_canonical_args("Google", None), ("Alphabet", "GOOGL"))
+
+
+class TestDedupe(unittest.TestCase):
+
+    def test_similar_names_stay_distinct(self):
+        names = ["Goldman Sachs", "Goldman Sachs BDC", "Apple", "Apple Hospitality"]
+        self.assertEqual(dedupe_companies(names), names)
+
+    def test_same_identity_is_dropped(self):
+        names = ["Alphabet", "Google", "GOOGL", "Meta", "Facebook", "Zeta Labs", "zeta  labs inc"]
+        self.assertEqual(dedupe_companies(names), ["Alphabet", "Meta", "Zeta Labs"])
+
+
+if __name__ == '__main__':
+    unittest.main()
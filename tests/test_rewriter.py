@@ -0,0 +1,48 @@
+import unittest
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from company.rewriter import TickerRewriter, TickerSpan
+
+
+TICKERS = {
+    "AAPL": "Apple Inc.",
+    "COST": "COSTCO WHOLESALE CORP /NEW",
+    "INFY": "Infosys Ltd",
+    "BRK-B": "BERKSHIRE HATHAWAY INC",
+    "ON": "ON SEMICONDUCTOR CORP",
+    "A": "AGILENT TECHNOLOGIES, INC.",
+}
+
+
+class TestTickerRewriter(unittest.TestCase):
+
+    def setUp(self):
+        self.rewriter = TickerRewriter(TICKERS)
+
+    def test_rewrite_keeps_spacing_and_punctuation(self):
+        text, spans = self.rewriter.rewrite("did  COST release earnings?\n(AAPL too)")
+        self.assertEqual(text, "did  COSTCO WHOLESALE CORP release earnings?\n(Apple Inc. too)")
+        self.assertEqual([s.ticker for s in spans], ["COST", "AAPL"])
+
+    def test_spans_point_into_original_text(self):
+        prompt = "compare $aapl with INFY.NS and BRK.B"
+        spans = self.rewriter.find(prompt)
+        self.assertEqual(spans, [
+            TickerSpan(8, 13, "$aapl", "AAPL", "Apple Inc."),
+            TickerSpan(19, 26, "INFY.NS", "INFY", "Infosys Ltd"),
+            TickerSpan(31, 36, "BRK.B", "BRK-B", "BERKSHIRE HATHAWAY INC"),
+        ])
+        self.assertEqual([prompt[s.start:s.end] for s in spans], ["$aapl", "INFY.NS", "BRK.B"])
+
+    def test_ambiguous_words_need_a_cashtag(self):
+        self.assertEqual(self.rewriter.find("A chip maker ON the rise, cost cuts"), [])
+        self.assertEqual([s.ticker for s in self.rewriter.find("buy $ON and $A")], ["ON", "A"])
+
+    def test_symbols_inside_words_or_unknown_suffixes_are_left_alone(self):
+        text = "AAPLX, email@AAPL.com, COST-PLUS and INFY.XX are not tickers here"
+        self.assertEqual(self.rewriter.rewrite(text), (text, []))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+import openai
+from fake_openai import FakeOpenAI
+from company import (
+    BATCH, INTERACTIVE, Engine, Metrics, Scheduler, request_priority, set_cascade, set_engine, set_metrics,
+    set_result_cache,    _aget_competitors, _get_competitors,
+)
+from company.scheduler import TokenBucket, estimate_tokens
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_wait_time_follows_the_refill_rate(self):
+        bucket = TokenBucket(600, burst_seconds=1)  # 10 per second, holds 10
+        now = time.monotonic()
+        self.assertEqual(bucket.wait_time(10, now), 0)
+        bucket.take(10)
+        self.assertAlmostEqual(bucket.wait_time(5, now), 0.5, places=3)
+        self.assertAlmostEqual(bucket.wait_time(5, now + 0.5), 0, places=3)
+        # A request larger than the bucket waits for a full bucket, not forever.
+        self.assertAlmostEqual(bucket.wait_time(1000, now + 0.5), 0.5, places=3)
+
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens("x" * 400, 200), 300)
+
+
+class TestScheduler(unittest.TestCase):
+
+    def test_interactive_requests_overtake_queued_batch_work(self):
+        scheduler = Scheduler({"m": (60, 1_000_000)}, burst_seconds=1)  # one request per second
+        scheduler.acquire("m", 1)
+        order = []
+
+        def submit(name, priority):
+            with request_priority(priority):
+                scheduler.acquire("m", 1)
+            order.append(name)
+
+        batch = threading.Thread(target=submit, args=("batch", BATCH))
+        batch.start()
+        while scheduler.queued("m") < 1:
+            time.sleep(0.005)
+        interactive = threading.Thread(target=submit, args=("interactive", INTERACTIVE))
+        interactive.start()
+        interactive.join(5)
+        batch.join(5)
+        self.assertEqual(order, ["interactive", "batch"])
+        self.assertEqual(scheduler.queued(), 0)
+
+    def test_async_acquire_waits_for_capacity(self):
+        scheduler = Scheduler({"m": (600, 1_000_000)}, burst_seconds=0.1)  # one request per 0.1s
+
+        async def run():
+            return [await scheduler.aacquire("m", 1) for _ in range(3)]
+
+        waits = asyncio.run(run())
+        self.assertLess(waits[0], 0.01)
+        self.assertGreater(sum(waits), 0.15)
+
+    def test_observed_headers_lower_the_budget(self):
+        scheduler = Scheduler({"m": (6000, 1_000_000)})
+        scheduler.observe_headers("m", {"x-ratelimit-limit-requests": "60", "x-ratelimit-remaining-tokens": "0"})
+        limiter = scheduler._limiter("m")
+        self.assertEqual(limiter.requests.per_minute, 60)
+        self.assertGreater(limiter.tokens.wait_time(100, time.monotonic()), 0)
+
+    def test_non_retryable_errors_are_raised_at_once(self):
+        scheduler = Scheduler(base_delay=0.001)
+        calls = []
+
+        def fail():
+            calls.append(1)
+            raise ValueError("bad request")
+
+        with self.assertRaises(ValueError):
+            scheduler.call("m", 1, fail)
+        self.assertEqual(len(calls), 1)
+
+
+class TestScheduledEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeOpenAI().start()
+        self.metrics = Metrics()
+        set_metrics(self.metrics)
+        self.scheduler = Scheduler(max_attempts=4, base_delay=0.001)
+        set_engine(Engine(api_key="fake", base_url=self.server.base_url, scheduler=self.scheduler))
+        set_result_cache(None)
+        # One model per lookup, so every request below is a retry of the same call.
+        set_cascade(False)
+
+    def tearDown(self):
+        self.server.stop()
+        set_engine(None)
+        set_metrics(None)
+        set_cascade(None)
+
+    def test_rate_limits_pause_the_model_and_are_retried(self):
+        self.server.rate_limit_rate = 0.5
+        self.server.retry_after = 0.05
+        start = time.perf_counter()
+        for i in range(4):
+            try:
+                _get_competitors(company_name=f"Throttled {i}")
+            except openai.RateLimitError:
+                pass
+        retries = self.metrics.counter("llm_retries_total", pipeline="competitors", reason="rate_limit")
+        self.assertEqual(retries + 4, len(self.server.requests))
+        # Every retry waited out the server's retry-after.
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05 * retries)
+
+    def test_async_lookups_are_admitted(self):
+        asyncio.run(_aget_competitors(company_name="Async Scheduled"))
+        histogram = self.metrics.histogram("stage_seconds", stage="queue", pipeline="competitors")
+        self.assertEqual(histogram.count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import unittest
+import asyncio
+import http.client
+import json
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+from fake_openai import FakeOpenAI, synthetic_reply
+from company import Engine, Metrics, set_cascade, set_engine, set_metrics, set_neardup_cache, set_result_cache
+from company.service import Service
+
+
+def call(conn, method, path, body=None):
+    """Send one request on ``conn`` and return (status, headers, decoded body)."""
+    payload = json.dumps(body).encode() if body is not None else None
+    conn.request(method, path, body=payload, headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    raw = response.read()
+    if response.getheader("Content-Type", "").startswith("application/x-ndjson"):
+        return response.status, response, [json.loads(line) for line in raw.splitlines()]
+    if response.getheader("Content-Type", "").startswith("application/json"):
+        return response.status, response, json.loads(raw)
+    return response.status, response, raw.decode()
+
+
+class TestService(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeOpenAI().start()
+        self.metrics = Metrics()
+        set_metrics(self.metrics)
+        set_engine(Engine(api_key="fake", base_url=self.server.base_url))
+        set_result_cache(None)
+        set_neardup_cache(None)
+        set_cascade(False)
+
+    def tearDown(self):
+        self.server.stop()
+        set_engine(None)
+        set_metrics(None)
+        set_cascade(None)
+
+    def serve(self, scenario, **options):
+        """Run ``scenario(port)`` in a thread while a Service answers on a free port."""
+        async def main():
+            service = Service(**options)
+            await service.start("127.0.0.1", 0)
+            try:
+                return await asyncio.to_thread(scenario, service.address[1])
+            finally:
+                await service.close()
+
+        return asyncio.run(main())
+
+    def test_routes_and_keep_alive(self):
+        def scenario(port):
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            results = [call(conn, "GET", "/health")]
+            sock = conn.sock
+            results.append(call(conn, "POST", "/companies", {"prompt": "news on Initech and Globex"}))
+            results.append(call(conn, "POST", "/competitors", {}))
+            results.append(call(conn, "GET", "/competitors"))
+            results.append(call(conn, "POST", "/nowhere", {}))
+            results.append(call(conn, "GET", "/metrics"))
+            self.assertIs(conn.sock, sock)
+            return results
+
+        health, companies, missing, wrong_method, unknown, metrics = self.serve(scenario)
+        self.assertEqual(health[0], 200)
+        self.assertEqual(health[2]["status"], "ok")
+        self.assertEqual(health[1].getheader("Access-Control-Allow-Origin"), "*")
+        self.assertEqual(companies[2], {"companies": ["Globex", "Initech"]})
+        self.assertEqual([missing[0], wrong_method[0], unknown[0]], [400, 405, 404])
+        self.assertIn("company_service_requests_total", metrics[2])
+
+    def test_concurrent_lookups_share_one_upstream_call(self):
+        def scenario(port):
+            def lookup(name):
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+                return call(conn, "POST", "/competitors", {"company_name": name})
+
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(4) as pool:
+                return list(pool.map(lookup, ["Initech", "Globex", "Hooli", "Initech"]))
+
+        results = self.serve(scenario, window=0.2)
+        self.assertEqual([status for status, _, _ in results], [200] * 4)
+        self.assertEqual(results[0][2], results[3][2])
+        self.assertEqual(results[1][2]["competitors"][0]["company_name"], "Rival 1 of Globex")
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.metrics.counter("service_batched_lookups_total", relation="competitors"), 3)
+
+    def test_one_failing_company_does_not_fail_its_window(self):
+        def responder(request):
+            if "Hooli" in str(request["messages"]):
+                return "not json"
+            return synthetic_reply(request)
+
+        self.server.responder = responder
+
+        def scenario(port):
+            def lookup(name):
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+                return call(conn, "POST", "/competitors", {"company_name": name})
+
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(3) as pool:
+                return list(pool.map(lookup, ["Initech", "Hooli", "Globex"]))
+
+        initech, hooli, globex = self.serve(scenario, window=0.2)
+        self.assertEqual([initech[0], hooli[0], globex[0]], [200, 502, 200])
+        self.assertEqual(globex[2]["competitors"][0]["company_name"], "Rival 1 of Globex")
+        self.assertEqual(self.metrics.counter("service_batch_failures_total", relation="competitors"), 1)
+
+    def test_relation_lists_stream_as_ndjson(self):
+        def scenario(port):
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            return call(conn, "POST", "/subsidiaries?stream=1", {"company_name": "Initech"})
+
+        status, response, rows = self.serve(scenario)
+        self.assertEqual(status, 200)
+        self.assertEqual(response.getheader("Transfer-Encoding"), "chunked")
+        self.assertEqual([row["company_name"] for row in rows], [f"Initech Subsidiary {i}" for i in (1, 2, 3)])
+
+    def test_full_queues_are_refused(self):
+        def slow(request):
+            time.sleep(0.5)
+            return synthetic_reply(request)
+
+        self.server.responder = slow
+
+        def scenario(port):
+            def lookup(name):
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+                return call(conn, "POST", "/competitors", {"company_name": name})
+
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(2) as pool:
+                first = pool.submit(lookup, "Initech")
+                time.sleep(0.2)
+                second = pool.submit(lookup, "Globex")
+                return first.result(), second.result()
+
+        first, second = self.serve(scenario, max_inflight=1, max_queue=0, window=0.001)
+        self.assertEqual(first[0], 200)
+        self.assertEqual(second[0], 503)
+        self.assertEqual(second[1].getheader("Retry-After"), "1")
+
+
+if __name__ == '__main__':
+    unittest.main()
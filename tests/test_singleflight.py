@@ -0,0 +1,95 @@
+import unittest
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from company.singleflight import SingleFlight, _flight_key
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_threads_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+        results = []
+
+        def lookup():
+            calls.append(1)
+            time.sleep(0.05)
+            return [{"company_name": "Microsoft"}]
+
+        threads = [threading.Thread(target=lambda: results.append(flight.do("Alphabet", lookup))) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [[{"company_name": "Microsoft"}]] * 5)
+        self.assertEqual(flight.coalesced, 4)
+
+    def test_followers_get_copies(self):
+        flight = SingleFlight()
+
+        async def lookup():
+            await asyncio.sleep(0.01)
+            return [1]
+
+        async def main():
+            return await asyncio.gather(flight.ado("k", lookup), flight.ado("k", lookup))
+
+        leader, follower = asyncio.run(main())
+        self.assertEqual(leader, follower)
+        self.assertIsNot(leader, follower)
+
+    def test_exception_is_shared(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def lookup():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("rate limited")
+
+        async def main():
+            return await asyncio.gather(*(flight.ado("k", lookup) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(main())
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+
+    def test_cancelled_leader_does_not_cancel_followers(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def lookup():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return [1]
+
+        async def main():
+            leader = asyncio.ensure_future(flight.ado("k", lookup))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.ado("k", lookup))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            return await asyncio.gather(leader, follower, return_exceptions=True)
+
+        leader, follower = asyncio.run(main())
+        self.assertIsInstance(leader, asyncio.CancelledError)
+        self.assertEqual(follower, [1])
+        self.assertEqual(len(calls), 1)
+
+    def test_sequential_calls_are_not_coalesced(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do("k", lambda: 1), 1)
+        self.assertEqual(flight.do("k", lambda: 2), 2)
+
+    def test_flight_key_normalization(self):
+        self.assertEqual(_flight_key("competitors", " Alphabet  Inc ", None), _flight_key("competitors", "alphabet inc", ""))
+        self.assertNotEqual(_flight_key("competitors", "Alphabet", None), _flight_key("subsidiaries", "Alphabet", None))
+
+
+if __name__ == '__main__':
+    unittest.main()
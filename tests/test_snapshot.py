@@ -0,0 +1,123 @@
+import unittest
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+from fake_openai import FakeOpenAI, synthetic_reply
+from company import (
+    Engine, Metrics, ResultCache, Snapshot, build_snapshot, set_engine, set_metrics, set_result_cache, set_snapshot, snapshot_age,
+    _aget_competitors, _get_competitors, _get_subsidiaries, _stream_competitors,
+)
+from company.snapshot import _read_checkpoint, write_snapshot
+
+
+COMPANIES = {1652044: ("Alphabet", ["GOOGL", "GOOG"]), 320193: ("Apple", ["AAPL"])}
+ROWS = [
+    {"rank": 1, "company_name": "Microsoft", "ticker": "MSFT", "reason": "Search and cloud"},
+    {"rank": 2, "company_name": "Amazon", "ticker": "AMZN", "reason": "Cloud"},
+]
+
+
+class TestSnapshotFile(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name) / "relations.snap"
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_round_trip(self):
+        results = {("competitors", 1652044): ROWS, ("competitors", 320193): [], ("subsidiaries", 320193): [
+            {"company_name": "Apple Operations International", "ticker": "N/A", "details": "Irish holding company"},
+        ]}
+        snapshot = Snapshot(write_snapshot(self.path, COMPANIES, results, built_at=time.time() - 3600))
+        self.assertEqual(len(snapshot), 2)
+        self.assertEqual(snapshot.get("competitors", "goog"), ROWS)
+        self.assertEqual(snapshot.get("competitors", cik=1652044), ROWS)
+        self.assertEqual(snapshot.get("competitors", "AAPL"), [])
+        self.assertEqual(snapshot.get("subsidiaries", "AAPL")[0]["details"], "Irish holding company")
+        self.assertIsNone(snapshot.get("subsidiaries", "GOOGL"))
+        self.assertIsNone(snapshot.get("competitors", "MSFT"))
+        self.assertEqual(snapshot.company("GOOG"), (1652044, "Alphabet", "GOOGL"))
+        self.assertEqual(snapshot.rows, {"competitors": 2, "subsidiaries": 1})
+        self.assertAlmostEqual(snapshot.age, 3600, delta=5)
+
+    def test_other_files_are_rejected(self):
+        self.path.write_bytes(b"CTIX" + bytes(60))
+        with self.assertRaises(ValueError):
+            Snapshot(self.path)
+        write_snapshot(self.path, COMPANIES, {})
+        self.path.write_bytes(self.path.read_bytes()[:-1])
+        with self.assertRaises(ValueError):
+            Snapshot(self.path)
+
+
+class TestSnapshotBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name) / "relations.snap"
+        self.server = FakeOpenAI().start()
+        self.metrics = Metrics()
+        set_metrics(self.metrics)
+        set_engine(Engine(api_key="fake", base_url=self.server.base_url))
+        set_result_cache(None)
+
+    def tearDown(self):
+        self.server.stop()
+        set_engine(None)
+        set_metrics(None)
+        set_snapshot(None)
+        self.dir.cleanup()
+
+    def test_builds_resume_after_failures(self):
+        def responder(request):
+            if "MICROSOFT" in str(request["messages"]).upper():
+                return "not json"
+            return synthetic_reply(request)
+
+        self.server.responder = responder
+        tickers = ["AAPL", "MSFT"]
+        snapshot = Snapshot(build_snapshot(self.path, ["competitors"], tickers, workers=2, progress=0))
+        self.assertTrue(snapshot.get("competitors", "AAPL"))
+        self.assertIsNone(snapshot.get("competitors", "MSFT"))
+        self.assertIsNone(snapshot.get("subsidiaries", "AAPL"))
+
+        self.server.responder = synthetic_reply
+        before = len(self.server.requests)
+        snapshot = Snapshot(build_snapshot(self.path, ["competitors"], tickers, workers=2, progress=0))
+        self.assertEqual(len(self.server.requests) - before, 1)
+        self.assertTrue(snapshot.get("competitors", "MSFT"))
+        self.assertEqual(len(_read_checkpoint(self.path.with_name("relations.snap.jsonl"))), 2)
+
+    def test_builds_do_not_reuse_cached_results(self):
+        set_result_cache(ResultCache())
+        _get_competitors(company_ticker="AAPL")
+        build_snapshot(self.path, ["competitors"], ["AAPL"], workers=1, progress=0)
+        self.assertEqual(len(self.server.requests), 2)
+        _get_competitors(company_ticker="AAPL")
+        self.assertEqual(len(self.server.requests), 2)
+        set_result_cache(None)
+
+    def test_lookups_read_the_snapshot_before_the_llm(self):
+        write_snapshot(self.path, COMPANIES, {("competitors", 1652044): ROWS}, built_at=time.time() - 86400)
+        set_snapshot(Snapshot(self.path))
+        self.assertEqual(_get_competitors(company_name="Alphabet"), ROWS)
+        self.assertEqual(_get_competitors(company_ticker="GOOG"), ROWS)
+        self.assertEqual(asyncio.run(_aget_competitors(company_name="Google")), ROWS)
+        self.assertEqual(list(_stream_competitors(company_ticker="GOOGL")), ROWS)
+        self.assertEqual(len(self.server.requests), 0)
+        self.assertAlmostEqual(snapshot_age(), 86400, delta=5)
+
+        _get_subsidiaries(company_ticker="GOOGL")
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.metrics.counter("snapshot_total", relation="competitors", result="hits"), 4)
+        self.assertEqual(self.metrics.counter("snapshot_total", relation="subsidiaries", result="misses"), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import json
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from company import ResultCache, set_engine, set_result_cache, _stream_competitors
+from company.streaming import JSONArrayParser
+
+
+REPLY = '```json\n[{"rank": 1, "company_name": "NSDL", "ticker": "N/A", "reason": "Depository {\\"core\\"}"},' \
+        ' {"rank": 2, "company_name": "Link [Intime]", "ticker": "N/A", "reason": "Registry"}]\n```'
+
+
+def feed_in_chunks(parser, text, size):
+    objects = []
+    for start in range(0, len(text), size):
+        objects.extend(parser.feed(text[start:start + size]))
+    return objects
+
+
+class FakeEngine:
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+
+    def stream(self, name, **variables):
+        self.calls += 1
+        for start in range(0, len(self.reply), 7):
+            yield self.reply[start:start + 7]
+
+
+class TestJSONArrayParser(unittest.TestCase):
+
+    def test_objects_match_full_parse(self):
+        expected = json.loads(REPLY.strip("`").replace("json\n", "", 1))
+        for size in (1, 3, 16, len(REPLY)):
+            parser = JSONArrayParser()
+            self.assertEqual(feed_in_chunks(parser, REPLY, size), expected)
+            self.assertTrue(parser.complete)
+
+    def test_object_is_emitted_at_its_closing_brace(self):
+        parser = JSONArrayParser()
+        self.assertEqual(parser.feed('[{"rank": 1'), [])
+        self.assertEqual(parser.feed('}, {"rank"'), [{"rank": 1}])
+        self.assertFalse(parser.complete)
+
+    def test_empty_array(self):
+        parser = JSONArrayParser()
+        self.assertEqual(parser.feed("[]"), [])
+        self.assertTrue(parser.complete)
+
+
+class TestStreamCompetitors(unittest.TestCase):
+
+    def tearDown(self):
+        set_engine(None)
+        set_result_cache(None)
+
+    def test_streamed_rows_are_cached(self):
+        engine = FakeEngine(REPLY)
+        set_engine(engine)
+        set_result_cache(ResultCache())
+        first = list(_stream_competitors(company_name="CDSL"))
+        second = list(_stream_competitors(company_name="CDSL"))
+        self.assertEqual([c["company_name"] for c in first], ["NSDL", "Link [Intime]"])
+        self.assertEqual(first, second)
+        self.assertEqual(engine.calls, 1)
+
+    def test_truncated_stream_is_not_cached(self):
+        engine = FakeEngine(REPLY[:REPLY.index("Link")])
+        set_engine(engine)
+        set_result_cache(ResultCache())
+        self.assertEqual(len(list(_stream_competitors(company_name="CDSL"))), 1)
+        list(_stream_competitors(company_name="CDSL"))
+        self.assertEqual(engine.calls, 2)
+
+    def test_invalid_input(self):
+        self.assertEqual(list(_stream_competitors()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import json
+import sys
+import tempfile
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from company.ticker_index import TickerIndex, build_index
+
+
+class TestTickerIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        source = Path(self.tmp.name) / "tickers.json"
+        source.write_text(json.dumps({
+            "0": {"cik_str": 1045810, "ticker": "NVDA", "title": "NVIDIA CORP"},
+            "1": {"cik_str": 1652044, "ticker": "GOOGL", "title": "Alphabet Inc."},
+            "2": {"cik_str": 1652044, "ticker": "GOOG", "title": "Alphabet Inc."},
+            "3": {"cik_str": 1067983, "ticker": "BRK-B", "title": "BERKSHIRE HATHAWAY INC"},
+        }))
+        self.index = TickerIndex(build_index(source, Path(self.tmp.name) / "tickers.idx"))
+
+    def tearDown(self):
+        self.index._mm.close()
+        self.tmp.cleanup()
+
+    def test_lookup(self):
+        self.assertEqual(self.index["NVDA"], "NVIDIA CORP")
+        self.assertEqual(self.index.lookup("googl"), (1652044, "Alphabet Inc."))
+        self.assertEqual(self.index["BRK-B"], "BERKSHIRE HATHAWAY INC")
+
+    def test_missing_ticker(self):
+        self.assertNotIn("AAPL", self.index)
+        self.assertIsNone(self.index.lookup("AAPL"))
+        with self.assertRaises(KeyError):
+            self.index["AAPL"]
+
+    def test_iteration_is_sorted(self):
+        self.assertEqual(list(self.index), ["BRK-B", "GOOG", "GOOGL", "NVDA"])
+        self.assertEqual(len(self.index), 4)
+
+    def test_rejects_foreign_file(self):
+        bogus = Path(self.tmp.name) / "bogus.idx"
+        bogus.write_bytes(b"not an index at all")
+        with self.assertRaises(ValueError):
+            TickerIndex(bogus)
+
+
+if __name__ == '__main__':
+    unittest.main()